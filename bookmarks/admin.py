@@ -1,6 +1,7 @@
 import os
 
 from django import forms
+from django.conf import settings
 from django.contrib import admin, messages
 from django.contrib.admin import AdminSite
 from django.contrib.auth.admin import UserAdmin
@@ -17,11 +18,13 @@ from bookmarks.models import (
     Bookmark,
     BookmarkAsset,
     BookmarkBundle,
+    BookmarkChange,
     FeedToken,
     Tag,
     Toast,
     UserProfile,
 )
+from bookmarks.services import snapshot_workers
 from bookmarks.services.bookmarks import archive_bookmark, unarchive_bookmark
 
 
@@ -74,6 +77,19 @@ def background_task_view(request):
     return render(request, "admin/background_tasks.html", context)
 
 
+# Custom view to display the status of the HTML snapshot workers
+def snapshot_workers_view(request):
+    status = snapshot_workers.get_status()
+    context = {
+        **linkding_admin_site.each_context(request),
+        "title": "Snapshot workers",
+        "pool_size": settings.LD_SNAPSHOT_WORKERS,
+        "status": status,
+        "workers": status["workers"] if status else [],
+    }
+    return render(request, "admin/snapshot_workers.html", context)
+
+
 class LinkdingAdminSite(AdminSite):
     site_header = "linkding administration"
     site_title = "linkding Admin"
@@ -82,6 +98,12 @@ class LinkdingAdminSite(AdminSite):
         urls = super().get_urls()
         custom_urls = [
             path("tasks/", background_task_view, name="background_tasks"),
+            # The status contains bookmark URLs, only show it to admins
+            path(
+                "snapshot-workers/",
+                self.admin_view(snapshot_workers_view),
+                name="snapshot_workers",
+            ),
         ]
         return custom_urls + urls
 
@@ -98,7 +120,13 @@ class LinkdingAdminSite(AdminSite):
                         "object_name": "background_tasks",
                         "admin_url": f"/{context_path}admin/tasks/",
                         "view_only": True,
-                    }
+                    },
+                    {
+                        "name": "Snapshot workers",
+                        "object_name": "snapshot_workers",
+                        "admin_url": f"/{context_path}admin/snapshot-workers/",
+                        "view_only": True,
+                    },
                 ],
             }
         ]
@@ -203,6 +231,7 @@ class AdminBookmark(admin.ModelAdmin):
     def mark_as_read(self, request, queryset: QuerySet):
         bookmarks_count = queryset.count()
         queryset.update(unread=False)
+        BookmarkChange.record_query(queryset)
         self.message_user(
             request,
             ngettext(
@@ -217,6 +246,7 @@ class AdminBookmark(admin.ModelAdmin):
     def mark_as_unread(self, request, queryset: QuerySet):
         bookmarks_count = queryset.count()
         queryset.update(unread=True)
+        BookmarkChange.record_query(queryset)
         self.message_user(
             request,
             ngettext(
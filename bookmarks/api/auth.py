@@ -1,8 +1,45 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication, get_authorization_header
 
-from bookmarks.models import ApiToken
+from bookmarks.models import ApiToken, UserProfile
+
+# Maps token keys to (token, expires) tuples, the token has its user and
+# profile already loaded
+_token_cache = {}
+_token_cache_lock = threading.Lock()
+
+
+def clear_token_cache(user_id: int | None = None):
+    with _token_cache_lock:
+        if user_id is None:
+            _token_cache.clear()
+            return
+        for key, (token, _expires) in list(_token_cache.items()):
+            if token.user_id == user_id:
+                del _token_cache[key]
+
+
+@receiver(post_delete, sender=ApiToken)
+def api_token_deleted(sender, instance, **kwargs):
+    with _token_cache_lock:
+        _token_cache.pop(instance.key, None)
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def api_token_user_changed(sender, instance, **kwargs):
+    # Covers deactivated users, as well as changes to the cached user or profile
+    user_id = instance.pk if sender is User else instance.user_id
+    clear_token_cache(user_id)
 
 
 class LinkdingTokenAuthentication(TokenAuthentication):
@@ -36,3 +73,33 @@ class LinkdingTokenAuthentication(TokenAuthentication):
             raise exceptions.AuthenticationFailed(msg) from None
 
         return self.authenticate_credentials(token)
+
+    def authenticate_credentials(self, key):
+        """
+        Resolves the token from a cache in process memory, so that API calls
+        with a known token don't query the token, user and profile. Returns
+        copies of the user and profile, as views may modify them.
+        """
+        timeout = settings.API_TOKEN_CACHE_TIMEOUT
+
+        with _token_cache_lock:
+            token, expires = _token_cache.get(key, (None, 0))
+
+        if token is None or time.monotonic() >= expires:
+            try:
+                token = self.model.objects.select_related("user__profile").get(key=key)
+            except self.model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token.")) from None
+
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+            if timeout > 0:
+                with _token_cache_lock:
+                    _token_cache[key] = (token, time.monotonic() + timeout)
+
+        user = copy.copy(token.user)
+        user.profile = copy.copy(token.user.profile)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
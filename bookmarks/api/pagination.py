@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Fields that bookmark lists can be sorted by with keyset pagination, with a
+# function that parses a value of the field from a cursor
+KEYSET_FIELDS = {
+    "date_added": parse_datetime,
+    "title_sort_key": str,
+}
+
+
+class BookmarkPagination(LimitOffsetPagination):
+    """
+    Paginates bookmark lists by offset by default. Requests with a `cursor`
+    parameter use keyset pagination instead, which continues after the last
+    bookmark of the previous page. It does not need to count or skip the
+    preceding bookmarks, so pages deep into a large list stay fast, and
+    bookmarks that are added or removed meanwhile don't shift the pages.
+    """
+
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        field, descending = self._get_keyset_field(queryset)
+        self.keyset_field = field
+
+        id_order = "-id" if descending else "id"
+        queryset = queryset.annotate(cursor_value=F(field)).order_by(
+            f"-{field}" if descending else field, id_order
+        )
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            value, last_id = self._decode_cursor(cursor)
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": value})
+                | Q(**{field: value, f"id__{lookup}": last_id})
+            )
+
+        rows = list(queryset[: self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[: self.limit]
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+
+        return Response(
+            {
+                "next": self.get_next_cursor_link(),
+                "previous": None,
+                "results": data,
+            }
+        )
+
+    def get_next_cursor_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        cursor = self._encode_cursor(self.last_row["cursor_value"], self.last_row["id"])
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _get_keyset_field(self, queryset) -> tuple[str, bool]:
+        ordering = queryset.query.order_by
+        field = ordering[0] if ordering else None
+        if not isinstance(field, str) or field.lstrip("-") not in KEYSET_FIELDS:
+            raise ValidationError(
+                {"cursor": ["Cursor pagination is not supported for this sort order."]}
+            )
+        return field.lstrip("-"), field.startswith("-")
+
+    def _encode_cursor(self, value, last_id: int) -> str:
+        if self.keyset_field == "date_added":
+            value = value.isoformat()
+        data = json.dumps([value, last_id]).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def _decode_cursor(self, cursor: str):
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            value = KEYSET_FIELDS[self.keyset_field](value)
+            if value is None or not isinstance(last_id, int):
+                raise ValueError()
+        except (ValueError, TypeError, binascii.Error):
+            raise ValidationError({"cursor": ["Invalid cursor."]}) from None
+        return value, last_id
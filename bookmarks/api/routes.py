@@ -1,23 +1,28 @@
-import gzip
 import logging
-import os
 
 from django.conf import settings
-from django.http import Http404, StreamingHttpResponse
+from django.db.models import Count
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from bookmarks import queries
+from bookmarks.api.pagination import BookmarkPagination
 from bookmarks.api.serializers import (
     BookmarkAssetSerializer,
     BookmarkBundleSerializer,
     BookmarkSerializer,
+    BookmarkValuesSerializer,
     TagSerializer,
     UserProfileSerializer,
 )
+from bookmarks.db_routers import use_read_replica
 from bookmarks.models import (
     Bookmark,
     BookmarkAsset,
@@ -25,21 +30,31 @@ from bookmarks.models import (
     BookmarkSearch,
     Tag,
     User,
+    build_tag_string,
 )
 from bookmarks.services import (
     assets,
     auto_tagging,
     bookmarks,
     bundles,
+    changes,
     tasks,
     website_loader,
 )
 from bookmarks.type_defs import HttpRequest
 from bookmarks.utils import normalize_url
-from bookmarks.views import access
+from bookmarks.views import access, conditional
+from bookmarks.views.assets import asset_file_response
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of URLs that can be looked up with one exists request
+MAX_EXISTS_URLS = 200
+# Maximum number of bookmarks that can be created with one batch request
+MAX_BATCH_BOOKMARKS = 100
+DEFAULT_CHANGES_LIMIT = 100
+MAX_CHANGES_LIMIT = 1000
+
 
 class BookmarkViewSet(
     viewsets.GenericViewSet,
@@ -51,6 +66,7 @@ class BookmarkViewSet(
 ):
     request: HttpRequest
     serializer_class = BookmarkSerializer
+    pagination_class = BookmarkPagination
 
     def get_permissions(self):
         # Allow unauthenticated access to shared bookmarks.
@@ -95,6 +111,59 @@ class BookmarkViewSet(
             "prefer_async_metadata": prefer_async_metadata,
         }
 
+    def get_requested_fields(self) -> list[str] | None:
+        fields_param = self.request.GET.get("fields")
+        if not fields_param:
+            return None
+
+        fields = [field.strip() for field in fields_param.split(",") if field.strip()]
+        invalid_fields = [
+            field for field in fields if field not in BookmarkSerializer.Meta.fields
+        ]
+        if invalid_fields:
+            raise ValidationError(
+                {"fields": [f"Invalid fields: {', '.join(invalid_fields)}"]}
+            )
+        return fields
+
+    def get_list_etag(self, request: HttpRequest, *args, **kwargs):
+        shared = self.action == "shared"
+        user = request.user if request.user.is_authenticated else None
+        state = [
+            conditional.get_bookmarks_state(user, shared),
+            conditional.get_profile_state(
+                user.profile if user else request.user_profile
+            ),
+        ]
+        if request.GET.get("bundle") and user:
+            state.append(conditional.get_bundles_state(user))
+        return conditional.build_etag(request, *state)
+
+    @method_decorator(use_read_replica)
+    def list(self, request: HttpRequest, *args, **kwargs):
+        # Clients that poll for changes get a 304 response, unless the list
+        # has changed
+        list_view = condition(etag_func=self.get_list_etag)(self._list_bookmarks)
+        return list_view(request, *args, **kwargs)
+
+    def _list_bookmarks(self, request: HttpRequest, *args, **kwargs):
+        # Pages can contain up to thousands of bookmarks, serialize them from
+        # plain values instead of model instances
+        serializer = BookmarkValuesSerializer(request, self.get_requested_fields())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*serializer.get_values_fields())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+
+        return Response(serializer.to_representation(list(queryset)))
+
+    def retrieve(self, request: HttpRequest, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, fields=self.get_requested_fields())
+        return Response(serializer.data)
+
     @action(methods=["get"], detail=False)
     def archived(self, request: HttpRequest):
         return self.list(request)
@@ -181,6 +250,130 @@ class BookmarkViewSet(
             status=status.HTTP_200_OK,
         )
 
+    @action(methods=["post"], detail=False)
+    def batch(self, request: HttpRequest):
+        items = (
+            request.data.get("bookmarks") if isinstance(request.data, dict) else None
+        )
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "At least one bookmark is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > MAX_BATCH_BOOKMARKS:
+            return Response(
+                {
+                    "error": f"At most {MAX_BATCH_BOOKMARKS} bookmarks can be "
+                    "created at once."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate all items first, invalid items are reported without
+        # preventing the valid ones from being saved
+        results = []
+        valid_items = []
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                validated_data = dict(serializer.validated_data)
+                tag_names = validated_data.pop("tag_names", [])
+                valid_items.append(
+                    (Bookmark(**validated_data), build_tag_string(tag_names))
+                )
+                results.append(None)
+            else:
+                results.append({"status": "invalid", "errors": serializer.errors})
+
+        context = self.get_serializer_context()
+        saved = bookmarks.create_bookmarks(
+            valid_items,
+            request.user,
+            disable_html_snapshot=context["disable_html_snapshot"],
+            schedule_metadata_enrichment=not context["disable_scraping"],
+        )
+        saved_data = iter(
+            self.get_serializer(
+                [bookmark for bookmark, _created in saved], many=True
+            ).data
+        )
+        saved_results = iter(saved)
+        for index, result in enumerate(results):
+            if result is None:
+                _bookmark, created = next(saved_results)
+                results[index] = {
+                    "status": "created" if created else "updated",
+                    "bookmark": next(saved_data),
+                }
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    @action(methods=["get"], detail=False)
+    def changes(self, request: HttpRequest):
+        try:
+            since = int(request.GET.get("since", 0))
+            limit = int(request.GET.get("limit", DEFAULT_CHANGES_LIMIT))
+        except ValueError:
+            return Response(
+                {"error": "The since and limit parameters must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, MAX_CHANGES_LIMIT))
+
+        page = changes.get_changes(request.user, since, limit)
+        changed_bookmarks = [c.bookmark for c in page.changes if c.bookmark]
+        bookmark_data = {
+            data["id"]: data
+            for data in self.get_serializer(changed_bookmarks, many=True).data
+        }
+
+        return Response(
+            {
+                "changes": [
+                    {
+                        "seq": change.seq,
+                        "action": change.action,
+                        "bookmark_id": change.bookmark_id,
+                        "bookmark": bookmark_data.get(change.bookmark_id),
+                    }
+                    for change in page.changes
+                ],
+                "next_since": page.next_since,
+                "has_more": page.has_more,
+                "reset": page.reset,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=["get", "post"], detail=False)
+    def exists(self, request: HttpRequest):
+        # Lightweight alternative to the check endpoint, which only looks up
+        # bookmarked URLs without loading website metadata
+        if request.method == "POST":
+            urls = request.data.get("urls") if isinstance(request.data, dict) else None
+        else:
+            urls = request.GET.getlist("url")
+
+        if (
+            not isinstance(urls, list)
+            or not urls
+            or not all(isinstance(url, str) for url in urls)
+        ):
+            return Response(
+                {"error": "At least one URL is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(urls) > MAX_EXISTS_URLS:
+            return Response(
+                {"error": f"At most {MAX_EXISTS_URLS} URLs can be checked at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        existing_ids = Bookmark.query_existing_ids(request.user, urls)
+        results = [{"url": url, "bookmark_id": existing_ids.get(url)} for url in urls]
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
     @action(methods=["post"], detail=False)
     def singlefile(self, request: HttpRequest):
         if settings.LD_DISABLE_ASSET_UPLOAD:
@@ -209,7 +402,7 @@ class BookmarkViewSet(
             except website_loader.RetryableMetadataError:
                 tasks.schedule_metadata_enrichment(bookmark)
 
-        assets.upload_snapshot(bookmark, file.read())
+        assets.upload_snapshot(bookmark, file)
 
         return Response(
             {"message": "Snapshot uploaded successfully."},
@@ -241,20 +434,13 @@ class BookmarkAssetViewSet(
     def download(self, request: HttpRequest, bookmark_id, pk):
         asset = self.get_object()
         try:
-            file_path = os.path.join(settings.LD_ASSET_FOLDER, asset.file)
-            content_type = asset.content_type
-            file_stream = (
-                gzip.GzipFile(file_path, mode="rb")
-                if asset.gzip
-                else open(file_path, "rb")  # noqa: SIM115
-            )
-            response = StreamingHttpResponse(file_stream, content_type=content_type)
+            response = asset_file_response(request, asset, asset.content_type)
             response["Content-Disposition"] = (
                 f'attachment; filename="{asset.download_name}"'
             )
             return response
-        except FileNotFoundError:
-            raise Http404("Asset file does not exist") from None
+        except Http404:
+            raise
         except Exception as e:
             logger.error(
                 f"Failed to download asset. bookmark_id={bookmark_id}, asset_id={pk}",
@@ -311,6 +497,40 @@ class TagViewSet(
     def get_serializer_context(self):
         return {"user": self.request.user}
 
+    def get_names_etag(self, request: HttpRequest, *args, **kwargs):
+        # Bookmark changes change the counts of their tags
+        user = request.user
+        return conditional.build_etag(
+            request,
+            conditional.get_data_version(user),
+            conditional.get_tags_state(user),
+        )
+
+    @action(methods=["get"], detail=False)
+    @method_decorator(use_read_replica)
+    def names(self, request: HttpRequest):
+        # Compact list of all tag names for the autocomplete cache in the
+        # frontend. The ETag is computed from a few aggregates, so that clients
+        # can revalidate their cached copy without querying all tags again.
+        names_view = condition(etag_func=self.get_names_etag)(self._list_names)
+        response = names_view(request)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def _list_names(self, request: HttpRequest):
+        with_counts = request.GET.get("counts", False) in ["true"]
+        tags = Tag.objects.filter(owner=request.user)
+        if with_counts:
+            tags = tags.annotate(count=Count("bookmark"))
+            tag_data = [
+                {"name": name, "count": count}
+                for name, count in tags.values_list("name", "count")
+            ]
+            tag_data.sort(key=lambda tag: tag["name"].lower())
+        else:
+            tag_data = sorted(tags.values_list("name", flat=True), key=str.lower)
+        return Response({"tags": tag_data})
+
 
 class UserViewSet(viewsets.GenericViewSet):
     @action(methods=["get"], detail=False)
@@ -1,5 +1,10 @@
+from collections import defaultdict
+
+from django.conf import settings
 from django.db.models import prefetch_related_objects
 from django.templatetags.static import static
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 from rest_framework.serializers import ListSerializer
 
@@ -113,6 +118,13 @@ class BookmarkSerializer(serializers.ModelSerializer):
     date_added = serializers.DateTimeField(required=False)
     date_modified = serializers.DateTimeField(required=False)
 
+    def __init__(self, *args, fields: list[str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only serialize the requested fields
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
     def get_favicon_url(self, obj: Bookmark):
         if not obj.favicon_file:
             return None
@@ -195,6 +207,100 @@ class BookmarkSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class BookmarkValuesSerializer:
+    """
+    Read-only serializer for bookmark lists that produces the same output as
+    `BookmarkSerializer`. Instead of model instances it works on `.values()`
+    rows and loads tag names with a single query, which avoids the overhead
+    of model and serializer fields for large pages.
+    """
+
+    # Columns that computed fields are generated from
+    source_fields = {
+        "favicon_url": ["favicon_file"],
+        "preview_image_url": ["preview_image_file"],
+        "web_archive_snapshot_url": ["web_archive_snapshot_url", "url", "date_added"],
+        "tag_names": [],
+        "website_title": [],
+        "website_description": [],
+    }
+    datetime_fields = ["date_added", "date_modified", "date_deleted"]
+
+    def __init__(self, request, fields: list[str] | None = None):
+        self.request = request
+        self.fields = fields if fields is not None else BookmarkSerializer.Meta.fields
+
+    def get_values_fields(self) -> list[str]:
+        values_fields = ["id"]
+        for field in self.fields:
+            for source_field in self.source_fields.get(field, [field]):
+                if source_field not in values_fields:
+                    values_fields.append(source_field)
+        return values_fields
+
+    def to_representation(self, rows: list[dict]) -> list[dict]:
+        getters = [(field, self._get_getter(field, rows)) for field in self.fields]
+        return [{field: getter(row) for field, getter in getters} for row in rows]
+
+    def _get_getter(self, field: str, rows: list[dict]):
+        if field == "tag_names":
+            tag_names = self._load_tag_names(rows)
+            return lambda row: tag_names.get(row["id"], [])
+        if field == "favicon_url":
+            return self._get_static_url_getter("favicon_file")
+        if field == "preview_image_url":
+            return self._get_static_url_getter("preview_image_file")
+        if field == "web_archive_snapshot_url":
+            return lambda row: (
+                row["web_archive_snapshot_url"]
+                or generate_fallback_webarchive_url(row["url"], row["date_added"])
+            )
+        if field in ("website_title", "website_description"):
+            return lambda row: None
+        if field in self.datetime_fields:
+            # Matches the ISO 8601 output of DRF's DateTimeField, but resolves
+            # the current timezone only once
+            current_timezone = (
+                timezone.get_current_timezone() if settings.USE_TZ else None
+            )
+            return lambda row: (
+                self._format_datetime(row[field], current_timezone)
+                if row[field] is not None
+                else None
+            )
+        return lambda row: row[field]
+
+    @staticmethod
+    def _format_datetime(value, current_timezone) -> str:
+        if current_timezone is not None:
+            value = value.astimezone(current_timezone)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    def _get_static_url_getter(self, file_field: str):
+        # Resolve the static URL prefix once, instead of calling `static()` and
+        # `build_absolute_uri()` for every row
+        static_url = self.request.build_absolute_uri(static(""))
+        return lambda row: (
+            static_url + filepath_to_uri(row[file_field]).lstrip("/")
+            if row[file_field]
+            else None
+        )
+
+    def _load_tag_names(self, rows: list[dict]) -> dict[int, list[str]]:
+        tag_names = defaultdict(list)
+        relations = Bookmark.tags.through.objects.filter(
+            bookmark_id__in=[row["id"] for row in rows]
+        ).values_list("bookmark_id", "tag__name")
+        for bookmark_id, tag_name in relations:
+            tag_names[bookmark_id].append(tag_name)
+        for names in tag_names.values():
+            names.sort()
+        return tag_names
+
+
 class BookmarkAssetSerializer(serializers.ModelSerializer):
     class Meta:
         model = BookmarkAsset
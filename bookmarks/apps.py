@@ -5,5 +5,6 @@ class BookmarksConfig(AppConfig):
     name = "bookmarks"
 
     def ready(self):
-        # Register signal handlers
-        pass
+        # Register signal handlers for tuning SQLite connections. The handlers
+        # in bookmarks.signals are not registered.
+        import bookmarks.sqlite  # noqa: F401
@@ -0,0 +1,75 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+READ_REPLICA_ALIAS = "replica"
+# Set after a request that modified data, so that reads within the following
+# seconds see the changes even if the replica lags behind
+PRIMARY_STICKY_COOKIE = "ld_db_primary"
+
+_replica_reads: ContextVar[dict | None] = ContextVar("replica_reads", default=None)
+
+
+@contextmanager
+def read_from_replica():
+    token = _replica_reads.set({"wrote": False})
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_read_replica(view_func):
+    """
+    Runs reads of a view on the read replica, if one is configured. Only
+    applies to GET and HEAD requests of clients that did not recently modify
+    data.
+    """
+
+    @functools.wraps(view_func)
+    def inner(request, *args, **kwargs):
+        if (
+            not settings.USE_READ_REPLICA
+            or request.method not in ("GET", "HEAD")
+            or PRIMARY_STICKY_COOKIE in request.COOKIES
+        ):
+            return view_func(request, *args, **kwargs)
+
+        with read_from_replica():
+            response = view_func(request, *args, **kwargs)
+            # Template responses query lazily, render them while still reading
+            # from the replica
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            return response
+
+    return inner
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads to the read replica within `read_from_replica`, everything
+    else uses the primary database. Once something has been written, the rest
+    of the request reads from the primary as well.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _replica_reads.get()
+        if state is None or state["wrote"]:
+            return "default"
+        return READ_REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _replica_reads.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases contain the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
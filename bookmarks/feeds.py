@@ -1,14 +1,33 @@
+import functools
+import re
+import sys
+import threading
+import time
 import unicodedata
 from dataclasses import dataclass
 
+from django.conf import settings
 from django.contrib.syndication.views import Feed
 from django.db.models import QuerySet, prefetch_related_objects
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from bookmarks import queries
+from bookmarks.db_routers import use_read_replica
 from bookmarks.models import Bookmark, BookmarkSearch, FeedToken, UserProfile
-from bookmarks.views import access
+from bookmarks.views import access, conditional
+
+# Maps feed ETags to (content, headers, expires) tuples of rendered feeds
+_feed_cache = {}
+_feed_cache_lock = threading.Lock()
+FEED_CACHE_MAX_ENTRIES = 100
+
+
+def clear_feed_cache():
+    with _feed_cache_lock:
+        _feed_cache.clear()
 
 
 @dataclass
@@ -18,19 +37,123 @@ class FeedContext:
     query_set: QuerySet[Bookmark]
 
 
+# Characters that are kept, even though they are control characters
+VALID_CONTROL_CHARS = "\n\r\t"
+
+
+def _get_control_char_ranges(start: int, end: int) -> str:
+    ranges = []
+    range_start = None
+    for code_point in range(start, end + 1):
+        char = chr(code_point)
+        is_control = (
+            unicodedata.category(char)[0] == "C" and char not in VALID_CONTROL_CHARS
+        )
+        if is_control and range_start is None:
+            range_start = code_point
+        elif not is_control and range_start is not None:
+            ranges.append((range_start, code_point - 1))
+            range_start = None
+    if range_start is not None:
+        ranges.append((range_start, end))
+
+    return "".join(
+        re.escape(chr(first)) + ("-" + re.escape(chr(last)) if last > first else "")
+        for first, last in ranges
+    )
+
+
+@functools.cache
+def _get_control_chars_pattern() -> re.Pattern:
+    # Matches all characters of the Unicode "Other" categories. The character
+    # class is split at the end of the BMP, so that the regex engine can use a
+    # bitmap for the common characters, and only checks the ranges of the
+    # supplementary planes for characters from these planes.
+    bmp_ranges = _get_control_char_ranges(0, 0xFFFF)
+    supplementary_ranges = _get_control_char_ranges(0x10000, sys.maxunicode)
+    return re.compile(
+        f"[{bmp_ranges}]|(?=[\U00010000-\U0010ffff])[{supplementary_ranges}]"
+    )
+
+
 def sanitize(text: str):
     if not text:
         return ""
+    # Most texts do not contain any control characters
+    if text.isprintable():
+        return text
     # remove control characters
-    valid_chars = ["\n", "\r", "\t"]
-    return "".join(
-        ch for ch in text if ch in valid_chars or unicodedata.category(ch)[0] != "C"
-    )
+    return _get_control_chars_pattern().sub("", text)
 
 
 class BaseBookmarksFeed(Feed):
+    shared = False
+
+    @method_decorator(use_read_replica)
+    def __call__(self, request, *args, **kwargs):
+        # Feed readers poll regularly, answer with a 304 response unless the
+        # feed has changed
+        etag = self.get_etag(request, *args, **kwargs)
+        feed_view = condition(etag_func=lambda *_args, **_kwargs: etag)(
+            functools.partial(self.get_cached_response, etag)
+        )
+        return feed_view(request, *args, **kwargs)
+
+    def get_cached_response(self, etag: str | None, request, *args, **kwargs):
+        # The ETag changes with the data of the feed, which makes it a cache
+        # key for readers that do not support conditional requests
+        timeout = settings.FEED_CACHE_TIMEOUT
+        if not etag or timeout <= 0:
+            return super().__call__(request, *args, **kwargs)
+
+        with _feed_cache_lock:
+            cached = _feed_cache.get(etag)
+        if cached and time.monotonic() < cached[2]:
+            content, headers, _expires = cached
+            return HttpResponse(content, headers=headers)
+
+        response = super().__call__(request, *args, **kwargs)
+        if response.status_code == 200:
+            with _feed_cache_lock:
+                _feed_cache.pop(etag, None)
+                # Evict the oldest entries
+                while len(_feed_cache) >= FEED_CACHE_MAX_ENTRIES:
+                    del _feed_cache[next(iter(_feed_cache))]
+                _feed_cache[etag] = (
+                    response.content,
+                    dict(response.headers),
+                    time.monotonic() + timeout,
+                )
+        return response
+
+    def get_etag(self, request, feed_key: str | None = None):
+        profile = UserProfile()
+        user = None
+        if feed_key:
+            feed_token = (
+                FeedToken.objects.select_related("user__profile")
+                .filter(key__exact=feed_key)
+                .first()
+            )
+            if not feed_token:
+                return None
+            user = feed_token.user
+            profile = user.profile
+
+        state = [
+            conditional.get_bookmarks_state(user, self.shared),
+            conditional.get_profile_state(profile),
+        ]
+        if request.GET.get("bundle") and request.user.is_authenticated:
+            state.append(conditional.get_bundles_state(request.user))
+        return conditional.build_etag(request, *state)
+
     def get_object(self, request, feed_key: str | None):
-        feed_token = FeedToken.objects.get(key__exact=feed_key) if feed_key else None
+        feed_token = (
+            FeedToken.objects.select_related("user__profile").get(key__exact=feed_key)
+            if feed_key
+            else None
+        )
         bundle = None
         bundle_id = request.GET.get("bundle")
         if bundle_id:
@@ -97,6 +220,7 @@ class UnreadBookmarksFeed(BaseBookmarksFeed):
 class SharedBookmarksFeed(BaseBookmarksFeed):
     title = "Shared bookmarks"
     description = "All shared bookmarks"
+    shared = True
 
     def get_query_set(self, feed_token: FeedToken, search: BookmarkSearch):
         return queries.query_shared_bookmarks(
@@ -110,6 +234,7 @@ class SharedBookmarksFeed(BaseBookmarksFeed):
 class PublicSharedBookmarksFeed(BaseBookmarksFeed):
     title = "Public shared bookmarks"
     description = "All public shared bookmarks"
+    shared = True
 
     def get_object(self, request):
         return super().get_object(request, None)
@@ -26,6 +26,16 @@ export class Api {
       .then((response) => response.json())
       .then((data) => data.results);
   }
+
+  getTagNames() {
+    // The response has a strong ETag, the browser revalidates its cached copy
+    // and only downloads the tags again if they have changed
+    const url = `${this.baseUrl}tags/names/`;
+
+    return fetch(url)
+      .then((response) => response.json())
+      .then((data) => data.tags);
+  }
 }
 
 const apiBaseUrl = document.documentElement.dataset.apiBaseUrl || "";
@@ -13,10 +13,8 @@ class Cache {
   getTags() {
     if (!this.tagsPromise) {
       this.tagsPromise = this.api
-        .getTags({
-          limit: 5000,
-          offset: 0,
-        })
+        .getTagNames()
+        .then((names) => names.map((name) => ({ name })))
         .then((tags) =>
           tags.sort((left, right) =>
             left.name.toLowerCase().localeCompare(right.name.toLowerCase()),
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from bookmarks.api.serializers import BookmarkSerializer, BookmarkValuesSerializer
+from bookmarks.models import Bookmark, Tag
+from bookmarks.utils import normalize_url
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the serialization throughput of the bookmark API serializers, "
+        "using a temporary database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bookmarks",
+            type=int,
+            default=1000,
+            help="Number of bookmarks to serialize per iteration",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=10,
+            help="Number of times to serialize all bookmarks",
+        )
+        parser.add_argument(
+            "--fields",
+            type=str,
+            default="",
+            help="Comma-separated list of fields to serialize, defaults to all",
+        )
+
+    def handle(self, *args, **options):
+        fields = [field for field in options["fields"].split(",") if field] or None
+
+        connection = connections["default"]
+        old_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if connection.vendor == "sqlite":
+                test_settings["NAME"] = os.path.join(temp_dir, "benchmark.sqlite3")
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                self.setup_bookmarks(options["bookmarks"])
+                results = self.run_benchmark(options["iterations"], fields)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings["NAME"] = old_test_name
+
+        self.stdout.write(f"{'':<12}{'rows/sec':>14}{'speedup':>10}")
+        baseline = results["model"]
+        for name, rows_per_second in results.items():
+            speedup = rows_per_second / baseline if baseline else 0
+            self.stdout.write(f"{name:<12}{rows_per_second:>14.0f}{speedup:>9.2f}x")
+
+    def setup_bookmarks(self, count: int):
+        user = User.objects.create_user("benchmark")
+        now = timezone.now()
+        tags = Tag.objects.bulk_create(
+            [Tag(name=f"tag{i}", owner=user, date_added=now) for i in range(50)]
+        )
+        bookmarks = Bookmark.objects.bulk_create(
+            [
+                Bookmark(
+                    url=f"https://example.com/{i}",
+                    url_normalized=normalize_url(f"https://example.com/{i}"),
+                    title=f"Bookmark {i}",
+                    description=f"Description of bookmark {i}",
+                    favicon_file=f"https_example_com_{i % 20}.png",
+                    preview_image_file=f"preview_{i}.jpg" if i % 2 else "",
+                    owner=user,
+                    date_added=now,
+                    date_modified=now,
+                )
+                for i in range(count)
+            ]
+        )
+        Bookmark.tags.through.objects.bulk_create(
+            [
+                Bookmark.tags.through(bookmark_id=bookmark.id, tag_id=tag.id)
+                for i, bookmark in enumerate(bookmarks)
+                for tag in (tags[i % 50], tags[(i + 7) % 50])
+            ]
+        )
+
+    def run_benchmark(self, iterations: int, fields: list[str] | None):
+        request = APIRequestFactory().get("/api/bookmarks/")
+        query_set = Bookmark.objects.order_by("-date_added")
+        results = {}
+
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            serializer = BookmarkSerializer(
+                list(query_set),
+                many=True,
+                fields=fields,
+                context={"request": request},
+            )
+            rows += len(serializer.data)
+        results["model"] = rows / (time.perf_counter() - start)
+
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            serializer = BookmarkValuesSerializer(request, fields)
+            values = list(query_set.values(*serializer.get_values_fields()))
+            rows += len(serializer.to_representation(values))
+        results["values"] = rows / (time.perf_counter() - start)
+
+        return results
@@ -0,0 +1,130 @@
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookmarks.models import BookmarkAsset
+from bookmarks.services import assets, compression
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the disk I/O of storing snapshots through a temporary file with "
+        "streaming them into the asset file, using a temporary folder"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=20,
+            help="Size of the generated snapshot in MiB",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Number of times to store the snapshot",
+        )
+        parser.add_argument(
+            "--codec",
+            choices=[BookmarkAsset.CODEC_GZIP, BookmarkAsset.CODEC_ZSTD],
+            default=BookmarkAsset.CODEC_GZIP,
+            help="Codec to compress the snapshot with",
+        )
+
+    def handle(self, *args, **options):
+        codec = options["codec"]
+        if codec == BookmarkAsset.CODEC_ZSTD and not compression.is_zstd_available():
+            raise CommandError("The zstandard package is not installed")
+
+        content = self.generate_snapshot(options["size"] * 1024 * 1024)
+        iterations = options["iterations"]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = {
+                "temp file": self.run_benchmark(
+                    self.store_with_temp_file, temp_dir, content, codec, iterations
+                ),
+                "streamed": self.run_benchmark(
+                    self.store_streamed, temp_dir, content, codec, iterations
+                ),
+            }
+
+        mib = len(content) / 1024 / 1024
+        self.stdout.write(
+            f"{mib:.1f} MiB snapshot, {codec}, {iterations} iterations per mode"
+        )
+        self.stdout.write(
+            f"{'':<12}{'MiB/s':>10}{'written MiB':>14}{'peak disk MiB':>16}"
+        )
+        for name, (duration, written, peak) in results.items():
+            self.stdout.write(
+                f"{name:<12}{mib * iterations / duration:>10.1f}"
+                f"{written / 1024 / 1024:>14.2f}{peak / 1024 / 1024:>16.2f}"
+            )
+
+    def generate_snapshot(self, size: int) -> bytes:
+        # Markup with random words compresses similar to real pages
+        rng = random.Random(0)
+        words = [
+            "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 10)))
+            for _ in range(2000)
+        ]
+        parts = []
+        length = 0
+        while length < size:
+            text = " ".join(rng.choices(words, k=40))
+            part = f'<div class="c{rng.randint(0, 50)}"><p>{text}</p></div>\n'
+            parts.append(part)
+            length += len(part)
+        return "".join(parts).encode()[:size]
+
+    def produce(self, filepath: str, content: bytes):
+        # Simulates a snapshot processor writing its output into a file
+        with open(filepath, "wb") as f:
+            for index in range(0, len(content), CHUNK_SIZE):
+                f.write(content[index : index + CHUNK_SIZE])
+
+    def store_with_temp_file(self, temp_dir: str, content: bytes, codec: str):
+        temp_filepath = os.path.join(temp_dir, "snapshot.tmp")
+        filepath = os.path.join(temp_dir, "snapshot.bin")
+        self.produce(temp_filepath, content)
+        with open(temp_filepath, "rb") as temp_file:
+            assets._write_asset_file(
+                filepath, assets._read_chunks(temp_file), codec, size=len(content)
+            )
+        temp_size = os.path.getsize(temp_filepath)
+        size = os.path.getsize(filepath)
+        os.remove(temp_filepath)
+        return filepath, temp_size + size, temp_size + size
+
+    def store_streamed(self, temp_dir: str, content: bytes, codec: str):
+        filepath = os.path.join(temp_dir, "snapshot.bin")
+        chunks = (
+            content[index : index + CHUNK_SIZE]
+            for index in range(0, len(content), CHUNK_SIZE)
+        )
+        assets._write_asset_file(filepath, chunks, codec, size=len(content))
+        size = os.path.getsize(filepath)
+        return filepath, size, size
+
+    def run_benchmark(self, store, temp_dir, content, codec, iterations):
+        duration = 0
+        written = 0
+        peak = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            filepath, written_bytes, peak_bytes = store(temp_dir, content, codec)
+            # Include flushing the asset file to disk
+            with open(filepath, "rb") as f:
+                os.fsync(f.fileno())
+            duration += time.perf_counter() - start
+            written += written_bytes
+            peak = max(peak, peak_bytes)
+            os.remove(filepath)
+        return duration, written / iterations, peak
@@ -0,0 +1,121 @@
+import gzip
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookmarks.models import BookmarkAsset
+from bookmarks.services import compression
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the compression ratio and speed of gzip and zstd on the stored "
+        "HTML snapshots. Does not change any files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snapshots",
+            type=int,
+            default=200,
+            help="Number of snapshots to compress",
+        )
+        parser.add_argument(
+            "--level",
+            type=int,
+            default=compression.ZSTD_LEVEL,
+            help="zstd compression level",
+        )
+
+    def handle(self, *args, **options):
+        if zstandard is None:
+            raise CommandError("The zstandard package is not installed")
+
+        corpus = self.load_corpus(options["snapshots"])
+        if len(corpus) < 2:
+            raise CommandError("At least two HTML snapshots are required")
+
+        # Evaluate the dictionary on snapshots that it was not trained with
+        random.Random(0).shuffle(corpus)
+        training_set = corpus[: len(corpus) // 2]
+        test_set = corpus[len(corpus) // 2 :]
+        dictionary = None
+        try:
+            dictionary = zstandard.ZstdCompressionDict(
+                compression.train_dictionary(training_set)
+            )
+        except zstandard.ZstdError as error:
+            self.stderr.write(f"Skipping dictionary, training failed: {error}")
+
+        level = options["level"]
+        codecs = {
+            "gzip-6": (
+                lambda data: gzip.compress(data, compresslevel=6),
+                gzip.decompress,
+            ),
+            "gzip-9": (
+                lambda data: gzip.compress(data, compresslevel=9),
+                gzip.decompress,
+            ),
+            f"zstd-{level}": self.zstd_codec(level),
+        }
+        if dictionary:
+            codecs[f"zstd-{level}+dict"] = self.zstd_codec(level, dictionary)
+
+        original_size = sum(len(data) for data in test_set)
+        self.stdout.write(
+            f"{len(test_set)} snapshots, {original_size / 1024 / 1024:.1f} MiB, "
+            f"dictionary trained from {len(training_set)} other snapshots"
+        )
+        self.stdout.write(
+            f"{'':<16}{'ratio':>8}{'compress MiB/s':>16}{'decompress MiB/s':>18}"
+        )
+        for name, (compress, decompress) in codecs.items():
+            start = time.perf_counter()
+            compressed = [compress(data) for data in test_set]
+            compress_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for data in compressed:
+                decompress(data)
+            decompress_time = time.perf_counter() - start
+
+            ratio = original_size / sum(len(data) for data in compressed)
+            mib = original_size / 1024 / 1024
+            self.stdout.write(
+                f"{name:<16}{ratio:>8.2f}{mib / compress_time:>16.1f}"
+                f"{mib / decompress_time:>18.1f}"
+            )
+
+    def zstd_codec(self, level: int, dictionary=None):
+        compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return compressor.compress, decompressor.decompress
+
+    def load_corpus(self, count: int) -> list[bytes]:
+        snapshots = BookmarkAsset.objects.filter(
+            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+            status=BookmarkAsset.STATUS_COMPLETE,
+            content_type=BookmarkAsset.CONTENT_TYPE_HTML,
+        ).order_by("-date_created")
+
+        corpus = []
+        files = set()
+        for snapshot in snapshots.iterator():
+            if len(corpus) >= count:
+                break
+            if snapshot.file in files:
+                continue
+            files.add(snapshot.file)
+            try:
+                with compression.open_asset_file(snapshot) as f:
+                    corpus.append(f.read())
+            except OSError:
+                continue
+        return corpus
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+from bookmarks import queries
+from bookmarks.models import Bookmark, BookmarkSearch
+from bookmarks.services.importer import import_netscape_html
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the configured SQLite pragmas against the "
+        "SQLite defaults, using a temporary database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bookmarks",
+            type=int,
+            default=5000,
+            help="Number of bookmarks to import",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Number of bookmark list queries and bookmark updates",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.USE_SQLITE:
+            raise CommandError("Benchmark is only supported for SQLite databases")
+
+        html = self.generate_import_html(options["bookmarks"])
+        iterations = options["iterations"]
+
+        with override_settings(LD_SQLITE_PRAGMAS={}, LD_SQLITE_OPTIMIZE_INTERVAL=0):
+            default_results = self.run_benchmark(html, iterations, enable_wal=False)
+        tuned_results = self.run_benchmark(html, iterations, enable_wal=True)
+
+        self.stdout.write(f"{'':<10}{'default':>14}{'tuned':>14}{'speedup':>10}")
+        for name, default_duration in default_results.items():
+            tuned_duration = tuned_results[name]
+            speedup = default_duration / tuned_duration if tuned_duration else 0
+            self.stdout.write(
+                f"{name:<10}{default_duration:>13.3f}s{tuned_duration:>13.3f}s"
+                f"{speedup:>9.2f}x"
+            )
+
+    def run_benchmark(self, html: str, iterations: int, enable_wal: bool):
+        connection = connections["default"]
+        old_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_settings["NAME"] = os.path.join(temp_dir, "benchmark.sqlite3")
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                if enable_wal:
+                    with connection.cursor() as cursor:
+                        cursor.execute("PRAGMA journal_mode=wal")
+                # Reconnect to apply the pragmas of the current settings
+                connection.close()
+                return self.run_workloads(html, iterations)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings["NAME"] = old_test_name
+
+    def run_workloads(self, html: str, iterations: int):
+        user = User.objects.create_user("benchmark")
+        results = {}
+
+        with override_settings(LD_DISABLE_BACKGROUND_TASKS=True):
+            start = time.perf_counter()
+            import_netscape_html(html, user)
+            results["import"] = time.perf_counter() - start
+
+        sorts = [
+            BookmarkSearch.SORT_ADDED_DESC,
+            BookmarkSearch.SORT_TITLE_ASC,
+        ]
+        start = time.perf_counter()
+        for i in range(iterations):
+            search = BookmarkSearch(sort=sorts[i % len(sorts)])
+            query_set = queries.query_bookmarks(user, user.profile, search)
+            query_set.count()
+            list(query_set[:30])
+        results["list"] = time.perf_counter() - start
+
+        bookmarks = list(Bookmark.objects.filter(owner=user)[:iterations])
+        start = time.perf_counter()
+        for bookmark in bookmarks:
+            bookmark.title = f"{bookmark.title} (updated)"
+            bookmark.save()
+        results["update"] = time.perf_counter() - start
+
+        return results
+
+    def generate_import_html(self, count: int) -> str:
+        lines = ["<!DOCTYPE NETSCAPE-Bookmark-file-1>", "<DL><p>"]
+        for i in range(count):
+            tags = f"tag{i % 50},group{i % 7}"
+            lines.append(
+                f'<DT><A HREF="https://example.com/{i}" ADD_DATE="{1600000000 + i}" '
+                f'TAGS="{tags}">Bookmark {i}</A>'
+            )
+            lines.append(f"<DD>Description of bookmark {i}")
+        lines.append("</DL><p>")
+        return "\n".join(lines)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from bookmarks.services.assets import deduplicate_assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Hash the files of existing assets, and store files with the same "
+        "content only once"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the space that would be reclaimed",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        result = deduplicate_assets(dry_run=dry_run)
+
+        reclaimed = filesizeformat(result.reclaimed_bytes)
+        if dry_run:
+            self.stdout.write(
+                f"Would remove {result.removed_count} duplicate files "
+                f"and reclaim {reclaimed} ({result.reclaimed_bytes} bytes)"
+            )
+        else:
+            self.stdout.write(
+                f"Hashed {result.hashed_count} assets. Removed "
+                f"{result.removed_count} duplicate files and reclaimed "
+                f"{reclaimed} ({result.reclaimed_bytes} bytes)"
+            )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookmarks.services import compression
+
+
+class Command(BaseCommand):
+    help = (
+        "Train a zstd dictionary from the latest HTML snapshots, which is used "
+        "for compressing new snapshots"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=1000,
+            help="Maximum number of snapshots to train the dictionary with",
+        )
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=compression.DICTIONARY_SIZE,
+            help="Size of the dictionary in bytes",
+        )
+
+    def handle(self, *args, **options):
+        if not compression.is_zstd_available():
+            raise CommandError("The zstandard package is not installed")
+
+        try:
+            dictionary = compression.train_snapshot_dictionary(
+                options["samples"], options["size"]
+            )
+        except Exception as error:
+            raise CommandError(f"Failed to train dictionary: {error}") from error
+
+        self.stdout.write(
+            f"Trained dictionary #{dictionary.id} from "
+            f"{dictionary.sample_count} snapshots ({len(dictionary.data)} bytes)"
+        )
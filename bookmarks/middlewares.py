@@ -1,7 +1,10 @@
+import copy
+
 from django.conf import settings
 from django.contrib.auth.middleware import RemoteUserMiddleware
 from django.utils import translation
 
+from bookmarks.db_routers import PRIMARY_STICKY_COOKIE
 from bookmarks.models import GlobalSettings, UserProfile
 
 
@@ -65,7 +68,7 @@ class LinkdingMiddleware:
     def __call__(self, request):
         # add global settings to request
         try:
-            global_settings = GlobalSettings.get()
+            global_settings = GlobalSettings.get_cached()
         except Exception:
             global_settings = default_global_settings
         request.global_settings = global_settings
@@ -75,10 +78,37 @@ class LinkdingMiddleware:
             request.user_profile = request.user.profile
         else:
             if global_settings.guest_profile_user:
-                request.user_profile = global_settings.guest_profile_user.profile
+                # Copy the cached profile, views may modify it for the request
+                request.user_profile = copy.copy(
+                    global_settings.guest_profile_user.profile
+                )
             else:
                 request.user_profile = _build_anonymous_profile(request)
 
         response = self.get_response(request)
 
         return response
+
+
+class ReadReplicaMiddleware:
+    """
+    Marks clients that modified data, so that their following requests read
+    from the primary database until the replica has caught up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                PRIMARY_STICKY_COOKIE,
+                "1",
+                max_age=settings.LD_DB_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
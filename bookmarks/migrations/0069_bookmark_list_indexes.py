@@ -0,0 +1,63 @@
+# Generated by Django 6.0.4 on 2026-10-19 10:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0068_add_bookmark_url_constraint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                condition=models.Q(("is_archived", False), ("is_deleted", False)),
+                fields=["owner", "date_added"],
+                name="bookmark_active_added_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_archived", False), ("is_deleted", False), ("unread", True)
+                ),
+                fields=["owner", "date_added"],
+                name="bookmark_unread_added_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                condition=models.Q(("is_archived", True), ("is_deleted", False)),
+                fields=["owner", "date_added"],
+                name="bookmark_archived_added_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["owner", "date_deleted"],
+                name="bookmark_trashed_deleted_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False), ("shared", True)),
+                fields=["date_added"],
+                name="bookmark_shared_added_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookmarkasset",
+            index=models.Index(
+                fields=["status", "asset_type", "date_created"],
+                name="asset_status_type_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.4 on 2026-10-19 10:40
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+from pypinyin import lazy_pinyin
+
+_HAN_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def build_title_sort_key(title: str, url: str) -> str:
+    # Copy of bookmarks.utils.build_title_sort_key at the time of this
+    # migration, so that later changes of the key don't change the migration
+    text = title or url or ""
+    if _HAN_RE.search(text):
+        text = "".join(lazy_pinyin(text))
+
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+
+    return text.casefold()[:512]
+
+
+def populate_title_sort_keys(apps, schema_editor):
+    Bookmark = apps.get_model("bookmarks", "Bookmark")
+
+    batch = []
+    for bookmark in Bookmark.objects.only("id", "title", "url").iterator(
+        chunk_size=1000
+    ):
+        bookmark.title_sort_key = build_title_sort_key(bookmark.title, bookmark.url)
+        batch.append(bookmark)
+        if len(batch) >= 1000:
+            Bookmark.objects.bulk_update(batch, ["title_sort_key"])
+            batch = []
+
+    if batch:
+        Bookmark.objects.bulk_update(batch, ["title_sort_key"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0069_bookmark_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookmark",
+            name="title_sort_key",
+            field=models.CharField(blank=True, default="", max_length=512),
+        ),
+        migrations.RunPython(populate_title_sort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="bookmark",
+            index=models.Index(
+                fields=["owner", "title_sort_key", "id"],
+                name="bookmark_title_sort_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.4 on 2026-10-19 11:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_existing_bookmarks(apps, schema_editor):
+    # Start the change log with all existing bookmarks, so that clients can
+    # sync from the beginning of the log
+    Bookmark = apps.get_model("bookmarks", "Bookmark")
+    BookmarkChange = apps.get_model("bookmarks", "BookmarkChange")
+
+    batch = []
+    for owner_id, bookmark_id in (
+        Bookmark.objects.order_by("id")
+        .values_list("owner_id", "id")
+        .iterator(chunk_size=1000)
+    ):
+        batch.append(
+            BookmarkChange(owner_id=owner_id, bookmark_id=bookmark_id, action="created")
+        )
+        if len(batch) >= 1000:
+            BookmarkChange.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        BookmarkChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0070_bookmark_title_sort_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookmarkChange",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bookmark_id", models.IntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner", "id"], name="bookmarkchange_owner_id_idx"
+                    ),
+                    models.Index(
+                        fields=["bookmark_id"], name="bookmarkchange_bookmark_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(record_existing_bookmarks, migrations.RunPython.noop),
+    ]
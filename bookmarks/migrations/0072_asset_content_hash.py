@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0071_bookmark_change"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookmarkasset",
+            name="content_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="bookmarkasset",
+            index=models.Index(fields=["content_hash"], name="asset_content_hash_idx"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_gzip_codec(apps, schema_editor):
+    BookmarkAsset = apps.get_model("bookmarks", "BookmarkAsset")
+    BookmarkAsset.objects.filter(gzip=True).update(codec="gzip")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0072_asset_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompressionDictionary",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("sample_count", models.IntegerField(default=0)),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="bookmarkasset",
+            name="codec",
+            field=models.CharField(blank=True, default="", max_length=16),
+        ),
+        migrations.AddField(
+            model_name="bookmarkasset",
+            name="compression_dictionary",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="bookmarks.compressiondictionary",
+            ),
+        ),
+        migrations.RunPython(set_gzip_codec, migrations.RunPython.noop),
+    ]
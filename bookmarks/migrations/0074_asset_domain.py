@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:04
+
+from django.db import migrations, models
+
+from bookmarks.utils import get_registrable_domain
+
+
+def populate_pending_snapshot_domains(apps, schema_editor):
+    BookmarkAsset = apps.get_model("bookmarks", "BookmarkAsset")
+
+    pending_snapshots = BookmarkAsset.objects.filter(
+        asset_type="snapshot", status="pending"
+    ).select_related("bookmark")
+    batch = []
+    for asset in pending_snapshots.iterator(chunk_size=500):
+        asset.domain = get_registrable_domain(asset.bookmark.url)
+        batch.append(asset)
+        if len(batch) >= 500:
+            BookmarkAsset.objects.bulk_update(batch, ["domain"])
+            batch = []
+    if batch:
+        BookmarkAsset.objects.bulk_update(batch, ["domain"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0073_asset_codec"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookmarkasset",
+            name="domain",
+            field=models.CharField(blank=True, default="", max_length=256),
+        ),
+        migrations.AddIndex(
+            model_name="bookmarkasset",
+            index=models.Index(
+                fields=["status", "asset_type", "domain"],
+                name="asset_status_type_domain_idx",
+            ),
+        ),
+        migrations.RunPython(
+            populate_pending_snapshot_domains, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0074_asset_domain"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReaderArticle",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.CharField(max_length=2048)),
+                ("status", models.CharField(max_length=64)),
+                ("title", models.CharField(blank=True, max_length=512)),
+                ("html", models.TextField(blank=True)),
+                ("text", models.TextField(blank=True)),
+                ("error", models.TextField(blank=True)),
+                ("date_modified", models.DateTimeField()),
+                (
+                    "bookmark",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reader_article",
+                        to="bookmarks.bookmark",
+                    ),
+                ),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="bookmarks.bookmarkasset",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.4 on 2026-10-19 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0075_reader_article"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="date_modified",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.4 on 2026-10-19 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0076_tag_date_modified"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookmarkasset",
+            name="content_size",
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.4 on 2026-10-19 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bookmarks", "0077_asset_content_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="globalsettings",
+            name="bookmark_changes_pruned_seq",
+            field=models.IntegerField(default=0),
+        ),
+    ]
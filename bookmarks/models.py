@@ -1,24 +1,28 @@
 import binascii
 import calendar
+import copy
 import hashlib
 import json
 import logging
 import os
 import re
+import threading
+import time
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models import Q
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.http import QueryDict
 from django.utils.translation import gettext_lazy as _
 
-from bookmarks.utils import normalize_url, unique
+from bookmarks.utils import build_title_sort_key, normalize_url, unique
 from bookmarks.validators import BookmarkURLValidator
 
 logger = logging.getLogger(__name__)
@@ -27,6 +31,7 @@ logger = logging.getLogger(__name__)
 class Tag(models.Model):
     name = models.CharField(max_length=64)
     date_added = models.DateTimeField()
+    date_modified = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
 
     def __str__(self):
@@ -60,6 +65,8 @@ class Bookmark(models.Model):
     url = models.CharField(max_length=2048, validators=[BookmarkURLValidator()])
     url_normalized = models.CharField(max_length=2048, blank=True, db_index=True)
     title = models.CharField(max_length=512, blank=True)
+    # Normalized resolved title, maintained on save, used for sorting by title
+    title_sort_key = models.CharField(max_length=512, blank=True, default="")
     description = models.TextField(blank=True)
     notes = models.TextField(blank=True)
     preview_image_remote_url = models.URLField(max_length=2048, blank=True)
@@ -95,6 +102,39 @@ class Bookmark(models.Model):
                 name="unique_bookmark_url_per_user",
             ),
         ]
+        # Partial indexes matching the filters of the bookmark list access paths
+        # in queries.py, ordered by the default sort of each list
+        indexes = [
+            models.Index(
+                fields=["owner", "date_added"],
+                condition=Q(is_archived=False, is_deleted=False),
+                name="bookmark_active_added_idx",
+            ),
+            models.Index(
+                fields=["owner", "date_added"],
+                condition=Q(is_archived=False, is_deleted=False, unread=True),
+                name="bookmark_unread_added_idx",
+            ),
+            models.Index(
+                fields=["owner", "date_added"],
+                condition=Q(is_archived=True, is_deleted=False),
+                name="bookmark_archived_added_idx",
+            ),
+            models.Index(
+                fields=["owner", "date_deleted"],
+                condition=Q(is_deleted=True),
+                name="bookmark_trashed_deleted_idx",
+            ),
+            models.Index(
+                fields=["date_added"],
+                condition=Q(shared=True, is_deleted=False),
+                name="bookmark_shared_added_idx",
+            ),
+            models.Index(
+                fields=["owner", "title_sort_key", "id"],
+                name="bookmark_title_sort_idx",
+            ),
+        ]
 
     @property
     def resolved_title(self):
@@ -114,6 +154,14 @@ class Bookmark(models.Model):
 
     def save(self, *args, **kwargs):
         self.url_normalized = normalize_url(self.url)
+        self.title_sort_key = build_title_sort_key(self.title, self.url)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            "title" in update_fields or "url" in update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "title_sort_key"}
+
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -129,11 +177,64 @@ class Bookmark(models.Model):
         )
         return Bookmark.objects.filter(q)
 
+    @staticmethod
+    def query_existing_ids(owner: User, urls: list[str]) -> dict[str, int]:
+        """
+        Looks up which of the given URLs are bookmarked by the owner, using the
+        index on the normalized URL. Returns a dict that maps the bookmarked
+        URLs to the IDs of their bookmarks.
+        """
+        normalized_urls = {url: normalize_url(url) for url in urls}
+        q = Q(owner=owner) & (
+            Q(url_normalized__in=set(normalized_urls.values()))
+            | Q(url_normalized="", url__in=set(urls))
+        )
+        existing = Bookmark.objects.filter(q).values_list("id", "url", "url_normalized")
+
+        ids_by_url = {}
+        for bookmark_id, url, url_normalized in existing:
+            ids_by_url.setdefault(url_normalized or url, bookmark_id)
+
+        result = {}
+        for url, normalized_url in normalized_urls.items():
+            bookmark_id = ids_by_url.get(normalized_url) or ids_by_url.get(url)
+            if bookmark_id:
+                result[url] = bookmark_id
+        return result
+
+
+_deferred_file_cleanup = threading.local()
+
+
+@contextmanager
+def defer_file_cleanup():
+    """
+    Collect the files of bookmarks and assets deleted within the block instead
+    of removing them one by one in the post_delete handlers. The caller is
+    responsible for removing the collected file paths afterward.
+    """
+    filepaths = []
+    _deferred_file_cleanup.filepaths = filepaths
+    try:
+        yield filepaths
+    finally:
+        _deferred_file_cleanup.filepaths = None
+
+
+def _collect_deferred_file(filepath: str) -> bool:
+    filepaths = getattr(_deferred_file_cleanup, "filepaths", None)
+    if filepaths is None:
+        return False
+    filepaths.append(filepath)
+    return True
+
 
 @receiver(post_delete, sender=Bookmark)
 def bookmark_deleted(sender, instance, **kwargs):
     if instance.preview_image_file:
         filepath = os.path.join(settings.LD_PREVIEW_FOLDER, instance.preview_image_file)
+        if _collect_deferred_file(filepath):
+            return
         if os.path.isfile(filepath):
             try:
                 os.remove(filepath)
@@ -143,6 +244,141 @@ def bookmark_deleted(sender, instance, **kwargs):
                 )
 
 
+# Namespace of the advisory locks that order the change log on Postgres
+CHANGE_LOG_LOCK_ID = 0x6C64
+
+
+class BookmarkChange(models.Model):
+    """
+    Log of bookmark changes for API sync clients. The ID is used as the
+    sequence number of a change, the log only references bookmarks by ID so
+    that it keeps tombstones of deleted bookmarks.
+    """
+
+    ACTION_CREATED = "created"
+    ACTION_UPDATED = "updated"
+    ACTION_DELETED = "deleted"
+    ACTION_CHOICES = [
+        (ACTION_CREATED, "Created"),
+        (ACTION_UPDATED, "Updated"),
+        (ACTION_DELETED, "Deleted"),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    bookmark_id = models.IntegerField()
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES)
+    date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "id"], name="bookmarkchange_owner_id_idx"),
+            models.Index(fields=["bookmark_id"], name="bookmarkchange_bookmark_idx"),
+        ]
+
+    @staticmethod
+    def record(owner_id: int, bookmark_ids, action: str):
+        changes = [
+            BookmarkChange(owner_id=owner_id, bookmark_id=bookmark_id, action=action)
+            for bookmark_id in bookmark_ids
+        ]
+        BookmarkChange._create_in_commit_order(changes)
+
+    @staticmethod
+    def record_query(bookmarks: models.QuerySet, action: str = ACTION_UPDATED):
+        # For changes that don't send signals for each bookmark, like queryset
+        # updates or removing a tag from all its bookmarks
+        changed = bookmarks.values_list("owner_id", "id").distinct()
+        changes = [
+            BookmarkChange(owner_id=owner_id, bookmark_id=bookmark_id, action=action)
+            for owner_id, bookmark_id in changed
+        ]
+        BookmarkChange._create_in_commit_order(changes)
+
+    @staticmethod
+    def _create_in_commit_order(changes: list["BookmarkChange"]):
+        if not changes:
+            return
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Transactions on Postgres can commit in a different order than
+                # they took their IDs, so a client could skip a change that is
+                # committed after it has seen a later one. Writers of a user's
+                # log wait for each other until they commit, which makes the
+                # IDs of a user's changes follow the commit order. SQLite only
+                # has a single writer at a time.
+                owner_ids = sorted({change.owner_id for change in changes})
+                with connection.cursor() as cursor:
+                    for owner_id in owner_ids:
+                        cursor.execute(
+                            "SELECT pg_advisory_xact_lock(%s, %s)",
+                            [CHANGE_LOG_LOCK_ID, owner_id],
+                        )
+            BookmarkChange.objects.bulk_create(changes)
+
+
+def _is_user_deletion(origin) -> bool:
+    # The change log of deleted users is removed as well, no need to record
+    # changes of their bookmarks and tags
+    if isinstance(origin, models.QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+@receiver(post_save, sender=Bookmark)
+def record_bookmark_saved(sender, instance, created, **kwargs):
+    action = BookmarkChange.ACTION_CREATED if created else BookmarkChange.ACTION_UPDATED
+    BookmarkChange.record(instance.owner_id, [instance.id], action)
+
+
+@receiver(post_delete, sender=Bookmark)
+def record_bookmark_deleted(sender, instance, origin=None, **kwargs):
+    if _is_user_deletion(origin):
+        return
+    BookmarkChange.record(
+        instance.owner_id, [instance.id], BookmarkChange.ACTION_DELETED
+    )
+
+
+@receiver(m2m_changed, sender=Bookmark.tags.through)
+def record_bookmark_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        BookmarkChange.record(
+            instance.owner_id, [instance.id], BookmarkChange.ACTION_UPDATED
+        )
+    elif action == "pre_clear":
+        BookmarkChange.record_query(Bookmark.objects.filter(tags=instance))
+    elif pk_set:
+        BookmarkChange.record(instance.owner_id, pk_set, BookmarkChange.ACTION_UPDATED)
+
+
+@receiver(post_save, sender=Tag)
+def record_tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        BookmarkChange.record_query(Bookmark.objects.filter(tags=instance))
+
+
+@receiver(pre_delete, sender=Tag)
+def record_tag_deleted(sender, instance, origin=None, **kwargs):
+    if not _is_user_deletion(origin):
+        BookmarkChange.record_query(Bookmark.objects.filter(tags=instance))
+
+
+class CompressionDictionary(models.Model):
+    """
+    Zstandard dictionary trained from stored snapshots. Dictionaries are never
+    changed, assets reference the dictionary their file was compressed with.
+    """
+
+    data = models.BinaryField()
+    sample_count = models.IntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True, null=False)
+
+    def __str__(self):
+        return f"Compression dictionary #{self.pk}"
+
+
 class BookmarkAsset(models.Model):
     TYPE_SNAPSHOT = "snapshot"
     TYPE_UPLOAD = "upload"
@@ -154,15 +390,48 @@ class BookmarkAsset(models.Model):
     STATUS_COMPLETE = "complete"
     STATUS_FAILURE = "failure"
 
+    CODEC_GZIP = "gzip"
+    CODEC_ZSTD = "zstd"
+
     bookmark = models.ForeignKey(Bookmark, on_delete=models.CASCADE)
     date_created = models.DateTimeField(auto_now_add=True, null=False)
     file = models.CharField(max_length=2048, blank=True, null=False)
     file_size = models.IntegerField(null=True)
+    # Size of the uncompressed content, which answers range requests without
+    # decompressing the file. Empty for files stored before it was recorded.
+    content_size = models.BigIntegerField(null=True)
     asset_type = models.CharField(max_length=64, blank=False, null=False)
     content_type = models.CharField(max_length=128, blank=False, null=False)
     display_name = models.CharField(max_length=2048, blank=True, null=False)
     status = models.CharField(max_length=64, blank=False, null=False)
     gzip = models.BooleanField(default=False, null=False)
+    # Compression of the file, empty for files that are stored as is
+    codec = models.CharField(max_length=16, blank=True, null=False, default="")
+    compression_dictionary = models.ForeignKey(
+        CompressionDictionary, null=True, blank=True, on_delete=models.PROTECT
+    )
+    # SHA-256 hash of the uncompressed file content. Assets with the same
+    # content share a single file, which is only removed with the last asset
+    # referencing it.
+    content_hash = models.CharField(max_length=64, blank=True, null=False, default="")
+    # Registrable domain of the bookmark URL, stored when a snapshot is queued
+    # so that the snapshot dispatcher can skip domains that are cooling down
+    domain = models.CharField(max_length=256, blank=True, null=False, default="")
+
+    class Meta:
+        indexes = [
+            # Used by the snapshot dispatcher to pick the next pending snapshot
+            models.Index(
+                fields=["status", "asset_type", "date_created"],
+                name="asset_status_type_created_idx",
+            ),
+            # Used by the snapshot dispatcher to find pending domains
+            models.Index(
+                fields=["status", "asset_type", "domain"],
+                name="asset_status_type_domain_idx",
+            ),
+            models.Index(fields=["content_hash"], name="asset_content_hash_idx"),
+        ]
 
     @property
     def download_name(self):
@@ -190,6 +459,11 @@ class BookmarkAsset(models.Model):
 def bookmark_asset_deleted(sender, instance, **kwargs):
     if instance.file:
         filepath = os.path.join(settings.LD_ASSET_FOLDER, instance.file)
+        if _collect_deferred_file(filepath):
+            return
+        # The file might be shared with other assets of the same content
+        if BookmarkAsset.objects.filter(file=instance.file).exists():
+            return
         if os.path.isfile(filepath):
             try:
                 os.remove(filepath)
@@ -197,6 +471,39 @@ def bookmark_asset_deleted(sender, instance, **kwargs):
                 logger.error(f"Failed to delete asset file: {filepath}", exc_info=error)
 
 
+class ReaderArticle(models.Model):
+    """
+    Cached content for the reader mode of a bookmark, extracted either from
+    its latest HTML snapshot or from the website. The article is only valid
+    for the URL and snapshot it was extracted from.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_COMPLETE = "complete"
+    STATUS_FAILURE = "failure"
+
+    bookmark = models.OneToOneField(
+        Bookmark, related_name="reader_article", on_delete=models.CASCADE
+    )
+    url = models.CharField(max_length=2048, blank=False, null=False)
+    snapshot = models.ForeignKey(
+        BookmarkAsset,
+        null=True,
+        blank=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+    )
+    status = models.CharField(max_length=64, blank=False, null=False)
+    title = models.CharField(max_length=512, blank=True, null=False)
+    html = models.TextField(blank=True, null=False)
+    text = models.TextField(blank=True, null=False)
+    error = models.TextField(blank=True, null=False)
+    date_modified = models.DateTimeField(null=False)
+
+    def __str__(self):
+        return self.title or f"Reader article #{self.pk}"
+
+
 class BookmarkBundle(models.Model):
     name = models.CharField(max_length=256, blank=False)
     search = models.CharField(max_length=256, blank=True)
@@ -1196,6 +1503,9 @@ class GlobalSettings(models.Model):
         User, on_delete=models.SET_NULL, null=True, blank=True
     )
     enable_link_prefetch = models.BooleanField(default=False, null=False)
+    # Latest sequence number of the bookmark changes log, for which deleted
+    # bookmarks have been removed from the log
+    bookmark_changes_pruned_seq = models.IntegerField(default=0)
 
     @classmethod
     def get(cls):
@@ -1205,10 +1515,57 @@ class GlobalSettings(models.Model):
             instance.save()
         return instance
 
+    @classmethod
+    def get_cached(cls):
+        """
+        Returns the global settings from a cache in process memory, with the
+        guest profile user and its profile already loaded. Returns a copy that
+        can be modified without affecting other requests.
+        """
+        timeout = settings.GLOBAL_SETTINGS_CACHE_TIMEOUT
+        with _global_settings_cache_lock:
+            instance = _global_settings_cache.get("instance")
+            expires = _global_settings_cache.get("expires", 0)
+
+        if instance is None or time.monotonic() >= expires:
+            instance = (
+                GlobalSettings.objects.select_related(
+                    "guest_profile_user__profile"
+                ).first()
+                or cls.get()
+            )
+            if timeout > 0:
+                with _global_settings_cache_lock:
+                    _global_settings_cache["instance"] = instance
+                    _global_settings_cache["expires"] = time.monotonic() + timeout
+
+        return copy.copy(instance)
+
+    @classmethod
+    def clear_cache(cls):
+        with _global_settings_cache_lock:
+            _global_settings_cache.clear()
+
     def save(self, *args, **kwargs):
         if not self.pk and GlobalSettings.objects.exists():
             raise Exception("There is already one instance of GlobalSettings")
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        GlobalSettings.clear_cache()
+        return result
+
+
+# Other processes pick up changes to the global settings after the cache
+# timeout, changes within the same process are applied immediately
+_global_settings_cache = {}
+_global_settings_cache_lock = threading.Lock()
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def user_profile_changed(sender, instance, **kwargs):
+    # The cached global settings contain the profile of the guest user
+    cached = _global_settings_cache.get("instance")
+    if cached and cached.guest_profile_user_id == instance.user_id:
+        GlobalSettings.clear_cache()
 
 
 class GlobalSettingsForm(forms.ModelForm):
@@ -3,12 +3,10 @@ import datetime
 import random
 import time
 
-from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db.models import (
     Case,
-    CharField,
     Exists,
     IntegerField,
     OuterRef,
@@ -16,8 +14,6 @@ from django.db.models import (
     QuerySet,
     When,
 )
-from django.db.models.expressions import RawSQL
-from django.db.models.functions import Lower
 
 from bookmarks.models import (
     Bookmark,
@@ -517,35 +513,12 @@ def _base_bookmarks_query(
         query_set = _apply_filters(query_set, user, profile, search)
 
         # Sort
-        if (
-            search.sort == BookmarkSearch.SORT_TITLE_ASC
-            or search.sort == BookmarkSearch.SORT_TITLE_DESC
-        ):
-            # For the title, the resolved_title logic from the Bookmark entity needs
-            # to be replicated as there is no corresponding database field
-            query_set = query_set.annotate(
-                effective_title=Case(
-                    When(
-                        Q(title__isnull=False) & ~Q(title__exact=""),
-                        then=Lower("title"),
-                    ),
-                    default=Lower("url"),
-                    output_field=CharField(),
-                )
-            )
-
-            # For SQLite, if the ICU extension is loaded, use the custom collation
-            # loaded into the connection. This results in an improved sort order for
-            # unicode characters (umlauts, etc.)
-            if settings.USE_SQLITE and settings.USE_SQLITE_ICU_EXTENSION:
-                order_field = RawSQL("effective_title COLLATE ICU", ())
-            else:
-                order_field = "effective_title"
-
-            if search.sort == BookmarkSearch.SORT_TITLE_ASC:
-                query_set = query_set.order_by(order_field)
-            elif search.sort == BookmarkSearch.SORT_TITLE_DESC:
-                query_set = query_set.order_by(order_field).reverse()
+        if search.sort == BookmarkSearch.SORT_TITLE_ASC:
+            # The sort key replicates the resolved_title logic from the Bookmark
+            # entity, the id makes the order stable for bookmarks with the same title
+            query_set = query_set.order_by("title_sort_key", "id")
+        elif search.sort == BookmarkSearch.SORT_TITLE_DESC:
+            query_set = query_set.order_by("-title_sort_key", "-id")
         elif search.sort == BookmarkSearch.SORT_ADDED_ASC:
             query_set = query_set.order_by("date_added")
         elif search.sort == BookmarkSearch.SORT_ADDED_DESC:
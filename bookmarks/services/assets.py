@@ -1,7 +1,7 @@
-import gzip
+import hashlib
 import logging
 import os
-import shutil
+from dataclasses import dataclass
 
 import requests
 from django.conf import settings
@@ -9,8 +9,13 @@ from django.core.files.uploadedfile import UploadedFile
 from django.utils import formats, timezone
 from django.utils.translation import gettext as _
 
-from bookmarks.models import Bookmark, BookmarkAsset
-from bookmarks.services import snapshot_processor
+from bookmarks.models import Bookmark, BookmarkAsset, CompressionDictionary
+from bookmarks.services import (
+    compression,
+    singlefile,
+    snapshot_processor,
+    snapshot_workers,
+)
 from bookmarks.services.website_loader import (
     build_request_cookies,
     build_request_headers,
@@ -18,6 +23,7 @@ from bookmarks.services.website_loader import (
     get_request_config,
     is_pdf_content_type,
 )
+from bookmarks.utils import get_registrable_domain
 
 MAX_ASSET_FILENAME_LENGTH = 192
 
@@ -28,6 +34,13 @@ class PdfTooLargeError(Exception):
     pass
 
 
+@dataclass
+class DeduplicationResult:
+    hashed_count: int
+    removed_count: int
+    reclaimed_bytes: int
+
+
 def _save_bookmark_updates(bookmark: Bookmark, update_fields: list[str]):
     bookmark.save(update_fields=update_fields)
 
@@ -40,6 +53,7 @@ def create_snapshot_asset(bookmark: Bookmark) -> BookmarkAsset:
         content_type="",
         display_name=_("New snapshot"),
         status=BookmarkAsset.STATUS_PENDING,
+        domain=get_registrable_domain(bookmark.url),
     )
     return asset
 
@@ -61,43 +75,123 @@ def create_snapshot(asset: BookmarkAsset):
 
 
 def _create_html_snapshot(asset: BookmarkAsset):
-    # Create snapshot into temporary file
+    # Snapshot processors write into a file, which is compressed into the asset
+    # folder in a single pass afterward
     temp_filename = _generate_asset_filename(asset, asset.bookmark.url, "tmp")
-    temp_filepath = os.path.join(settings.LD_ASSET_FOLDER, temp_filename)
-    snapshot_processor.create_snapshot(asset.bookmark.url, temp_filepath)
-
-    # Store as gzip in asset folder
-    filename = _generate_asset_filename(asset, asset.bookmark.url, "html.gz")
-    filepath = os.path.join(settings.LD_ASSET_FOLDER, filename)
-    with open(temp_filepath, "rb") as temp_file, gzip.open(filepath, "wb") as gz_file:
-        shutil.copyfileobj(temp_file, gz_file)
+    worker = snapshot_workers.get_current_worker()
+    temp_folder = worker.temp_dir if worker else settings.LD_ASSET_FOLDER
+    temp_filepath = os.path.join(temp_folder, temp_filename)
+    try:
+        snapshot_processor.create_snapshot(asset.bookmark.url, temp_filepath)
 
-    # Remove temporary file
-    os.remove(temp_filepath)
+        # Keep the latest snapshot if the page did not change since
+        unchanged_snapshot = _find_unchanged_snapshot(asset, temp_filepath)
+        if unchanged_snapshot:
+            _touch_snapshot(unchanged_snapshot, asset)
+            return
 
-    timestamp = formats.date_format(asset.date_created, "SHORT_DATE_FORMAT")
+        with open(temp_filepath, "rb") as temp_file:
+            content_hash, content_size = _store_html_snapshot(
+                asset, _read_chunks(temp_file), os.fstat(temp_file.fileno()).st_size
+            )
+    finally:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
 
     asset.status = BookmarkAsset.STATUS_COMPLETE
     asset.content_type = BookmarkAsset.CONTENT_TYPE_HTML
-    asset.display_name = _("HTML snapshot from %(timestamp)s") % {
-        "timestamp": timestamp
-    }
-    asset.file = filename
-    asset.gzip = True
-    asset.save()
+    asset.display_name = _get_html_snapshot_name(asset.date_created)
+    _save_asset_with_file(asset, content_hash, content_size)
 
     asset.bookmark.latest_snapshot = asset
     asset.bookmark.date_modified = timezone.now()
     _save_bookmark_updates(asset.bookmark, ["latest_snapshot", "date_modified"])
 
 
+def _store_html_snapshot(
+    asset: BookmarkAsset, chunks, size: int = -1
+) -> tuple[str, int]:
+    """
+    Stores an HTML snapshot with the configured codec, and returns the hash
+    and the size of its content.
+    """
+    codec = compression.get_snapshot_codec()
+    dictionary = None
+    extension = "html.gz"
+    if codec == BookmarkAsset.CODEC_ZSTD:
+        dictionary = compression.get_latest_dictionary()
+        extension = "html.zst"
+
+    filename = _generate_asset_filename(asset, asset.bookmark.url, extension)
+    filepath = os.path.join(settings.LD_ASSET_FOLDER, filename)
+    content_hash, content_size = _write_asset_file(
+        filepath, chunks, codec, dictionary, size
+    )
+
+    asset.file = filename
+    asset.gzip = codec == BookmarkAsset.CODEC_GZIP
+    asset.codec = codec
+    asset.compression_dictionary = dictionary
+    return content_hash, content_size
+
+
+def _get_html_snapshot_name(date_created) -> str:
+    timestamp = formats.date_format(date_created, "SHORT_DATE_FORMAT")
+    return _("HTML snapshot from %(timestamp)s") % {"timestamp": timestamp}
+
+
+def _find_unchanged_snapshot(
+    asset: BookmarkAsset, temp_filepath: str
+) -> BookmarkAsset | None:
+    latest = asset.bookmark.latest_snapshot
+    if (
+        not latest
+        or latest.pk == asset.pk
+        or latest.status != BookmarkAsset.STATUS_COMPLETE
+        or latest.content_type != BookmarkAsset.CONTENT_TYPE_HTML
+        or not latest.file
+    ):
+        return None
+
+    try:
+        with compression.open_asset_file(latest) as f:
+            latest_fingerprint = singlefile.get_content_fingerprint(_read_chunks(f))
+    except Exception as error:
+        logger.warning(
+            f"Failed to read latest snapshot. asset={latest.id}", exc_info=error
+        )
+        return None
+    with open(temp_filepath, "rb") as f:
+        temp_fingerprint = singlefile.get_content_fingerprint(_read_chunks(f))
+
+    return latest if latest_fingerprint == temp_fingerprint else None
+
+
+def _touch_snapshot(snapshot: BookmarkAsset, pending_asset: BookmarkAsset):
+    """
+    Marks an existing snapshot as current, instead of storing a new snapshot
+    with the same content.
+    """
+    now = timezone.now()
+    # Keep names that were changed by the user
+    if snapshot.display_name == _get_html_snapshot_name(snapshot.date_created):
+        snapshot.display_name = _get_html_snapshot_name(now)
+    snapshot.date_created = now
+    snapshot.save(update_fields=["date_created", "display_name"])
+
+    if pending_asset.pk:
+        pending_asset.delete()
+
+    logger.info(
+        f"Page did not change since the latest snapshot, kept existing snapshot. "
+        f"bookmark={snapshot.bookmark_id} asset={snapshot.id}"
+    )
+
+
 def _create_pdf_snapshot(asset: BookmarkAsset, request_config: dict | None = None):
     url = asset.bookmark.url
     max_size = settings.LD_SNAPSHOT_PDF_MAX_SIZE
 
-    temp_filename = _generate_asset_filename(asset, url, "tmp")
-    temp_filepath = os.path.join(settings.LD_ASSET_FOLDER, temp_filename)
-
     request_timeout = request_config.get("timeout", 60) if request_config else 60
     request_kwargs = {
         "cookies": build_request_cookies(request_config),
@@ -109,75 +203,66 @@ def _create_pdf_snapshot(asset: BookmarkAsset, request_config: dict | None = Non
     if proxies:
         request_kwargs["proxies"] = proxies
 
-    try:
-        with requests.get(url, **request_kwargs) as response:
-            response.raise_for_status()
-
-            content_length = response.headers.get("Content-Length")
-            if content_length and int(content_length) > max_size:
-                raise PdfTooLargeError(
-                    f"PDF size ({content_length} bytes) exceeds limit ({max_size} bytes)"
-                )
-
-            downloaded_size = 0
-            with open(temp_filepath, "wb") as temp_file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if not chunk:
-                        continue
-
-                    downloaded_size += len(chunk)
-                    if downloaded_size > max_size:
-                        raise PdfTooLargeError(
-                            f"PDF size exceeds limit ({max_size} bytes)"
-                        )
-                    temp_file.write(chunk)
-
-        filename = _generate_asset_filename(asset, url, "pdf.gz")
+    with requests.get(url, **request_kwargs) as response:
+        response.raise_for_status()
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and int(content_length) > max_size:
+            raise PdfTooLargeError(
+                f"PDF size ({content_length} bytes) exceeds limit ({max_size} bytes)"
+            )
+
+        # Stream the download directly into the asset folder. PDFs are stored
+        # uncompressed, as viewers load them with range requests.
+        filename = _generate_asset_filename(asset, url, "pdf")
         filepath = os.path.join(settings.LD_ASSET_FOLDER, filename)
-        with (
-            open(temp_filepath, "rb") as temp_file,
-            gzip.open(filepath, "wb") as gz_file,
-        ):
-            shutil.copyfileobj(temp_file, gz_file)
-
-        timestamp = formats.date_format(asset.date_created, "SHORT_DATE_FORMAT")
-
-        asset.status = BookmarkAsset.STATUS_COMPLETE
-        asset.content_type = BookmarkAsset.CONTENT_TYPE_PDF
-        asset.display_name = _("PDF download from %(timestamp)s") % {
-            "timestamp": timestamp
-        }
-        asset.file = filename
-        asset.gzip = True
-        asset.save()
+        content_hash, content_size = _write_asset_file(
+            filepath, _iter_pdf_download(response, max_size), codec=""
+        )
 
-        asset.bookmark.latest_snapshot = asset
-        asset.bookmark.date_modified = timezone.now()
-        _save_bookmark_updates(asset.bookmark, ["latest_snapshot", "date_modified"])
-    finally:
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
+    timestamp = formats.date_format(asset.date_created, "SHORT_DATE_FORMAT")
 
+    asset.status = BookmarkAsset.STATUS_COMPLETE
+    asset.content_type = BookmarkAsset.CONTENT_TYPE_PDF
+    asset.display_name = _("PDF download from %(timestamp)s") % {"timestamp": timestamp}
+    asset.file = filename
+    asset.file_size = content_size
+    asset.gzip = False
+    asset.codec = ""
+    _save_asset_with_file(asset, content_hash, content_size)
 
-def upload_snapshot(bookmark: Bookmark, html: bytes):
-    asset = create_snapshot_asset(bookmark)
-    filename = _generate_asset_filename(asset, asset.bookmark.url, "html.gz")
-    filepath = os.path.join(settings.LD_ASSET_FOLDER, filename)
+    asset.bookmark.latest_snapshot = asset
+    asset.bookmark.date_modified = timezone.now()
+    _save_bookmark_updates(asset.bookmark, ["latest_snapshot", "date_modified"])
 
-    with gzip.open(filepath, "wb") as gz_file:
-        gz_file.write(html)
 
-    # Only save the asset if the file was written successfully
-    timestamp = formats.date_format(asset.date_created, "SHORT_DATE_FORMAT")
+def _iter_pdf_download(response: requests.Response, max_size: int):
+    downloaded_size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        if not chunk:
+            continue
 
+        downloaded_size += len(chunk)
+        if downloaded_size > max_size:
+            raise PdfTooLargeError(f"PDF size exceeds limit ({max_size} bytes)")
+        yield chunk
+
+
+def upload_snapshot(bookmark: Bookmark, html: bytes | UploadedFile):
+    asset = create_snapshot_asset(bookmark)
+    if isinstance(html, UploadedFile):
+        # Compress uploads while reading them, instead of loading them into
+        # memory first
+        chunks, size = html.chunks(), html.size
+    else:
+        chunks, size = [html], len(html)
+    content_hash, content_size = _store_html_snapshot(asset, chunks, size)
+
+    # Only save the asset if the file was written successfully
     asset.status = BookmarkAsset.STATUS_COMPLETE
     asset.content_type = BookmarkAsset.CONTENT_TYPE_HTML
-    asset.display_name = _("HTML snapshot from %(timestamp)s") % {
-        "timestamp": timestamp
-    }
-    asset.file = filename
-    asset.gzip = True
-    asset.save()
+    asset.display_name = _get_html_snapshot_name(asset.date_created)
+    _save_asset_with_file(asset, content_hash, content_size)
 
     asset.bookmark.latest_snapshot = asset
     asset.bookmark.date_modified = timezone.now()
@@ -199,28 +284,31 @@ def upload_asset(bookmark: Bookmark, upload_file: UploadedFile):
         )
         name, extension = os.path.splitext(upload_file.name)
 
-        # automatically gzip the file if it is not already gzipped
-        if upload_file.content_type != "application/gzip":
+        # automatically gzip the file if it is not already gzipped. PDF, audio
+        # and video files are stored as is, they barely compress and are read
+        # with range requests, which can then read from the file directly.
+        if not _is_stored_uncompressed(upload_file.content_type):
             filename = _generate_asset_filename(
                 asset, name, extension.lstrip(".") + ".gz"
             )
             filepath = os.path.join(settings.LD_ASSET_FOLDER, filename)
-            with gzip.open(filepath, "wb", compresslevel=9) as f:
-                for chunk in upload_file.chunks():
-                    f.write(chunk)
+            content_hash, content_size = _write_asset_file(
+                filepath, upload_file.chunks()
+            )
             asset.gzip = True
+            asset.codec = BookmarkAsset.CODEC_GZIP
             asset.file = filename
             asset.file_size = os.path.getsize(filepath)
         else:
             filename = _generate_asset_filename(asset, name, extension.lstrip("."))
             filepath = os.path.join(settings.LD_ASSET_FOLDER, filename)
-            with open(filepath, "wb") as f:
-                for chunk in upload_file.chunks():
-                    f.write(chunk)
+            content_hash, content_size = _write_asset_file(
+                filepath, upload_file.chunks(), codec=""
+            )
             asset.file = filename
             asset.file_size = upload_file.size
 
-        asset.save()
+        _save_asset_with_file(asset, content_hash, content_size)
 
         asset.bookmark.date_modified = timezone.now()
         _save_bookmark_updates(asset.bookmark, ["date_modified"])
@@ -237,6 +325,89 @@ def upload_asset(bookmark: Bookmark, upload_file: UploadedFile):
         raise e
 
 
+def _read_chunks(file, chunk_size: int = 64 * 1024):
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+
+def _write_asset_file(
+    filepath: str,
+    chunks,
+    codec: str = BookmarkAsset.CODEC_GZIP,
+    dictionary: CompressionDictionary | None = None,
+    size: int = -1,
+) -> tuple[str, int]:
+    """
+    Writes the chunks into an asset file, and returns the SHA-256 hash and the
+    size of the uncompressed content. The content is written into a partial file first,
+    which replaces the asset file once it is complete, so that a failed write
+    never leaves an incomplete asset file behind.
+    """
+    content_hash = hashlib.sha256()
+    content_size = 0
+    partial_filepath = filepath + ".part"
+    try:
+        with compression.open_writer(partial_filepath, codec, dictionary, size) as f:
+            for chunk in chunks:
+                content_hash.update(chunk)
+                content_size += len(chunk)
+                f.write(chunk)
+        os.replace(partial_filepath, filepath)
+    except BaseException:
+        if os.path.exists(partial_filepath):
+            os.remove(partial_filepath)
+        raise
+    return content_hash.hexdigest(), content_size
+
+
+def _find_file_with_content(asset: BookmarkAsset) -> str | None:
+    return (
+        BookmarkAsset.objects.filter(
+            content_hash=asset.content_hash,
+            gzip=asset.gzip,
+            codec=asset.codec,
+            compression_dictionary=asset.compression_dictionary,
+        )
+        .exclude(file="")
+        .exclude(file=asset.file)
+        .values_list("file", flat=True)
+        .first()
+    )
+
+
+def _save_asset_with_file(asset: BookmarkAsset, content_hash: str, content_size: int):
+    """
+    Saves an asset with a newly written file. If another asset already stores
+    the same content, the asset references the existing file instead, and the
+    new file is removed.
+    """
+    asset.content_hash = content_hash
+    asset.content_size = content_size
+    new_file = asset.file
+    existing_file = _find_file_with_content(asset)
+    if existing_file:
+        asset.file = existing_file
+    asset.save()
+
+    if not existing_file:
+        return
+    new_filepath = os.path.join(settings.LD_ASSET_FOLDER, new_file)
+    existing_filepath = os.path.join(settings.LD_ASSET_FOLDER, existing_file)
+    if os.path.isfile(existing_filepath):
+        os.remove(new_filepath)
+    else:
+        # The other asset has been removed in the meantime, keep this copy
+        os.replace(new_filepath, existing_filepath)
+
+
+def _is_stored_uncompressed(content_type: str | None) -> bool:
+    content_type = content_type or ""
+    return content_type in (
+        "application/gzip",
+        BookmarkAsset.CONTENT_TYPE_PDF,
+    ) or content_type.startswith(("audio/", "video/"))
+
+
 def remove_asset(asset: BookmarkAsset):
     # If this asset is the latest_snapshot for a bookmark, try to find the next most recent snapshot
     bookmark = asset.bookmark
@@ -275,6 +446,144 @@ def rename_asset(asset: BookmarkAsset, new_display_name: str):
     )
 
 
+def _hash_asset_file(asset: BookmarkAsset) -> str | None:
+    content_hash = hashlib.sha256()
+    try:
+        with compression.open_asset_file(asset) as f:
+            for chunk in _read_chunks(f):
+                content_hash.update(chunk)
+    except Exception as error:
+        logger.warning(f"Failed to hash asset file: {asset.file}", exc_info=error)
+        return None
+    return content_hash.hexdigest()
+
+
+def deduplicate_assets(dry_run: bool = False) -> DeduplicationResult:
+    """
+    Hashes the files of assets that were stored before assets were
+    deduplicated, and merges files with the same content into a single file.
+    With `dry_run`, only reports the files that would be removed.
+    """
+    assets = list(
+        BookmarkAsset.objects.exclude(file="")
+        .only("id", "file", "gzip", "codec", "compression_dictionary", "content_hash")
+        .order_by("id")
+    )
+
+    unhashed_assets = []
+    for asset in assets:
+        if not asset.content_hash:
+            asset.content_hash = _hash_asset_file(asset) or ""
+            if asset.content_hash:
+                unhashed_assets.append(asset)
+    if not dry_run:
+        BookmarkAsset.objects.bulk_update(
+            unhashed_assets, ["content_hash"], batch_size=500
+        )
+
+    files_by_content = {}
+    for asset in assets:
+        if asset.content_hash:
+            key = (
+                asset.content_hash,
+                asset.gzip,
+                asset.codec,
+                asset.compression_dictionary_id,
+            )
+            files_by_content.setdefault(key, []).append(asset.file)
+
+    removed_count = 0
+    reclaimed_bytes = 0
+    for files in files_by_content.values():
+        existing_files = [
+            file
+            for file in dict.fromkeys(files)
+            if os.path.isfile(os.path.join(settings.LD_ASSET_FOLDER, file))
+        ]
+        if len(existing_files) < 2:
+            continue
+
+        kept_file, *duplicate_files = existing_files
+        kept_size = os.path.getsize(os.path.join(settings.LD_ASSET_FOLDER, kept_file))
+        for file in duplicate_files:
+            filepath = os.path.join(settings.LD_ASSET_FOLDER, file)
+            reclaimed_bytes += os.path.getsize(filepath)
+            removed_count += 1
+            if dry_run:
+                continue
+            BookmarkAsset.objects.filter(file=file).update(
+                file=kept_file, file_size=kept_size
+            )
+            os.remove(filepath)
+
+    logger.info(
+        f"Deduplicated asset files. hashed={len(unhashed_assets)} "
+        f"removed={removed_count} reclaimed_bytes={reclaimed_bytes} dry_run={dry_run}"
+    )
+    return DeduplicationResult(len(unhashed_assets), removed_count, reclaimed_bytes)
+
+
+def update_asset_storage() -> int:
+    """
+    Updates the files of assets that were stored before their content size was
+    recorded, so that range requests don't need to decompress them. Compressed
+    files of content types that are now stored as is are decompressed, other
+    files only get their content size stored. Returns the number of updated
+    files.
+    """
+    files = list(
+        BookmarkAsset.objects.filter(content_size__isnull=True)
+        .exclude(file="")
+        .values_list("file", flat=True)
+        .distinct()
+    )
+    updated_count = 0
+    for file in files:
+        try:
+            if _update_file_storage(file):
+                updated_count += 1
+        except Exception as error:
+            logger.warning(f"Failed to update asset file: {file}", exc_info=error)
+
+    logger.info(f"Updated storage of asset files. count={updated_count}")
+    return updated_count
+
+
+def _update_file_storage(file: str) -> bool:
+    # Assets with the same content share the file
+    asset = BookmarkAsset.objects.filter(file=file).first()
+    filepath = os.path.join(settings.LD_ASSET_FOLDER, file)
+    if not asset or not os.path.isfile(filepath):
+        return False
+
+    uncompressed_file = file.removesuffix(".gz")
+    uncompressed_filepath = os.path.join(settings.LD_ASSET_FOLDER, uncompressed_file)
+    if (
+        not asset.gzip
+        or not _is_stored_uncompressed(asset.content_type)
+        or uncompressed_file == file
+        or os.path.exists(uncompressed_filepath)
+    ):
+        content_size = compression.get_content_size(asset, filepath)
+        BookmarkAsset.objects.filter(file=file).update(content_size=content_size)
+        return True
+
+    with compression.open_asset_file(asset, filepath) as f:
+        _, content_size = _write_asset_file(
+            uncompressed_filepath, _read_chunks(f), codec=""
+        )
+    BookmarkAsset.objects.filter(file=file).update(
+        file=uncompressed_file,
+        file_size=content_size,
+        content_size=content_size,
+        gzip=False,
+        codec="",
+        compression_dictionary=None,
+    )
+    os.remove(filepath)
+    return True
+
+
 def _generate_asset_filename(
     asset: BookmarkAsset, filename: str, extension: str
 ) -> str:
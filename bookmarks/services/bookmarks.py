@@ -1,12 +1,21 @@
 import logging
+import operator
 
-from django.db import transaction
+from django.db.models import Q, QuerySet
 from django.utils import timezone
 
-from bookmarks.models import Bookmark, BookmarkAsset, User, parse_tag_string
+from bookmarks.models import (
+    Bookmark,
+    BookmarkAsset,
+    BookmarkChange,
+    User,
+    defer_file_cleanup,
+    parse_tag_string,
+)
 from bookmarks.services import auto_tagging, tasks, website_loader
-from bookmarks.services.tags import get_or_create_tags
-from bookmarks.utils import normalize_url
+from bookmarks.services.tags import get_or_create_tags, get_or_create_tags_bulk
+from bookmarks.services.transactions import atomic_write, write_transaction
+from bookmarks.utils import build_title_sort_key, normalize_url, unique
 
 logger = logging.getLogger(__name__)
 
@@ -18,39 +27,9 @@ def create_bookmark(
     disable_html_snapshot: bool = False,
     schedule_metadata_enrichment: bool = False,
 ):
-    from django.db.models import Q
-
-    # Use transaction and select_for_update to prevent TOCTOU race condition
-    with transaction.atomic():
-        normalized_url = normalize_url(bookmark.url)
-        # Lock the row if it exists, preventing concurrent creates for the same URL
-        # Fall back to exact URL match if normalized URL is empty (for legacy data)
-        existing_bookmark: Bookmark = (
-            Bookmark.objects.select_for_update()
-            .filter(
-                Q(owner=current_user)
-                & (
-                    Q(url_normalized=normalized_url)
-                    | Q(url_normalized="", url=bookmark.url)
-                )
-            )
-            .first()
-        )
-
-        if existing_bookmark is not None:
-            _merge_bookmark_data(bookmark, existing_bookmark)
-            return update_bookmark(existing_bookmark, tag_string, current_user)
-
-        # Set currently logged in user as owner
-        bookmark.owner = current_user
-        if not bookmark.date_added:
-            bookmark.date_added = timezone.now()
-        if not bookmark.date_modified:
-            bookmark.date_modified = timezone.now()
-        bookmark.save()
-        # Update tag list
-        _update_bookmark_tags(bookmark, tag_string, current_user)
-        bookmark.save()
+    bookmark, created = _create_or_update_bookmark(bookmark, tag_string, current_user)
+    if not created:
+        return bookmark
 
     # Tasks that don't need to be in the transaction
     # Create snapshot on web archive
@@ -72,6 +51,193 @@ def create_bookmark(
     return bookmark
 
 
+@write_transaction
+def _create_or_update_bookmark(
+    bookmark: Bookmark, tag_string: str, current_user: User
+) -> tuple[Bookmark, bool]:
+    # Run in a write transaction to prevent TOCTOU race condition. On SQLite,
+    # which ignores select_for_update, the transaction holds the database write
+    # lock from the start.
+    normalized_url = normalize_url(bookmark.url)
+    # Lock the row if it exists, preventing concurrent creates for the same URL
+    # Fall back to exact URL match if normalized URL is empty (for legacy data)
+    existing_bookmark: Bookmark = (
+        Bookmark.objects.select_for_update()
+        .filter(
+            Q(owner=current_user)
+            & (
+                Q(url_normalized=normalized_url)
+                | Q(url_normalized="", url=bookmark.url)
+            )
+        )
+        .first()
+    )
+
+    if existing_bookmark is not None:
+        _merge_bookmark_data(bookmark, existing_bookmark)
+        return update_bookmark(existing_bookmark, tag_string, current_user), False
+
+    # Set currently logged in user as owner
+    bookmark.owner = current_user
+    if not bookmark.date_added:
+        bookmark.date_added = timezone.now()
+    if not bookmark.date_modified:
+        bookmark.date_modified = timezone.now()
+    bookmark.save()
+    # Update tag list
+    _update_bookmark_tags(bookmark, tag_string, current_user)
+    bookmark.save()
+
+    return bookmark, True
+
+
+def create_bookmarks(
+    items: list[tuple[Bookmark, str]],
+    current_user: User,
+    disable_html_snapshot: bool = False,
+    schedule_metadata_enrichment: bool = True,
+) -> list[tuple[Bookmark, bool]]:
+    """
+    Bulk version of `create_bookmark` that creates or updates a list of
+    bookmarks with their tag strings. Bookmarks are deduplicated by their
+    normalized URL, both against existing bookmarks and within the list. Writes
+    all bookmarks in a single transaction and schedules loading their favicons,
+    preview images, snapshots and metadata as a single background task.
+    Returns the saved bookmark and whether it was created for each item.
+    """
+    results = _create_or_update_bookmarks(items, current_user)
+
+    all_bookmarks = unique(
+        [bookmark for bookmark, _created in results], operator.attrgetter("id")
+    )
+    created_bookmarks = [bookmark for bookmark, created in results if created]
+    enrich_metadata_ids = []
+    if schedule_metadata_enrichment:
+        enrich_metadata_ids = [
+            bookmark.id
+            for bookmark in created_bookmarks
+            if _needs_metadata_enrichment(bookmark)
+        ]
+    tasks.enrich_bookmarks(
+        current_user,
+        [bookmark.id for bookmark in all_bookmarks],
+        web_archive_bookmark_ids=[bookmark.id for bookmark in created_bookmarks],
+        metadata_bookmark_ids=enrich_metadata_ids,
+    )
+    if (
+        current_user.profile.enable_automatic_html_snapshots
+        and not disable_html_snapshot
+    ):
+        tasks.create_html_snapshots(created_bookmarks)
+
+    return results
+
+
+@write_transaction
+def _create_or_update_bookmarks(
+    items: list[tuple[Bookmark, str]], current_user: User
+) -> list[tuple[Bookmark, bool]]:
+    now = timezone.now()
+    urls = [bookmark.url for bookmark, _tag_string in items]
+    normalized_urls = [normalize_url(url) for url in urls]
+    # Fall back to exact URL match if normalized URL is empty (for legacy data)
+    existing_bookmarks = Bookmark.objects.filter(
+        Q(owner=current_user)
+        & (Q(url_normalized__in=normalized_urls) | Q(url_normalized="", url__in=urls))
+    )
+    bookmarks_by_url = {
+        bookmark.url_normalized or normalize_url(bookmark.url): bookmark
+        for bookmark in existing_bookmarks
+    }
+
+    results = []
+    tag_strings = {}
+    bookmarks_to_create = []
+    bookmarks_to_update = []
+
+    for (bookmark, tag_string), normalized_url in zip(
+        items, normalized_urls, strict=True
+    ):
+        existing_bookmark = bookmarks_by_url.get(normalized_url)
+        if existing_bookmark is not None:
+            # Later items with the same URL update the bookmark of the first one
+            _merge_bookmark_data(bookmark, existing_bookmark)
+            existing_bookmark.date_modified = now
+            existing_bookmark.title_sort_key = build_title_sort_key(
+                existing_bookmark.title, existing_bookmark.url
+            )
+            if existing_bookmark.is_deleted:
+                existing_bookmark.is_deleted = False
+                existing_bookmark.date_deleted = None
+            if existing_bookmark.pk and existing_bookmark not in bookmarks_to_update:
+                bookmarks_to_update.append(existing_bookmark)
+            results.append((existing_bookmark, False))
+            tag_strings[normalized_url] = tag_string
+            continue
+
+        bookmark.owner = current_user
+        bookmark.url_normalized = normalized_url
+        bookmark.title_sort_key = build_title_sort_key(bookmark.title, bookmark.url)
+        if not bookmark.date_added:
+            bookmark.date_added = now
+        if not bookmark.date_modified:
+            bookmark.date_modified = now
+        bookmarks_to_create.append(bookmark)
+        bookmarks_by_url[normalized_url] = bookmark
+        results.append((bookmark, True))
+        tag_strings[normalized_url] = tag_string
+
+    Bookmark.objects.bulk_update(
+        bookmarks_to_update,
+        [
+            "title",
+            "title_sort_key",
+            "description",
+            "notes",
+            "unread",
+            "shared",
+            "date_modified",
+            "is_deleted",
+            "date_deleted",
+        ],
+    )
+    Bookmark.objects.bulk_create(bookmarks_to_create)
+    BookmarkChange.record(
+        current_user.id,
+        [bookmark.id for bookmark in bookmarks_to_create],
+        BookmarkChange.ACTION_CREATED,
+    )
+    BookmarkChange.record(
+        current_user.id,
+        [bookmark.id for bookmark in bookmarks_to_update],
+        BookmarkChange.ACTION_UPDATED,
+    )
+
+    # Replace the tags of all bookmarks, like `_update_bookmark_tags` does
+    tag_names_by_url = {
+        normalized_url: _get_tag_names(
+            bookmarks_by_url[normalized_url], tag_string, current_user
+        )
+        for normalized_url, tag_string in tag_strings.items()
+    }
+    tags = get_or_create_tags_bulk(
+        [name for names in tag_names_by_url.values() for name in names],
+        current_user,
+    )
+    BookmarkToTagRelationShip = Bookmark.tags.through
+    BookmarkToTagRelationShip.objects.filter(bookmark__in=bookmarks_to_update).delete()
+    relationships = [
+        BookmarkToTagRelationShip(
+            bookmark=bookmarks_by_url[normalized_url], tag=tags[name.lower()]
+        )
+        for normalized_url, tag_names in tag_names_by_url.items()
+        for name in tag_names
+    ]
+    BookmarkToTagRelationShip.objects.bulk_create(relationships, ignore_conflicts=True)
+
+    return results
+
+
 def update_bookmark(bookmark: Bookmark, tag_string, current_user: User):
     # Detect URL change
     original_bookmark = Bookmark.objects.get(id=bookmark.id)
@@ -116,7 +282,7 @@ def enhance_with_website_metadata(bookmark: Bookmark):
     if update_fields:
         bookmark.date_modified = timezone.now()
         update_fields.append("date_modified")
-        bookmark.save(update_fields=update_fields)
+        atomic_write(bookmark.save, update_fields=update_fields)
 
 
 def _needs_metadata_enrichment(bookmark: Bookmark):
@@ -137,8 +303,11 @@ def archive_bookmark(bookmark: Bookmark):
 def archive_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        is_archived=True, date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        is_archived=True,
+        date_modified=timezone.now(),
     )
 
 
@@ -152,15 +321,25 @@ def unarchive_bookmark(bookmark: Bookmark):
 def unarchive_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        is_archived=False, date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        is_archived=False,
+        date_modified=timezone.now(),
     )
 
 
 def delete_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).delete()
+    # Remove preview images and asset files in a single background job instead
+    # of touching the file system for every deleted row
+    with defer_file_cleanup() as filepaths:
+        Bookmark.objects.filter(
+            owner=current_user, id__in=sanitized_bookmark_ids
+        ).delete()
+
+    tasks.delete_files(filepaths)
 
 
 def trash_bookmark(bookmark: Bookmark):
@@ -171,8 +350,11 @@ def trash_bookmark(bookmark: Bookmark):
 
 def trash_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        is_deleted=True, date_deleted=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        is_deleted=True,
+        date_deleted=timezone.now(),
     )
 
 
@@ -184,8 +366,11 @@ def restore_bookmark(bookmark: Bookmark):
 
 def restore_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        is_deleted=False, date_deleted=None
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        is_deleted=False,
+        date_deleted=None,
     )
 
 
@@ -207,8 +392,10 @@ def tag_bookmarks(bookmark_ids: [int | str], tag_string: str, current_user: User
 
     # Insert all bookmark -> tag associations at once, should ignore errors if association already exists
     BookmarkToTagRelationShip.objects.bulk_create(relationships, ignore_conflicts=True)
-    Bookmark.objects.filter(id__in=owned_bookmark_ids).update(
-        date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(id__in=owned_bookmark_ids),
+        current_user,
+        date_modified=timezone.now(),
     )
 
 
@@ -227,40 +414,54 @@ def untag_bookmarks(bookmark_ids: [int | str], tag_string: str, current_user: Us
             bookmark_id__in=owned_bookmark_ids, tag=tag
         ).delete()
 
-    Bookmark.objects.filter(id__in=owned_bookmark_ids).update(
-        date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(id__in=owned_bookmark_ids),
+        current_user,
+        date_modified=timezone.now(),
     )
 
 
 def mark_bookmarks_as_read(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        unread=False, date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        unread=False,
+        date_modified=timezone.now(),
     )
 
 
 def mark_bookmarks_as_unread(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        unread=True, date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        unread=True,
+        date_modified=timezone.now(),
     )
 
 
 def share_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        shared=True, date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        shared=True,
+        date_modified=timezone.now(),
     )
 
 
 def unshare_bookmarks(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids).update(
-        shared=False, date_modified=timezone.now()
+    _update_bookmarks(
+        Bookmark.objects.filter(owner=current_user, id__in=sanitized_bookmark_ids),
+        current_user,
+        shared=False,
+        date_modified=timezone.now(),
     )
 
 
@@ -288,11 +489,22 @@ def create_html_snapshots(bookmark_ids: list[int | str], current_user: User):
 def remove_all_html_snapshots(bookmark_ids: [int | str], current_user: User):
     sanitized_bookmark_ids = _sanitize_id_list(bookmark_ids)
 
-    BookmarkAsset.objects.filter(
-        bookmark__owner=current_user,
-        bookmark_id__in=sanitized_bookmark_ids,
-        asset_type=BookmarkAsset.TYPE_SNAPSHOT,
-    ).delete()
+    with defer_file_cleanup() as filepaths:
+        BookmarkAsset.objects.filter(
+            bookmark__owner=current_user,
+            bookmark_id__in=sanitized_bookmark_ids,
+            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+        ).delete()
+
+    tasks.delete_files(filepaths)
+
+
+@write_transaction
+def _update_bookmarks(bookmarks: QuerySet, current_user: User, **values):
+    # Queryset updates don't send signals, record the changes for sync clients
+    bookmark_ids = list(bookmarks.values_list("id", flat=True))
+    Bookmark.objects.filter(id__in=bookmark_ids).update(**values)
+    BookmarkChange.record(current_user.id, bookmark_ids, BookmarkChange.ACTION_UPDATED)
 
 
 def _merge_bookmark_data(from_bookmark: Bookmark, to_bookmark: Bookmark):
@@ -304,6 +516,12 @@ def _merge_bookmark_data(from_bookmark: Bookmark, to_bookmark: Bookmark):
 
 
 def _update_bookmark_tags(bookmark: Bookmark, tag_string: str, user: User):
+    tag_names = _get_tag_names(bookmark, tag_string, user)
+    tags = get_or_create_tags(tag_names, user)
+    bookmark.tags.set(tags)
+
+
+def _get_tag_names(bookmark: Bookmark, tag_string: str, user: User) -> list[str]:
     tag_names = parse_tag_string(tag_string)
 
     if user.profile.auto_tagging_rules:
@@ -320,8 +538,7 @@ def _update_bookmark_tags(bookmark: Bookmark, tag_string: str, user: User):
                 exc_info=e,
             )
 
-    tags = get_or_create_tags(tag_names, user)
-    bookmark.tags.set(tags)
+    return tag_names
 
 
 def _sanitize_id_list(bookmark_ids: [int | str]) -> [int]:
@@ -0,0 +1,122 @@
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.utils import timezone
+
+from bookmarks.models import Bookmark, BookmarkChange, GlobalSettings
+from bookmarks.services import transactions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Change:
+    seq: int
+    action: str
+    bookmark_id: int
+    bookmark: Bookmark | None
+
+
+@dataclass
+class ChangesPage:
+    changes: list[Change]
+    next_since: int
+    has_more: bool
+    # Deleted bookmarks after `since` might have been removed from the log
+    reset: bool
+
+
+def get_changes(user: User, since: int, limit: int) -> ChangesPage:
+    """
+    Returns the changes of a user's bookmarks after the `since` sequence
+    number. Multiple changes of a bookmark within a page are collapsed into the
+    latest one, which comes with the current state of the bookmark.
+    """
+    entries = BookmarkChange.objects.filter(owner=user, id__gt=since)
+    entries = list(entries.order_by("id")[: limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest_entries = {entry.bookmark_id: entry for entry in entries}
+    bookmarks = Bookmark.objects.filter(
+        owner=user,
+        id__in=[
+            entry.bookmark_id
+            for entry in latest_entries.values()
+            if entry.action != BookmarkChange.ACTION_DELETED
+        ],
+    )
+    bookmarks_by_id = {bookmark.id: bookmark for bookmark in bookmarks}
+
+    changes = []
+    for entry in sorted(latest_entries.values(), key=lambda e: e.id):
+        bookmark = bookmarks_by_id.get(entry.bookmark_id)
+        # The bookmark might have been deleted after the last change in this
+        # page, report the deletion right away
+        action = entry.action if bookmark else BookmarkChange.ACTION_DELETED
+        changes.append(Change(entry.id, action, entry.bookmark_id, bookmark))
+
+    next_since = entries[-1].id if entries else since
+    reset = 0 < since < get_pruned_seq()
+    return ChangesPage(changes, next_since, has_more, reset)
+
+
+def get_pruned_seq() -> int:
+    """
+    Returns the latest sequence number for which deleted bookmarks have been
+    removed from the log. Clients that synced before have to sync again from
+    the start.
+    """
+    pruned_seq = GlobalSettings.objects.values_list(
+        "bookmark_changes_pruned_seq", flat=True
+    ).first()
+    return pruned_seq or 0
+
+
+def compact_changes() -> int:
+    """
+    Removes changes that are superseded by a later change of the same
+    bookmark. Clients only need the latest change of each bookmark to catch up,
+    so this keeps the log at about one entry per bookmark. The tombstones of
+    deleted bookmarks are removed after LD_CHANGES_RETENTION_DAYS.
+    """
+    latest_ids = (
+        BookmarkChange.objects.values("bookmark_id")
+        .annotate(latest_id=Max("id"))
+        .values("latest_id")
+    )
+    deleted_count, _ = BookmarkChange.objects.exclude(id__in=latest_ids).delete()
+    pruned_count = _prune_deleted_bookmarks()
+    logger.info(
+        f"Compacted bookmark change log. deleted={deleted_count} pruned={pruned_count}"
+    )
+    return deleted_count + pruned_count
+
+
+def _prune_deleted_bookmarks() -> int:
+    retention_days = settings.LD_CHANGES_RETENTION_DAYS
+    if retention_days <= 0:
+        return 0
+
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    expired = BookmarkChange.objects.filter(
+        action=BookmarkChange.ACTION_DELETED, date__lt=cutoff
+    )
+    pruned_seq = expired.aggregate(seq=Max("id"))["seq"]
+    if pruned_seq is None:
+        return 0
+
+    def prune() -> int:
+        # Clients see the new sequence number together with the removal
+        global_settings = GlobalSettings.get()
+        if pruned_seq > global_settings.bookmark_changes_pruned_seq:
+            global_settings.bookmark_changes_pruned_seq = pruned_seq
+            global_settings.save(update_fields=["bookmark_changes_pruned_seq"])
+        pruned_count, _ = expired.filter(id__lte=pruned_seq).delete()
+        return pruned_count
+
+    return transactions.atomic_write(prune)
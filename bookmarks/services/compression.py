@@ -0,0 +1,216 @@
+import functools
+import gzip
+import logging
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from bookmarks.models import BookmarkAsset, CompressionDictionary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Snapshots are compressed in background tasks, a high level pays off as they
+# are stored for a long time and decompressing them is fast at any level
+ZSTD_LEVEL = 12
+# Default size of trained dictionaries, as recommended by zstd
+DICTIONARY_SIZE = 110 * 1024
+# Only the start of large snapshots is used as sample for dictionaries
+DICTIONARY_SAMPLE_MAX_SIZE = 512 * 1024
+# Maximum size of a zstd frame header, which contains the content size
+ZSTD_FRAME_HEADER_MAX_SIZE = 18
+# Deflate compresses content by a factor of at most 1032, which limits the size
+# of the uncompressed content of a gzip file
+DEFLATE_MAX_RATIO = 1032
+
+logger = logging.getLogger(__name__)
+
+
+class CompressionUnavailableError(Exception):
+    pass
+
+
+def is_zstd_available() -> bool:
+    return zstandard is not None
+
+
+def _check_zstd_available():
+    if not is_zstd_available():
+        raise CompressionUnavailableError(
+            "The asset is compressed with zstd, but the zstandard package is "
+            "not installed"
+        )
+
+
+def get_snapshot_codec() -> str:
+    """Returns the codec that new HTML snapshots are compressed with"""
+    if settings.LD_SNAPSHOT_COMPRESSION == BookmarkAsset.CODEC_ZSTD:
+        if is_zstd_available():
+            return BookmarkAsset.CODEC_ZSTD
+        logger.warning(
+            "zstd compression is enabled, but the zstandard package is not "
+            "installed. Falling back to gzip."
+        )
+    return BookmarkAsset.CODEC_GZIP
+
+
+def get_latest_dictionary() -> CompressionDictionary | None:
+    return CompressionDictionary.objects.order_by("-id").first()
+
+
+@functools.lru_cache(maxsize=4)
+def _load_dictionary(dictionary_id: int):
+    data = CompressionDictionary.objects.values_list("data", flat=True).get(
+        id=dictionary_id
+    )
+    return zstandard.ZstdCompressionDict(bytes(data))
+
+
+def clear_dictionary_cache():
+    _load_dictionary.cache_clear()
+
+
+@contextmanager
+def open_writer(
+    filepath: str,
+    codec: str,
+    dictionary: CompressionDictionary | None = None,
+    size: int = -1,
+):
+    """
+    Opens an asset file for writing, which compresses the written content with
+    the given codec. Pass the size of the content if known, so that it can be
+    stored in the file.
+    """
+    if codec == BookmarkAsset.CODEC_GZIP:
+        with gzip.open(filepath, "wb", compresslevel=9) as f:
+            yield f
+    elif codec == BookmarkAsset.CODEC_ZSTD:
+        _check_zstd_available()
+        compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL,
+            dict_data=_load_dictionary(dictionary.id) if dictionary else None,
+        )
+        with (
+            open(filepath, "wb") as f,
+            compressor.stream_writer(f, size=size, closefd=False) as writer,
+        ):
+            yield writer
+    else:
+        with open(filepath, "wb") as f:
+            yield f
+
+
+def open_asset_file(asset: BookmarkAsset, filepath: str | None = None):
+    """
+    Opens the file of an asset for reading its uncompressed content. The
+    content is decompressed while reading, and the file only supports seeking
+    forward. Raises a CompressionUnavailableError if the file is compressed
+    with zstd, but the zstandard package is not installed.
+    """
+    filepath = filepath or os.path.join(settings.LD_ASSET_FOLDER, asset.file)
+    if asset.codec == BookmarkAsset.CODEC_ZSTD:
+        _check_zstd_available()
+        dictionary_id = asset.compression_dictionary_id
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=_load_dictionary(dictionary_id) if dictionary_id else None
+        )
+        return decompressor.stream_reader(open(filepath, "rb"))  # noqa: SIM115
+    if asset.gzip:
+        return gzip.open(filepath, "rb")
+    return open(filepath, "rb")  # noqa: SIM115
+
+
+def get_content_size(asset: BookmarkAsset, filepath: str) -> int:
+    """
+    Returns the size of the uncompressed content of an asset file. Uses the
+    size stored with the asset, and reads it from the file for assets that were
+    stored before the size was recorded.
+    """
+    if asset.codec == BookmarkAsset.CODEC_ZSTD:
+        _check_zstd_available()
+    if asset.content_size is not None:
+        return asset.content_size
+
+    if asset.codec == BookmarkAsset.CODEC_ZSTD:
+        with open(filepath, "rb") as f:
+            size = zstandard.frame_content_size(f.read(ZSTD_FRAME_HEADER_MAX_SIZE))
+        if size >= 0:
+            return size
+        # The size is not stored if it was not known when compressing
+        return _read_content_size(asset, filepath)
+    if asset.gzip:
+        # The trailer of a gzip file only contains the size of the uncompressed
+        # content modulo 2^32. It can only be used if the content can not be
+        # larger than that, otherwise the content is decompressed for counting
+        # its size.
+        if os.path.getsize(filepath) * DEFLATE_MAX_RATIO >= 2**32:
+            return _read_content_size(asset, filepath)
+        with open(filepath, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little")
+    return os.path.getsize(filepath)
+
+
+def _read_content_size(asset: BookmarkAsset, filepath: str) -> int:
+    size = 0
+    with open_asset_file(asset, filepath) as f:
+        while chunk := f.read(64 * 1024):
+            size += len(chunk)
+    return size
+
+
+def _load_dictionary_samples(max_samples: int) -> list[bytes]:
+    snapshots = BookmarkAsset.objects.filter(
+        asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+        status=BookmarkAsset.STATUS_COMPLETE,
+        content_type=BookmarkAsset.CONTENT_TYPE_HTML,
+    ).order_by("-date_created")
+
+    samples = []
+    sampled_files = set()
+    for snapshot in snapshots.iterator():
+        if len(samples) >= max_samples:
+            break
+        # Snapshots with the same content share a file
+        if snapshot.file in sampled_files:
+            continue
+        sampled_files.add(snapshot.file)
+        try:
+            with open_asset_file(snapshot) as f:
+                samples.append(f.read(DICTIONARY_SAMPLE_MAX_SIZE))
+        except Exception as error:
+            logger.warning(
+                f"Failed to read snapshot for dictionary. asset={snapshot.id}",
+                exc_info=error,
+            )
+    return samples
+
+
+def train_dictionary(
+    samples: list[bytes], dictionary_size: int = DICTIONARY_SIZE
+) -> bytes:
+    return zstandard.train_dictionary(dictionary_size, samples).as_bytes()
+
+
+def train_snapshot_dictionary(
+    max_samples: int = 1000, dictionary_size: int = DICTIONARY_SIZE
+) -> CompressionDictionary:
+    """
+    Trains a dictionary from the latest HTML snapshots, which is used for
+    compressing new snapshots with zstd. Existing snapshots keep using the
+    dictionary they were compressed with.
+    """
+    samples = _load_dictionary_samples(max_samples)
+    data = train_dictionary(samples, dictionary_size)
+    dictionary = CompressionDictionary.objects.create(
+        data=data, sample_count=len(samples)
+    )
+    logger.info(
+        f"Trained snapshot compression dictionary. id={dictionary.id} "
+        f"samples={len(samples)} size={len(data)}"
+    )
+    return dictionary
@@ -0,0 +1,114 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+
+from bookmarks.models import Bookmark, BookmarkAsset
+
+# Files younger than this are never considered orphaned, as snapshots and
+# preview images are written to disk before their database rows are saved
+ORPHANED_FILE_MIN_AGE_SEC = 60 * 60
+QUERY_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _batched(items: list, size: int = QUERY_BATCH_SIZE):
+    for index in range(0, len(items), size):
+        yield items[index : index + size]
+
+
+def _get_referenced_files(folder: str, filenames: list[str]) -> set[str]:
+    referenced = set()
+    for batch in _batched(filenames):
+        if folder == os.path.normpath(settings.LD_ASSET_FOLDER):
+            query = BookmarkAsset.objects.filter(file__in=batch).values_list(
+                "file", flat=True
+            )
+        else:
+            query = Bookmark.objects.filter(preview_image_file__in=batch).values_list(
+                "preview_image_file", flat=True
+            )
+        referenced.update(query)
+    return referenced
+
+
+def delete_files(filepaths: list[str]) -> int:
+    """
+    Remove the given asset and preview image files in bulk. Files that are
+    still referenced by another bookmark or asset are kept.
+    """
+    filenames_by_folder = {
+        os.path.normpath(settings.LD_ASSET_FOLDER): [],
+        os.path.normpath(settings.LD_PREVIEW_FOLDER): [],
+    }
+    for filepath in filepaths:
+        folder = os.path.dirname(os.path.normpath(filepath))
+        if folder in filenames_by_folder:
+            filenames_by_folder[folder].append(os.path.basename(filepath))
+        else:
+            logger.warning(f"Skip deleting file outside of data folders: {filepath}")
+
+    deleted_count = 0
+    for folder, filenames in filenames_by_folder.items():
+        if not filenames:
+            continue
+        referenced = _get_referenced_files(folder, filenames)
+        for filename in set(filenames) - referenced:
+            filepath = os.path.join(folder, filename)
+            try:
+                os.remove(filepath)
+                deleted_count += 1
+            except FileNotFoundError:
+                pass
+            except Exception as error:
+                logger.error(f"Failed to delete file: {filepath}", exc_info=error)
+
+    return deleted_count
+
+
+def _list_orphaned_files(folder: str, referenced: set[str], min_mtime: float):
+    if not os.path.isdir(folder):
+        return []
+
+    orphaned = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name in referenced:
+                continue
+            if entry.stat().st_mtime > min_mtime:
+                continue
+            orphaned.append(entry.path)
+    return orphaned
+
+
+def find_orphaned_files(min_age_seconds: int = ORPHANED_FILE_MIN_AGE_SEC) -> list[str]:
+    """
+    Reconcile the asset and preview image folders against the database and
+    return files that are not referenced by any asset or bookmark.
+    """
+    min_mtime = time.time() - min_age_seconds
+
+    referenced_assets = set(
+        BookmarkAsset.objects.exclude(file="").values_list("file", flat=True)
+    )
+    referenced_previews = set(
+        Bookmark.objects.exclude(preview_image_file="").values_list(
+            "preview_image_file", flat=True
+        )
+    )
+
+    return _list_orphaned_files(
+        settings.LD_ASSET_FOLDER, referenced_assets, min_mtime
+    ) + _list_orphaned_files(settings.LD_PREVIEW_FOLDER, referenced_previews, min_mtime)
+
+
+def sweep_orphaned_files(min_age_seconds: int = ORPHANED_FILE_MIN_AGE_SEC) -> int:
+    orphaned_files = find_orphaned_files(min_age_seconds)
+    if not orphaned_files:
+        return 0
+
+    deleted_count = delete_files(orphaned_files)
+    logger.info(f"Removed orphaned files. count={deleted_count}")
+    return deleted_count
@@ -4,10 +4,11 @@ from dataclasses import dataclass
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-from bookmarks.models import Bookmark, Tag
+from bookmarks.models import Bookmark, BookmarkChange, Tag
 from bookmarks.services import tasks
 from bookmarks.services.parser import NetscapeBookmark, parse
-from bookmarks.utils import normalize_url, parse_timestamp
+from bookmarks.services.transactions import write_transaction
+from bookmarks.utils import build_title_sort_key, normalize_url, parse_timestamp
 
 logger = logging.getLogger(__name__)
 
@@ -183,6 +184,25 @@ def _import_batch(
             logging.exception("Error importing bookmark: " + shortened_bookmark_tag_str)
             result.failed = result.failed + 1
 
+    _save_batch(
+        netscape_bookmarks,
+        bookmarks_to_create,
+        bookmarks_to_update,
+        batch_normalized_urls,
+        user,
+        tag_cache,
+    )
+
+
+@write_transaction
+def _save_batch(
+    netscape_bookmarks: list[NetscapeBookmark],
+    bookmarks_to_create: list[Bookmark],
+    bookmarks_to_update: list[Bookmark],
+    batch_normalized_urls: list[str],
+    user: User,
+    tag_cache: TagCache,
+):
     # Bulk update bookmarks in DB
     Bookmark.objects.bulk_update(
         bookmarks_to_update,
@@ -194,6 +214,7 @@ def _import_batch(
             "unread",
             "shared",
             "title",
+            "title_sort_key",
             "description",
             "notes",
             "owner",
@@ -201,6 +222,17 @@ def _import_batch(
     )
     # Bulk insert new bookmarks into DB
     Bookmark.objects.bulk_create(bookmarks_to_create)
+    # Bulk operations don't send signals, record the changes for sync clients
+    BookmarkChange.record(
+        user.id,
+        [bookmark.id for bookmark in bookmarks_to_create],
+        BookmarkChange.ACTION_CREATED,
+    )
+    BookmarkChange.record(
+        user.id,
+        [bookmark.id for bookmark in bookmarks_to_update],
+        BookmarkChange.ACTION_UPDATED,
+    )
 
     # Bulk assign tags
     # In Django 3, bulk_create does not return the auto-generated IDs when bulk inserting,
@@ -265,3 +297,4 @@ def _copy_bookmark_data(
         bookmark.shared = True
     if netscape_bookmark.archived:
         bookmark.is_archived = True
+    bookmark.title_sort_key = build_title_sort_key(bookmark.title, bookmark.url)
@@ -0,0 +1,219 @@
+import html
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from bs4 import BeautifulSoup, Comment
+from django.conf import settings
+from django.utils import timezone
+
+from bookmarks.models import Bookmark, BookmarkAsset, ReaderArticle
+from bookmarks.services import compression, transactions, website_loader
+
+logger = logging.getLogger(__name__)
+
+# Elements that don't contribute to the article, removing them keeps the
+# cached article small and avoids running scripts in reader mode
+REMOVED_TAGS = [
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "iframe",
+    "frame",
+    "frameset",
+    "object",
+    "embed",
+    "svg",
+    "canvas",
+    "button",
+    "input",
+    "select",
+    "textarea",
+    "link",
+    "meta",
+    "base",
+]
+# Container elements that are replaced with their content, some pages wrap all
+# of their content in a form, like ASP.NET pages do
+UNWRAPPED_TAGS = ["form", "fieldset"]
+# Readability scores elements by their class and id, so these are kept
+KEPT_ATTRIBUTES = {
+    "href",
+    "src",
+    "alt",
+    "title",
+    "id",
+    "class",
+    "colspan",
+    "rowspan",
+    "lang",
+    "dir",
+}
+# SingleFile inlines images into snapshots, large ones are dropped from the
+# article
+MAX_INLINE_IMAGE_SIZE = 64 * 1024
+# A pending article is loaded again, if the task did not finish in this time
+PENDING_TIMEOUT_SEC = 120
+# A failed article is shown until it expires, opening reader mode afterwards
+# loads the website again
+FAILURE_TTL_SEC = 60
+
+
+@dataclass
+class ExtractedArticle:
+    title: str
+    html: str
+    text: str
+
+
+def extract_article(content: str | bytes, url: str) -> ExtractedArticle:
+    """
+    Reduces a page to the markup that reader mode needs for extracting the
+    article, which is the title and the body without scripts, styles, embedded
+    content and presentational attributes. Relative links resolve against the
+    URL of the page.
+    """
+    soup = BeautifulSoup(content, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+
+    for element in soup.find_all(REMOVED_TAGS):
+        element.decompose()
+    for element in soup.find_all(UNWRAPPED_TAGS):
+        element.unwrap()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for element in soup.find_all(True):
+        src = element.get("src", "")
+        if src.startswith("data:") and len(src) > MAX_INLINE_IMAGE_SIZE:
+            element.decompose()
+            continue
+        element.attrs = {
+            name: value
+            for name, value in element.attrs.items()
+            if name in KEPT_ATTRIBUTES
+        }
+
+    body = soup.body or soup
+    if body.title:
+        body.title.decompose()
+    text = " ".join(body.get_text(" ").split())
+    article_html = (
+        f'<html><head><base href="{html.escape(url)}">'
+        f"<title>{html.escape(title)}</title></head>"
+        f"<body>{body.decode_contents()}</body></html>"
+    )
+    return ExtractedArticle(title=title, html=article_html, text=text)
+
+
+def get_latest_html_snapshot(bookmark: Bookmark) -> BookmarkAsset | None:
+    return (
+        BookmarkAsset.objects.filter(
+            bookmark=bookmark,
+            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+            content_type=BookmarkAsset.CONTENT_TYPE_HTML,
+            status=BookmarkAsset.STATUS_COMPLETE,
+        )
+        .order_by("-date_created", "-id")
+        .first()
+    )
+
+
+def _is_article_valid(
+    article: ReaderArticle, bookmark: Bookmark, snapshot: BookmarkAsset | None
+) -> bool:
+    # Articles are cached for the URL and the snapshot they were extracted from
+    if article.url != bookmark.url:
+        return False
+    if article.snapshot_id != (snapshot.id if snapshot else None):
+        return False
+
+    age = timezone.now() - article.date_modified
+    if article.status == ReaderArticle.STATUS_PENDING:
+        return age < timedelta(seconds=PENDING_TIMEOUT_SEC)
+    if article.status == ReaderArticle.STATUS_FAILURE:
+        return age < timedelta(seconds=FAILURE_TTL_SEC)
+    return age < timedelta(seconds=settings.LD_READER_CACHE_TTL_SEC)
+
+
+def _save_article(
+    bookmark: Bookmark,
+    snapshot: BookmarkAsset | None,
+    status: str,
+    extracted: ExtractedArticle | None = None,
+    error: str = "",
+) -> ReaderArticle:
+    article, _ = transactions.atomic_write(
+        ReaderArticle.objects.update_or_create,
+        bookmark=bookmark,
+        defaults={
+            "url": bookmark.url,
+            "snapshot": snapshot,
+            "status": status,
+            "title": extracted.title if extracted else "",
+            "html": extracted.html if extracted else "",
+            "text": extracted.text if extracted else "",
+            "error": error,
+            "date_modified": timezone.now(),
+        },
+    )
+    return article
+
+
+def _extract_from_snapshot(
+    bookmark: Bookmark, snapshot: BookmarkAsset
+) -> ReaderArticle | None:
+    try:
+        with compression.open_asset_file(snapshot) as f:
+            content = f.read()
+    except Exception as error:
+        logger.error(
+            f"Failed to read snapshot for reader mode. asset={snapshot.id}",
+            exc_info=error,
+        )
+        return None
+    extracted = extract_article(content, bookmark.url)
+    return _save_article(
+        bookmark, snapshot, ReaderArticle.STATUS_COMPLETE, extracted=extracted
+    )
+
+
+def get_article(bookmark: Bookmark) -> ReaderArticle | None:
+    """
+    Returns the reader mode article of a bookmark from the cache, or extracts
+    it from the latest HTML snapshot of the bookmark. Returns None if the page
+    needs to be loaded from the website, see queue_article.
+    """
+    snapshot = get_latest_html_snapshot(bookmark)
+    article = ReaderArticle.objects.filter(bookmark=bookmark).first()
+
+    if article and _is_article_valid(article, bookmark, snapshot):
+        return article
+
+    if snapshot:
+        return _extract_from_snapshot(bookmark, snapshot)
+    return None
+
+
+def queue_article(bookmark: Bookmark) -> ReaderArticle:
+    """Stores a pending article for a bookmark, which is loaded by a task"""
+    return _save_article(bookmark, None, ReaderArticle.STATUS_PENDING)
+
+
+def load_article(article: ReaderArticle):
+    """Loads a pending article from the website of the bookmark"""
+    url = article.url
+    try:
+        config = website_loader.get_request_config(url)
+        content = website_loader.load_full_page(url, config)
+        extracted = extract_article(content, url)
+    except Exception as error:
+        logger.error(f"Failed to load page for reader mode. url={url}", exc_info=error)
+        _save_article(
+            article.bookmark, None, ReaderArticle.STATUS_FAILURE, error=str(error)
+        )
+        return
+    _save_article(
+        article.bookmark, None, ReaderArticle.STATUS_COMPLETE, extracted=extracted
+    )
+    logger.info(f"Loaded page for reader mode. url={url}")
@@ -1,11 +1,19 @@
+import hashlib
 import logging
 import os
+import re
 import shlex
 import signal
 import subprocess
 
 from django.conf import settings
 
+from bookmarks.services import snapshot_workers
+from bookmarks.services.snapshot_browser import (
+    SnapshotBrowser,
+    SnapshotBrowserError,
+)
+
 
 class SingleFileError(Exception):
     pass
@@ -13,6 +21,26 @@ class SingleFileError(Exception):
 
 logger = logging.getLogger(__name__)
 
+# SingleFile adds a comment with the URL and the time of the capture to the
+# start of every snapshot
+_capture_info_comment = re.compile(
+    rb"<!--\s*Page saved with SingleFile.*?-->", re.DOTALL | re.IGNORECASE
+)
+
+
+def get_content_fingerprint(chunks) -> str:
+    """
+    Returns a hash of the content of a snapshot, which ignores the capture
+    info that SingleFile adds to every snapshot. Snapshots of a page that did
+    not change have the same fingerprint.
+    """
+    fingerprint = hashlib.sha256()
+    for index, chunk in enumerate(chunks):
+        if index == 0:
+            chunk = _capture_info_comment.sub(b"", chunk, count=1)
+        fingerprint.update(chunk)
+    return fingerprint.hexdigest()
+
 
 def get_custom_options(config: dict):
     if config:
@@ -38,11 +66,11 @@ def get_custom_options(config: dict):
     return args
 
 
-def create_snapshot(url: str, filepath: str, config: dict = None):
-    singlefile_path = settings.LD_SINGLEFILE_PATH
-
-    # 解析参数
-    custom_options = get_custom_options(config)  # 自定义配置文件参数
+def merge_options(custom_options: list[str]) -> list[str]:
+    """
+    Returns the SingleFile options, merged from the custom options of a site,
+    the options from the settings and the required options.
+    """
     global_options = shlex.split(settings.LD_SINGLEFILE_OPTIONS)  # 环境变量参数
     ublock_options = shlex.split(settings.LD_SINGLEFILE_UBLOCK_OPTIONS)
     required_options = [
@@ -83,20 +111,51 @@ def create_snapshot(url: str, filepath: str, config: dict = None):
     result_options = merge_option(result_options, global_options)
     result_options = merge_option(result_options, ublock_options)
     result_options = merge_option(result_options, required_options)
+    return result_options
+
+
+def create_snapshot(url: str, filepath: str, config: dict = None):
+    singlefile_path = settings.LD_SINGLEFILE_PATH
+
+    # 解析参数
+    custom_options = get_custom_options(config)  # 自定义配置文件参数
+    result_options = merge_options(custom_options)
+
+    # Browsers lock their profile, workers that run in parallel use their own
+    # profile and temporary directory
+    popen_kwargs = {}
+    worker = snapshot_workers.get_current_worker()
+    if worker:
+        result_options = [
+            option
+            for option in result_options
+            if not option.startswith(snapshot_workers.USER_DATA_DIR_OPTION)
+        ]
+        result_options.append(
+            f"{snapshot_workers.USER_DATA_DIR_OPTION}{worker.profile_dir}"
+        )
+        popen_kwargs["env"] = {**os.environ, "TMPDIR": worker.temp_dir}
+
+    # Attach to the persistent browser of the worker instead of launching one
+    browser = _get_persistent_browser(worker, custom_options)
+    if browser:
+        result_options.append(f"--browser-remote-debugging-URL={browser.debugging_url}")
 
     args = [singlefile_path] + result_options + [url, filepath]
 
     logger.debug(f"singlefile最终完整参数为: {args}")
 
+    timed_out = False
     try:
         # Use start_new_session=True to create a new process group
-        process = subprocess.Popen(args, start_new_session=True)
+        process = subprocess.Popen(args, start_new_session=True, **popen_kwargs)
         process.wait(timeout=settings.LD_SINGLEFILE_TIMEOUT_SEC)
 
         # check if the file was created
         if not os.path.exists(filepath):
             raise SingleFileError("Failed to create snapshot")
     except subprocess.TimeoutExpired:
+        timed_out = True
         # First try to terminate properly
         try:
             logger.error(
@@ -113,3 +172,62 @@ def create_snapshot(url: str, filepath: str, config: dict = None):
             raise SingleFileError("Timeout expired while creating snapshot") from None
     except subprocess.CalledProcessError as error:
         raise SingleFileError(f"Failed to create snapshot: {error.stderr}") from None
+    finally:
+        if browser:
+            # A timed out capture may leave a page open that still loads
+            _release_persistent_browser(worker, browser, recycle=timed_out)
+
+
+def _get_persistent_browser(
+    worker, custom_options: list[str]
+) -> SnapshotBrowser | None:
+    """
+    Returns the running persistent browser of a worker, starting it if
+    necessary. Returns None if the persistent browser is disabled, can not be
+    started, or the site has its own browser arguments, in which case
+    SingleFile launches a browser for the snapshot.
+    """
+    if not settings.LD_SNAPSHOT_PERSISTENT_BROWSER or not worker:
+        return None
+    if worker.browser_failed:
+        return None
+
+    if any(option.startswith("--browser-arg=") for option in custom_options):
+        # The persistent browser only uses the browser arguments of the
+        # settings. The browser that is launched instead uses the same profile,
+        # which can't be shared with a running browser.
+        if worker.browser:
+            worker.browser.close()
+            worker.browser = None
+        return None
+
+    if worker.browser and not worker.browser.is_healthy():
+        logger.warning("Persistent snapshot browser is not responding. Restarting...")
+        worker.browser.close()
+        worker.browser = None
+
+    if not worker.browser:
+        browser = SnapshotBrowser(worker.profile_dir, merge_options([]))
+        try:
+            browser.start()
+        except SnapshotBrowserError as error:
+            # Don't retry for every snapshot, the worker launches a browser per
+            # snapshot until the dispatcher restarts
+            logger.warning(
+                f"Failed to start persistent snapshot browser, launching a browser "
+                f"per snapshot instead: {error}"
+            )
+            worker.browser_failed = True
+            return None
+        worker.browser = browser
+    return worker.browser
+
+
+def _release_persistent_browser(worker, browser: SnapshotBrowser, recycle: bool):
+    browser.capture_count += 1
+    if recycle or browser.needs_recycling():
+        logger.info(
+            f"Recycling persistent snapshot browser. captures={browser.capture_count}"
+        )
+        browser.close()
+        worker.browser = None
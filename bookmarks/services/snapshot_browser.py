@@ -0,0 +1,182 @@
+import contextlib
+import logging
+import os
+import signal
+import subprocess
+import time
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# How long to wait for a browser to open its remote debugging endpoint
+STARTUP_TIMEOUT_SEC = 30
+HEALTH_CHECK_TIMEOUT_SEC = 5
+# Chromium writes the port of its remote debugging endpoint into this file of
+# its profile directory, when started with --remote-debugging-port=0
+DEVTOOLS_ACTIVE_PORT_FILE = "DevToolsActivePort"
+
+
+class SnapshotBrowserError(Exception):
+    pass
+
+
+def _get_browser_args(options: list[str]) -> list[str]:
+    """
+    Returns the browser arguments from the SingleFile options, which are used
+    for the persistent browser as well, except for the profile directory.
+    """
+    args = []
+    for option in options:
+        if not option.startswith("--browser-arg="):
+            continue
+        arg = option.removeprefix("--browser-arg=")
+        if arg.startswith(("--user-data-dir=", "--remote-debugging-")):
+            continue
+        args.append(arg)
+    if not any(arg.startswith("--headless") for arg in args):
+        args.append("--headless=new")
+    return args
+
+
+def _get_session_rss(session_id: int) -> int | None:
+    """
+    Returns the resident memory in bytes of all processes of a session, which
+    includes the renderer processes of a browser. Returns None if the memory
+    can not be determined on this system.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    rss = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The process name may contain spaces, fields follow after it
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # Fields after the name start with the state, the session id is the
+        # fourth, and the resident set size in pages the 22nd
+        if int(fields[3]) == session_id:
+            rss += int(fields[21]) * page_size
+    return rss
+
+
+class SnapshotBrowser:
+    """
+    A headless browser that keeps running between snapshots, which SingleFile
+    attaches to through the remote debugging endpoint instead of launching a
+    new browser for every snapshot. The browser is recycled after a number of
+    captures, or when its memory usage grows above a limit.
+    """
+
+    def __init__(self, profile_dir: str, options: list[str]):
+        self.profile_dir = profile_dir
+        # SingleFile options that the browser arguments are taken from
+        self.options = options
+        self.process: subprocess.Popen | None = None
+        self.debugging_url = ""
+        self.capture_count = 0
+
+    def start(self):
+        port_filepath = os.path.join(self.profile_dir, DEVTOOLS_ACTIVE_PORT_FILE)
+        if os.path.exists(port_filepath):
+            os.remove(port_filepath)
+
+        args = [
+            settings.LD_SNAPSHOT_BROWSER_PATH,
+            *_get_browser_args(self.options),
+            f"--user-data-dir={self.profile_dir}",
+            "--remote-debugging-address=127.0.0.1",
+            "--remote-debugging-port=0",
+        ]
+        try:
+            # Start in a new session, to stop all browser processes at once
+            self.process = subprocess.Popen(
+                args,
+                start_new_session=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as error:
+            raise SnapshotBrowserError(f"Failed to start browser: {error}") from None
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT_SEC
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.close()
+                raise SnapshotBrowserError("Browser exited during startup")
+            port = self._read_port(port_filepath)
+            if port:
+                self.debugging_url = f"http://127.0.0.1:{port}"
+                if self.is_healthy():
+                    logger.info(
+                        f"Started persistent snapshot browser. pid={self.process.pid} "
+                        f"url={self.debugging_url}"
+                    )
+                    return
+            time.sleep(0.1)
+
+        self.close()
+        raise SnapshotBrowserError("Timeout expired while starting browser")
+
+    def _read_port(self, port_filepath: str) -> int | None:
+        try:
+            with open(port_filepath) as f:
+                return int(f.readline().strip())
+        except (OSError, ValueError):
+            return None
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def is_healthy(self) -> bool:
+        if not self.is_running() or not self.debugging_url:
+            return False
+        try:
+            response = requests.get(
+                f"{self.debugging_url}/json/version",
+                timeout=HEALTH_CHECK_TIMEOUT_SEC,
+            )
+            return response.ok and "webSocketDebuggerUrl" in response.json()
+        except (requests.RequestException, ValueError):
+            return False
+
+    def get_rss(self) -> int | None:
+        if not self.is_running():
+            return None
+        return _get_session_rss(self.process.pid)
+
+    def needs_recycling(self) -> bool:
+        max_captures = settings.LD_SNAPSHOT_BROWSER_MAX_CAPTURES
+        if max_captures and self.capture_count >= max_captures:
+            return True
+        max_rss = settings.LD_SNAPSHOT_BROWSER_MAX_RSS_MB * 1024 * 1024
+        rss = self.get_rss() if max_rss else None
+        return rss is not None and rss > max_rss
+
+    def close(self):
+        if self.process is None:
+            return
+        # Renderer processes may outlive the main process, stop the session
+        self._kill(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._kill(signal.SIGKILL)
+            self.process.wait()
+        logger.info(
+            f"Stopped persistent snapshot browser. pid={self.process.pid} "
+            f"captures={self.capture_count}"
+        )
+        self.process = None
+        self.debugging_url = ""
+
+    def _kill(self, sig: int):
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(self.process.pid, sig)
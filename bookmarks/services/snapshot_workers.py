@@ -0,0 +1,183 @@
+import contextvars
+import logging
+import os
+import shlex
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from huey.contrib.djhuey import HUEY as huey
+
+from bookmarks.services.snapshot_browser import SnapshotBrowser
+
+# Status of the workers is stored in Huey's key-value storage, so that it can
+# be displayed by the web server, while the workers run in the task consumer
+STATUS_KEY = "html-snapshot-workers"
+
+STATE_IDLE = "idle"
+STATE_BUSY = "busy"
+
+logger = logging.getLogger(__name__)
+
+_current_worker = contextvars.ContextVar("snapshot_worker", default=None)
+
+USER_DATA_DIR_OPTION = "--browser-arg=--user-data-dir="
+
+
+@dataclass
+class SnapshotWorker:
+    id: int
+    directory: str
+    profile_dir: str
+    state: str = STATE_IDLE
+    url: str = ""
+    started_at: datetime | None = None
+    processed_count: int = 0
+    # Persistent browser of the worker, if enabled
+    browser: SnapshotBrowser | None = field(default=None, repr=False)
+    browser_failed: bool = False
+
+    @property
+    def temp_dir(self) -> str:
+        return os.path.join(self.directory, "tmp")
+
+    def get_status(self) -> dict:
+        browser = self.browser
+        return {
+            "id": self.id,
+            "state": self.state,
+            "url": self.url,
+            "started_at": self.started_at,
+            "processed_count": self.processed_count,
+            "browser_capture_count": browser.capture_count if browser else None,
+        }
+
+
+def get_current_worker() -> SnapshotWorker | None:
+    """Returns the worker that runs the snapshot in the current thread"""
+    return _current_worker.get()
+
+
+def get_status() -> dict | None:
+    return huey.get(STATUS_KEY, peek=True)
+
+
+def get_configured_profile_dir() -> str | None:
+    """
+    Returns the browser profile directory from the SingleFile options of the
+    settings, the global options taking precedence over the uBlock options.
+    """
+    for options in [
+        settings.LD_SINGLEFILE_OPTIONS,
+        settings.LD_SINGLEFILE_UBLOCK_OPTIONS,
+    ]:
+        for option in shlex.split(options):
+            if option.startswith(USER_DATA_DIR_OPTION):
+                return option.removeprefix(USER_DATA_DIR_OPTION)
+    return None
+
+
+class SnapshotWorkerPool:
+    """
+    Runs snapshots on a fixed number of workers in parallel. Every worker has
+    its own browser profile and temporary directory, as browsers can not share
+    a profile between processes. A single worker uses the configured profile,
+    with multiple workers every worker uses a profile next to it (e.g.
+    chromium-profile-2). Profiles are kept between runs, so that cookies and
+    logins remain available, only the temporary directories are removed when
+    the pool is closed. A pool with a single worker runs snapshots in the
+    calling thread.
+    """
+
+    def __init__(self, size: int):
+        self.directory = tempfile.mkdtemp(prefix="linkding-snapshot-workers-")
+        configured_profile_dir = get_configured_profile_dir()
+        self.workers = []
+        for worker_id in range(1, size + 1):
+            directory = os.path.join(self.directory, f"worker-{worker_id}")
+            if not configured_profile_dir:
+                profile_dir = os.path.join(directory, "chromium-profile")
+            elif size == 1:
+                profile_dir = configured_profile_dir
+            else:
+                profile_dir = f"{configured_profile_dir.rstrip('/')}-{worker_id}"
+            worker = SnapshotWorker(
+                id=worker_id, directory=directory, profile_dir=profile_dir
+            )
+            # The configured profile is left as it is, the browser creates it
+            # if it doesn't exist
+            if profile_dir != configured_profile_dir:
+                os.makedirs(worker.profile_dir, exist_ok=True)
+            os.makedirs(worker.temp_dir)
+            self.workers.append(worker)
+
+        self._lock = threading.Lock()
+        self._executor = None
+        if size > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=size, thread_name_prefix="snapshot-worker"
+            )
+        self._publish_status(active=True)
+
+    def submit(self, worker: SnapshotWorker, url: str, func: Callable, *args) -> Future:
+        with self._lock:
+            worker.state = STATE_BUSY
+            worker.url = url
+            worker.started_at = timezone.now()
+            self._publish_status(active=True)
+
+        if self._executor is not None:
+            return self._executor.submit(self._run, worker, func, *args)
+
+        future = Future()
+        try:
+            future.set_result(self._run(worker, func, *args))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def _run(self, worker: SnapshotWorker, func: Callable, *args):
+        token = _current_worker.set(worker)
+        try:
+            return func(*args)
+        finally:
+            _current_worker.reset(token)
+            if self._executor is not None:
+                # Threads of the pool open their own database connection
+                connection.close()
+            with self._lock:
+                worker.state = STATE_IDLE
+                worker.url = ""
+                worker.started_at = None
+                worker.processed_count += 1
+                self._publish_status(active=True)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        for worker in self.workers:
+            if worker.browser:
+                worker.browser.close()
+                worker.browser = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._publish_status(active=False)
+
+    def _publish_status(self, active: bool):
+        try:
+            huey.put(
+                STATUS_KEY,
+                {
+                    "active": active,
+                    "updated_at": timezone.now(),
+                    "workers": [worker.get_status() for worker in self.workers],
+                },
+            )
+        except Exception as error:
+            logger.warning("Failed to store snapshot worker status", exc_info=error)
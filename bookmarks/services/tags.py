@@ -2,6 +2,7 @@ import logging
 import operator
 
 from django.contrib.auth.models import User
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 from bookmarks.models import Tag
@@ -15,6 +16,36 @@ def get_or_create_tags(tag_names: list[str], user: User):
     return unique(tags, operator.attrgetter("id"))
 
 
+def get_or_create_tags_bulk(tag_names: list[str], user: User) -> dict[str, Tag]:
+    """
+    Bulk version of `get_or_create_tags`, which loads existing tags with a
+    single query and inserts missing tags at once. Returns a dict that maps the
+    lower case tag names to their tags.
+    """
+    lower_tag_names = {tag_name.lower() for tag_name in tag_names}
+    existing_tags = (
+        Tag.objects.annotate(name_lower=Lower("name"))
+        .filter(owner=user, name_lower__in=lower_tag_names)
+        .order_by("id")
+    )
+
+    tags = {}
+    for tag in existing_tags:
+        # Legacy databases might contain duplicate tags with different
+        # capitalization, use the first one
+        tags.setdefault(tag.name.lower(), tag)
+
+    tags_to_create = []
+    for tag_name in tag_names:
+        if tag_name.lower() not in tags:
+            tag = Tag(name=tag_name, owner=user, date_added=timezone.now())
+            tags_to_create.append(tag)
+            tags[tag_name.lower()] = tag
+    Tag.objects.bulk_create(tags_to_create)
+
+    return tags
+
+
 def get_or_create_tag(name: str, user: User):
     try:
         return Tag.objects.get(name__iexact=name, owner=user)
@@ -4,6 +4,8 @@ import os
 import random
 import time
 from collections.abc import Callable
+from concurrent import futures
+from concurrent.futures import Future
 from datetime import timedelta
 
 import waybackpy
@@ -16,10 +18,18 @@ from huey.contrib.djhuey import HUEY as huey
 from huey.exceptions import TaskLockedException
 from waybackpy.exceptions import TooManyRequestsError, WaybackError
 
-from bookmarks.models import Bookmark, BookmarkAsset, UserProfile
-from bookmarks.services import assets, favicon_loader, preview_image_loader
+from bookmarks.models import Bookmark, BookmarkAsset, ReaderArticle, UserProfile
+from bookmarks.services import (
+    assets,
+    changes,
+    favicon_loader,
+    file_cleanup,
+    preview_image_loader,
+    reader,
+    snapshot_workers,
+    transactions,
+)
 from bookmarks.services.website_loader import load_website_metadata
-from bookmarks.utils import get_registrable_domain
 
 logger = logging.getLogger(__name__)
 HTML_SNAPSHOT_DISPATCHER_LOCK = huey.lock_task("html-snapshot-dispatcher-lock")
@@ -144,15 +154,19 @@ def update_bookmark_favicon(bookmark: Bookmark, new_favicon_file: str):
 
 
 def load_favicon(user: User, bookmark: Bookmark):
-    if is_favicon_feature_active(user):
-        cached_favicon = favicon_loader.get_cached_favicon(bookmark.url)
-        if cached_favicon:
-            update_bookmark_favicon(bookmark, cached_favicon.filename)
-            if not cached_favicon.is_stale:
-                return
+    if is_favicon_feature_active(user) and not _load_cached_favicon(bookmark):
         _load_favicon_task(bookmark.id)
 
 
+def _load_cached_favicon(bookmark: Bookmark) -> bool:
+    # Returns whether the bookmark has an up-to-date favicon from the cache
+    cached_favicon = favicon_loader.get_cached_favicon(bookmark.url)
+    if cached_favicon:
+        update_bookmark_favicon(bookmark, cached_favicon.filename)
+        return not cached_favicon.is_stale
+    return False
+
+
 def refresh_favicon(user: User, bookmark: Bookmark):
     if is_favicon_feature_active(user):
         _load_favicon_task(bookmark.id)
@@ -258,6 +272,70 @@ def _schedule_bookmarks_without_previews_task(user_id: int):
             logging.exception(exc)
 
 
+def enrich_bookmarks(
+    user: User,
+    bookmark_ids: list[int],
+    web_archive_bookmark_ids: list[int] | None = None,
+    metadata_bookmark_ids: list[int] | None = None,
+):
+    """
+    Schedules a single task that loads favicons and preview images for a batch
+    of bookmarks, and optionally creates web archive snapshots and loads
+    website metadata for some of them. This avoids enqueueing several tasks per
+    bookmark when creating many bookmarks at once.
+    """
+    if settings.LD_DISABLE_BACKGROUND_TASKS or not bookmark_ids:
+        return
+
+    _enrich_bookmarks_task(
+        user.id,
+        bookmark_ids,
+        web_archive_bookmark_ids or [],
+        metadata_bookmark_ids or [],
+    )
+
+
+@task(retries=0, retry_delay=0)
+def _enrich_bookmarks_task(
+    user_id: int,
+    bookmark_ids: list[int],
+    web_archive_bookmark_ids: list[int],
+    metadata_bookmark_ids: list[int],
+):
+    try:
+        user = User.objects.select_related("profile").get(id=user_id)
+    except User.DoesNotExist:
+        return
+
+    favicons_active = is_favicon_feature_active(user)
+    previews_active = is_preview_feature_active(user)
+    web_archive_active = is_web_archive_integration_active(user)
+
+    for bookmark in Bookmark.objects.filter(id__in=bookmark_ids):
+        # Load metadata first, preview images use the scraped preview image URL
+        if bookmark.id in metadata_bookmark_ids:
+            _run_enrichment_task(_enrich_metadata_task, bookmark.id)
+        if favicons_active and not _load_cached_favicon(bookmark):
+            _run_enrichment_task(_load_favicon_task, bookmark.id)
+        if previews_active:
+            _run_enrichment_task(_load_preview_image_task, bookmark.id)
+        if web_archive_active and bookmark.id in web_archive_bookmark_ids:
+            _run_enrichment_task(_create_web_archive_snapshot_task, bookmark.id, False)
+
+
+def _run_enrichment_task(enrichment_task, bookmark_id: int, *args):
+    try:
+        enrichment_task.call_local(bookmark_id, *args)
+    except Exception as error:
+        # Fall back to the individual task, which retries on its own
+        logger.warning(
+            f"Failed to enrich bookmark, scheduling retry. "
+            f"bookmark_id={bookmark_id} task={enrichment_task.name}",
+            exc_info=error,
+        )
+        enrichment_task(bookmark_id, *args)
+
+
 def refresh_metadata(bookmark: Bookmark):
     if not settings.LD_DISABLE_BACKGROUND_TASKS:
         _refresh_metadata_task(bookmark.id)
@@ -319,7 +397,7 @@ def _enrich_metadata_task(
     if update_fields:
         bookmark.date_modified = timezone.now()
         update_fields.append("date_modified")
-        bookmark.save(update_fields=update_fields)
+        transactions.atomic_write(bookmark.save, update_fields=update_fields)
         logger.info(f"Successfully enriched metadata for bookmark. url={bookmark.url}")
 
 
@@ -349,7 +427,7 @@ def _refresh_metadata_task(bookmark_id: int):
         update_fields.append("url")
     bookmark.date_modified = timezone.now()
 
-    bookmark.save(update_fields=update_fields)
+    transactions.atomic_write(bookmark.save, update_fields=update_fields)
     logger.info(f"Successfully refreshed metadata for bookmark. url={bookmark.url}")
 
     # 若url变动，则按需更新html快照
@@ -363,6 +441,32 @@ def _refresh_metadata_task(bookmark_id: int):
         create_html_snapshot(bookmark)
 
 
+def load_reader_article(bookmark: Bookmark) -> ReaderArticle:
+    article = reader.queue_article(bookmark)
+    if settings.LD_DISABLE_BACKGROUND_TASKS:
+        # Without a task consumer the page has to be loaded in the request
+        reader.load_article(article)
+    else:
+        _load_reader_article_task(bookmark.id)
+    # The task might have completed already
+    article.refresh_from_db()
+    return article
+
+
+@task(retries=0, retry_delay=0)
+def _load_reader_article_task(bookmark_id: int):
+    article = (
+        ReaderArticle.objects.select_related("bookmark")
+        .filter(bookmark_id=bookmark_id, status=ReaderArticle.STATUS_PENDING)
+        .first()
+    )
+    if not article:
+        return
+
+    logger.info(f"Load page for reader mode. url={article.url}")
+    reader.load_article(article)
+
+
 def is_html_snapshot_feature_active() -> bool:
     return settings.LD_ENABLE_SNAPSHOTS and not settings.LD_DISABLE_BACKGROUND_TASKS
 
@@ -387,25 +491,41 @@ def _get_html_snapshot_dispatcher_tick_seconds() -> int:
     return max(settings.LD_SNAPSHOT_DISPATCHER_TICK_SEC, 1)
 
 
-def _select_next_html_snapshot_asset(now, next_eligible_at: dict[str, object]):
-    pending_assets = (
-        BookmarkAsset.objects.filter(
-            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
-            status=BookmarkAsset.STATUS_PENDING,
-        )
+def _select_next_html_snapshot_asset(
+    now,
+    next_eligible_at: dict[str, object],
+    busy_domains: set[str] | None = None,
+    skip_asset_ids: set[int] | None = None,
+):
+    pending_assets = BookmarkAsset.objects.filter(
+        asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+        status=BookmarkAsset.STATUS_PENDING,
+    )
+    cooling_domains = {
+        domain for domain, eligible_at in next_eligible_at.items() if eligible_at > now
+    }
+    excluded_domains = cooling_domains | (busy_domains or set())
+
+    # Skipped assets have been dispatched before, which usually means they
+    # are not pending anymore, so this rarely reads more than one row
+    eligible_assets = (
+        pending_assets.exclude(domain__in=excluded_domains)
         .select_related("bookmark")
         .order_by("-date_created", "-id")
     )
+    for asset in eligible_assets.iterator(chunk_size=100):
+        if skip_asset_ids and asset.id in skip_asset_ids:
+            continue
+        return asset, None
 
-    next_wake_at = None
-    for asset in pending_assets:
-        domain = get_registrable_domain(asset.bookmark.url)
-        eligible_at = next_eligible_at.get(domain)
-        if eligible_at is None or eligible_at <= now:
-            return asset, None
-        if next_wake_at is None or eligible_at < next_wake_at:
-            next_wake_at = eligible_at
-
+    waiting_domains = (
+        pending_assets.filter(domain__in=cooling_domains)
+        .values_list("domain", flat=True)
+        .distinct()
+    )
+    next_wake_at = min(
+        (next_eligible_at[domain] for domain in waiting_domains), default=None
+    )
     return None, next_wake_at
 
 
@@ -420,28 +540,84 @@ def _run_html_snapshot_dispatcher_loop(
     now_func: Callable[[], object] | None = None,
     sleep_func: Callable[[float], None] | None = None,
     cooldown_func: Callable[[], int] | None = None,
+):
+    pool = snapshot_workers.SnapshotWorkerPool(max(settings.LD_SNAPSHOT_WORKERS, 1))
+    try:
+        _dispatch_html_snapshots(pool, now_func, sleep_func, cooldown_func)
+    finally:
+        pool.close()
+
+
+def _dispatch_html_snapshots(
+    pool: snapshot_workers.SnapshotWorkerPool,
+    now_func: Callable[[], object] | None = None,
+    sleep_func: Callable[[float], None] | None = None,
+    cooldown_func: Callable[[], int] | None = None,
 ):
     now_func = now_func or timezone.now
     sleep_func = sleep_func or time.sleep
     cooldown_func = cooldown_func or _get_html_snapshot_cooldown_seconds
     next_eligible_at: dict[str, object] = {}
+    # Snapshots that are currently running, with their worker and domain
+    running: dict[Future, tuple[snapshot_workers.SnapshotWorker, str]] = {}
+    # Every asset is only dispatched once per run, even if it is still
+    # pending afterward
+    dispatched_asset_ids: set[int] = set()
 
     while True:
+        # The cooldown of a domain starts when its snapshot is finished, so
+        # that the workers never access a domain at the same time
+        for future in [future for future in running if future.done()]:
+            _, domain = running.pop(future)
+            if future.exception() is not None:
+                logger.error(
+                    "Failed to run HTML snapshot worker.", exc_info=future.exception()
+                )
+            next_eligible_at[domain] = now_func() + timedelta(seconds=cooldown_func())
+
         now = now_func()
-        asset, next_wake_at = _select_next_html_snapshot_asset(now, next_eligible_at)
-        if asset is None:
-            if next_wake_at is None:
-                return
-            sleep_seconds = _get_html_snapshot_dispatcher_sleep_seconds(
-                now, next_wake_at
+        for domain in [
+            domain
+            for domain, eligible_at in next_eligible_at.items()
+            if eligible_at <= now
+        ]:
+            del next_eligible_at[domain]
+        busy_workers = [worker for worker, _ in running.values()]
+        idle_worker = next(
+            (worker for worker in pool.workers if worker not in busy_workers), None
+        )
+        asset = next_wake_at = None
+        if idle_worker is not None:
+            asset, next_wake_at = _select_next_html_snapshot_asset(
+                now,
+                next_eligible_at,
+                {domain for _, domain in running.values()},
+                dispatched_asset_ids,
+            )
+        if asset is not None:
+            domain = asset.domain
+            dispatched_asset_ids.add(asset.id)
+            future = pool.submit(
+                idle_worker, asset.bookmark.url, _create_html_snapshot_task, asset.id
+            )
+            running[future] = (idle_worker, domain)
+            continue
+
+        if running:
+            # Wait for a worker to finish, while checking for domains that
+            # have cooled down in the meantime
+            futures.wait(
+                running,
+                timeout=_get_html_snapshot_dispatcher_tick_seconds(),
+                return_when=futures.FIRST_COMPLETED,
             )
-            if sleep_seconds > 0:
-                sleep_func(sleep_seconds)
             continue
 
-        domain = get_registrable_domain(asset.bookmark.url)
-        _create_html_snapshot_task(asset.id)
-        next_eligible_at[domain] = now_func() + timedelta(seconds=cooldown_func())
+        if next_wake_at is None:
+            return
+        sleep_seconds = _get_html_snapshot_dispatcher_sleep_seconds(now, next_wake_at)
+        if sleep_seconds > 0:
+            sleep_func(sleep_seconds)
 
 
 @task(retries=0, retry_delay=0)
@@ -478,9 +654,10 @@ def create_html_snapshots(bookmark_list: list[Bookmark]):
     _kick_html_snapshot_dispatcher()
 
 
-# SingleFile does not support running multiple snapshot captures in parallel.
-# Keep a periodic fallback that can re-kick the dispatcher if pending work was
-# missed due to an interrupted worker or process restart.
+# Snapshots are only created by the dispatcher, which runs them on a pool of
+# LD_SNAPSHOT_WORKERS workers. Keep a periodic fallback that can re-kick the
+# dispatcher if pending work was missed due to an interrupted worker or process
+# restart.
 @huey.periodic_task(crontab(minute="*"))
 def _schedule_html_snapshots_task():
     if BookmarkAsset.objects.filter(
@@ -529,3 +706,36 @@ def create_missing_html_snapshots(user: User) -> int:
     create_html_snapshots(list(bookmarks_without_snapshots))
 
     return bookmarks_without_snapshots.count()
+
+
+def delete_files(filepaths: list[str]):
+    if not filepaths:
+        return
+
+    # Without a task consumer, clean up right away to not leave orphaned files
+    if settings.LD_DISABLE_BACKGROUND_TASKS:
+        file_cleanup.delete_files(filepaths)
+        return
+
+    _delete_files_task(filepaths)
+
+
+@task(retries=3)
+def _delete_files_task(filepaths: list[str]):
+    deleted_count = file_cleanup.delete_files(filepaths)
+    logger.info(f"Deleted files of removed bookmarks. count={deleted_count}")
+
+
+@huey.periodic_task(crontab(hour="4", minute="0"))
+def _sweep_orphaned_files_task():
+    file_cleanup.sweep_orphaned_files()
+
+
+@huey.periodic_task(crontab(hour="4", minute="15"))
+def _update_asset_storage_task():
+    assets.update_asset_storage()
+
+
+@huey.periodic_task(crontab(hour="4", minute="30"))
+def _compact_bookmark_changes_task():
+    changes.compact_changes()
@@ -0,0 +1,117 @@
+import functools
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Log writes that had to wait this long for the database lock
+SLOW_LOCK_WAIT_SEC = 1.0
+
+
+@dataclass
+class LockMetrics:
+    transactions: int = 0
+    retries: int = 0
+    failures: int = 0
+    wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+
+_metrics = LockMetrics()
+_metrics_lock = threading.Lock()
+
+
+def get_lock_metrics() -> dict:
+    with _metrics_lock:
+        return asdict(_metrics)
+
+
+def reset_lock_metrics():
+    global _metrics
+    with _metrics_lock:
+        _metrics = LockMetrics()
+
+
+def _record(wait_time: float, retries: int, failed: bool):
+    with _metrics_lock:
+        _metrics.transactions += 1
+        _metrics.retries += retries
+        _metrics.failures += 1 if failed else 0
+        _metrics.wait_time += wait_time
+        _metrics.max_wait_time = max(_metrics.max_wait_time, wait_time)
+
+
+def is_database_locked_error(error: Exception) -> bool:
+    if not isinstance(error, OperationalError):
+        return False
+    message = str(error).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def atomic_write(fn: Callable, *args, **kwargs):
+    """
+    Runs a function in a write transaction. SQLite connections start
+    transactions with BEGIN IMMEDIATE (see the `transaction_mode` database
+    option), so a lock error is raised before any statement has run and the
+    transaction can be retried safely. Retries use exponential backoff with
+    full jitter, so concurrent writers don't retry in lockstep.
+    """
+    if connection.in_atomic_block:
+        # An outer transaction already holds the lock, or has to be retried as
+        # a whole, so only create a savepoint
+        with transaction.atomic():
+            return fn(*args, **kwargs)
+
+    max_retries = settings.LD_DB_LOCK_RETRIES
+    retry_delay = settings.LD_DB_LOCK_RETRY_DELAY
+    retries = 0
+    wait_time = 0.0
+
+    while True:
+        attempt_start = time.monotonic()
+        try:
+            with transaction.atomic():
+                wait_time += time.monotonic() - attempt_start
+                attempt_start = None
+                result = fn(*args, **kwargs)
+            break
+        except OperationalError as error:
+            if attempt_start is not None:
+                wait_time += time.monotonic() - attempt_start
+            if not is_database_locked_error(error) or retries >= max_retries:
+                _record(wait_time, retries, failed=True)
+                if is_database_locked_error(error):
+                    logger.error(
+                        f"Database still locked after {retries} retries. "
+                        f"function={fn.__qualname__} wait_time={wait_time:.3f}s"
+                    )
+                raise
+            delay = random.uniform(0, retry_delay * 2**retries)
+            retries += 1
+            time.sleep(delay)
+            wait_time += delay
+
+    _record(wait_time, retries, failed=False)
+    if retries or wait_time >= SLOW_LOCK_WAIT_SEC:
+        logger.warning(
+            f"Waited for database lock. function={fn.__qualname__} "
+            f"retries={retries} wait_time={wait_time:.3f}s"
+        )
+    return result
+
+
+def write_transaction(fn: Callable):
+    """Decorator that runs a function through `atomic_write`."""
+
+    @functools.wraps(fn)
+    def inner(*args, **kwargs):
+        return atomic_write(fn, *args, **kwargs)
+
+    return inner
@@ -145,6 +145,10 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 100,
 }
 
+# Days for which deleted bookmarks are kept in the changes log for API sync
+# clients, 0 keeps them forever
+LD_CHANGES_RETENTION_DAYS = int(os.getenv("LD_CHANGES_RETENTION_DAYS", 90))
+
 # URL validation flag
 LD_DISABLE_URL_VALIDATION = os.getenv("LD_DISABLE_URL_VALIDATION", False) in (
     True,
@@ -259,35 +263,102 @@ LD_DB_USER = os.getenv("LD_DB_USER", "linkding")
 LD_DB_PASSWORD = os.getenv("LD_DB_PASSWORD", None)
 LD_DB_PORT = os.getenv("LD_DB_PORT", None)
 LD_DB_OPTIONS = json.loads(os.getenv("LD_DB_OPTIONS") or "{}")
+LD_DB_POOL = os.getenv("LD_DB_POOL", False) in (True, "True", "true", "1")
+LD_DB_POOL_MIN_SIZE = int(os.getenv("LD_DB_POOL_MIN_SIZE", 2))
+LD_DB_POOL_MAX_SIZE = int(os.getenv("LD_DB_POOL_MAX_SIZE", 10))
+LD_DB_POOL_TIMEOUT = int(os.getenv("LD_DB_POOL_TIMEOUT", 30))
+LD_DB_CONN_MAX_AGE = int(os.getenv("LD_DB_CONN_MAX_AGE", 60))
+LD_DB_REPLICA_HOST = os.getenv("LD_DB_REPLICA_HOST", "")
+LD_DB_REPLICA_PORT = os.getenv("LD_DB_REPLICA_PORT", LD_DB_PORT)
+LD_DB_REPLICA_STICKY_SECONDS = int(os.getenv("LD_DB_REPLICA_STICKY_SECONDS", 10))
 
 if LD_DB_ENGINE == "postgres":
     default_database = {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "django.db.backends.postgresql",
         "NAME": LD_DB_DATABASE,
         "USER": LD_DB_USER,
         "PASSWORD": LD_DB_PASSWORD,
         "HOST": LD_DB_HOST,
         "PORT": LD_DB_PORT,
         "OPTIONS": LD_DB_OPTIONS,
+        "CONN_HEALTH_CHECKS": True,
     }
+    if LD_DB_POOL:
+        # Connections are returned to the psycopg pool at the end of each
+        # request, which does not work together with persistent connections
+        default_database["OPTIONS"] = {
+            "pool": {
+                "min_size": LD_DB_POOL_MIN_SIZE,
+                "max_size": LD_DB_POOL_MAX_SIZE,
+                "timeout": LD_DB_POOL_TIMEOUT,
+            },
+            **LD_DB_OPTIONS,
+        }
+        default_database["CONN_MAX_AGE"] = 0
+    else:
+        default_database["CONN_MAX_AGE"] = LD_DB_CONN_MAX_AGE
 else:
     default_database = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "data", "db.sqlite3"),
-        "OPTIONS": LD_DB_OPTIONS,
+        # Acquire the write lock when a transaction starts, instead of failing
+        # with "database is locked" when a read transaction is upgraded to a
+        # write transaction while another connection is writing
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", **LD_DB_OPTIONS},
         # Creating a connection loads the ICU extension into the SQLite
-        # connection, and also loads an ICU collation. The latter causes a
-        # memory leak, so try to counter that by making connections indefinitely
-        # persistent.
+        # connection, keep connections indefinitely persistent to avoid doing
+        # that for every request.
         "CONN_MAX_AGE": None,
     }
 
 DATABASES = {"default": default_database}
 
+# Optional read replica for the heavy read paths, such as bookmark lists, feeds
+# and exports, see bookmarks/db_routers.py
+if LD_DB_ENGINE == "postgres" and LD_DB_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **default_database,
+        "HOST": LD_DB_REPLICA_HOST,
+        "PORT": LD_DB_REPLICA_PORT,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_ROUTERS = ["bookmarks.db_routers.ReadReplicaRouter"]
+    MIDDLEWARE.append("bookmarks.middlewares.ReadReplicaMiddleware")
+USE_READ_REPLICA = "replica" in DATABASES
+
 SQLITE_ICU_EXTENSION_PATH = "./libicu.so"
 USE_SQLITE = default_database["ENGINE"] == "django.db.backends.sqlite3"
 USE_SQLITE_ICU_EXTENSION = USE_SQLITE and os.path.exists(SQLITE_ICU_EXTENSION_PATH)
 
+# Pragmas applied to every new SQLite connection, an empty value keeps the
+# SQLite default. `synchronous` is only applied when the database uses WAL
+# journal mode, where NORMAL is still safe against corruption.
+LD_SQLITE_PRAGMAS = {
+    "synchronous": os.getenv("LD_SQLITE_SYNCHRONOUS", "NORMAL"),
+    # 256 MiB
+    "mmap_size": os.getenv("LD_SQLITE_MMAP_SIZE", "268435456"),
+    # Negative values are in KiB, 64 MiB
+    "cache_size": os.getenv("LD_SQLITE_CACHE_SIZE", "-65536"),
+    "temp_store": os.getenv("LD_SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": os.getenv("LD_SQLITE_BUSY_TIMEOUT", "5000"),
+}
+# Interval in seconds in which long-lived connections run `PRAGMA optimize`,
+# 0 disables it
+LD_SQLITE_OPTIMIZE_INTERVAL = int(os.getenv("LD_SQLITE_OPTIMIZE_INTERVAL", 3600))
+# Number of retries and base delay in seconds for write transactions that fail
+# because another connection holds the database lock
+LD_DB_LOCK_RETRIES = int(os.getenv("LD_DB_LOCK_RETRIES", 5))
+LD_DB_LOCK_RETRY_DELAY = float(os.getenv("LD_DB_LOCK_RETRY_DELAY", 0.05))
+
+# Seconds for which the global settings are cached in process memory
+GLOBAL_SETTINGS_CACHE_TIMEOUT = 60
+
+# Seconds for which API tokens and their users are cached in process memory
+API_TOKEN_CACHE_TIMEOUT = 30
+
+# Seconds for which rendered feeds are cached in process memory
+FEED_CACHE_TIMEOUT = 300
+
 # Favicons
 LD_DEFAULT_FAVICON_PROVIDER = "https://t1.gstatic.com/faviconV2?client=SOCIAL&type=FAVICON&fallback_opts=TYPE,SIZE,URL&url={url}&size=32"
 LD_DEFAULT_FAVICON_PROVIDER_CN = "https://favicon.im/{domain}?large=true"
@@ -316,6 +387,8 @@ LD_CUSTOM_WEBSITE_LOADER_SETTINGS = os.getenv(
 LD_CUSTOM_SNAPSHOT_PROCESSOR_SETTINGS = os.getenv(
     "LD_CUSTOM_SNAPSHOT_PROCESSOR_SETTINGS", "data/snapshot_processor/settings.json"
 )
+# How long reader mode articles are cached, before they are extracted again
+LD_READER_CACHE_TTL_SEC = int(os.getenv("LD_READER_CACHE_TTL_SEC", 86400))
 
 # Asset / snapshot settings
 LD_ASSET_FOLDER = os.path.join(BASE_DIR, "data", "assets")
@@ -346,6 +419,9 @@ LD_SINGLEFILE_UBLOCK_OPTIONS = os.getenv(
 LD_SINGLEFILE_OPTIONS = os.getenv("LD_SINGLEFILE_OPTIONS", "")
 LD_SINGLEFILE_TIMEOUT_SEC = float(os.getenv("LD_SINGLEFILE_TIMEOUT_SEC", 120))
 LD_SNAPSHOT_PDF_MAX_SIZE = int(os.getenv("LD_SNAPSHOT_PDF_MAX_SIZE", 15728640))
+# Codec for compressing HTML snapshots, either gzip or zstd. zstd requires the
+# zstandard package
+LD_SNAPSHOT_COMPRESSION = os.getenv("LD_SNAPSHOT_COMPRESSION", "gzip").lower()
 LD_SNAPSHOT_DOMAIN_COOLDOWN_MIN_SEC = int(
     os.getenv("LD_SNAPSHOT_DOMAIN_COOLDOWN_MIN_SEC", 5)
 )
@@ -353,6 +429,22 @@ LD_SNAPSHOT_DOMAIN_COOLDOWN_MAX_SEC = int(
     os.getenv("LD_SNAPSHOT_DOMAIN_COOLDOWN_MAX_SEC", 10)
 )
 LD_SNAPSHOT_DISPATCHER_TICK_SEC = int(os.getenv("LD_SNAPSHOT_DISPATCHER_TICK_SEC", 1))
+# Number of HTML snapshots that are created in parallel. Every worker runs its
+# own browser, the domain cooldown applies across all workers
+LD_SNAPSHOT_WORKERS = int(os.getenv("LD_SNAPSHOT_WORKERS", 1))
+# Keep a headless browser running for each snapshot worker, which SingleFile
+# attaches to instead of launching a browser for every snapshot
+LD_SNAPSHOT_PERSISTENT_BROWSER = os.getenv("LD_SNAPSHOT_PERSISTENT_BROWSER", False) in (
+    True,
+    "True",
+    "true",
+    "1",
+)
+LD_SNAPSHOT_BROWSER_PATH = os.getenv("LD_SNAPSHOT_BROWSER_PATH", "chromium")
+LD_SNAPSHOT_BROWSER_MAX_CAPTURES = int(
+    os.getenv("LD_SNAPSHOT_BROWSER_MAX_CAPTURES", 100)
+)
+LD_SNAPSHOT_BROWSER_MAX_RSS_MB = int(os.getenv("LD_SNAPSHOT_BROWSER_MAX_RSS_MB", 1024))
 
 # Monolith isn't used at the moment, as the local snapshot implementation
 # switched to single-file after the prototype. Keeping this around in case
@@ -23,6 +23,12 @@ HUEY = {
     "immediate": True,
 }
 
+# Test cases roll back database changes, which would leave stale global
+# settings in the cache
+GLOBAL_SETTINGS_CACHE_TIMEOUT = 0
+API_TOKEN_CACHE_TIMEOUT = 0
+FEED_CACHE_TIMEOUT = 0
+
 # Disable background tasks
 LD_DISABLE_BACKGROUND_TASKS = False
 
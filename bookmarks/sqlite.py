@@ -0,0 +1,86 @@
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Pragma values are interpolated into the statement, only allow plain numbers
+# and keywords
+_PRAGMA_VALUE_RE = re.compile(r"^-?\w+$")
+
+_logged_sqlite_pragmas = False
+
+
+@receiver(connection_created)
+def configure_sqlite(connection=None, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+
+        for name, value in settings.LD_SQLITE_PRAGMAS.items():
+            value = str(value).strip()
+            if not value:
+                continue
+            if not _PRAGMA_VALUE_RE.match(value):
+                logger.warning(f"Ignoring invalid SQLite pragma value: {name}={value}")
+                continue
+            if name == "synchronous" and journal_mode != "wal":
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+
+        if settings.LD_SQLITE_OPTIMIZE_INTERVAL > 0:
+            # Only analyze tables that had significant changes, with a limit on
+            # the number of rows to scan, recommended for long-lived connections
+            cursor.execute("PRAGMA optimize=0x10002")
+            connection.ld_last_optimize = time.monotonic()
+
+    global _logged_sqlite_pragmas
+    if not _logged_sqlite_pragmas:
+        _logged_sqlite_pragmas = True
+        logger.info(f"SQLite pragmas: {get_sqlite_pragmas(connection)}")
+
+
+@receiver(request_finished)
+def optimize_sqlite(**kwargs):
+    # Connections are kept open indefinitely, so periodically refresh the query
+    # planner statistics once a request has been handled
+    interval = settings.LD_SQLITE_OPTIMIZE_INTERVAL
+    connection = connections["default"]
+    if (
+        interval <= 0
+        or connection.vendor != "sqlite"
+        or connection.connection is None
+        or connection.in_atomic_block
+    ):
+        return
+
+    last_optimize = getattr(connection, "ld_last_optimize", None)
+    if last_optimize is not None and time.monotonic() - last_optimize < interval:
+        return
+
+    connection.ld_last_optimize = time.monotonic()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA optimize")
+    except Exception as e:
+        logger.warning("Failed to optimize SQLite database", exc_info=e)
+
+
+def get_sqlite_pragmas(connection) -> dict:
+    names = ["journal_mode", *settings.LD_SQLITE_PRAGMAS.keys()]
+    pragmas = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            pragmas[name] = row[0] if row else None
+    return pragmas
@@ -2,6 +2,7 @@ import gzip
 import logging
 import os
 import random
+import shlex
 import shutil
 import tempfile
 from datetime import datetime
@@ -23,6 +24,7 @@ from bookmarks.models import (
     Tag,
     User,
 )
+from bookmarks.utils import get_registrable_domain
 
 
 class BookmarkFactoryMixin:
@@ -217,9 +219,12 @@ class BookmarkFactoryMixin:
         display_name: str = None,
         status: str = BookmarkAsset.STATUS_COMPLETE,
         gzip: bool = False,
+        domain: str = None,
     ):
         if date_created is None:
             date_created = timezone.now()
+        if domain is None:
+            domain = get_registrable_domain(bookmark.url)
         if not file:
             file = get_random_string(length=32)
         if not display_name:
@@ -234,6 +239,7 @@ class BookmarkFactoryMixin:
             display_name=display_name,
             status=status,
             gzip=gzip,
+            domain=domain,
         )
         asset.save()
         return asset
@@ -567,3 +573,18 @@ def disable_logging(f):
 def collapse_whitespace(text: str):
     text = text.replace("\n", "").replace("\r", "")
     return " ".join(text.split())
+
+
+def override_browser_profile(profile_dir: str):
+    """
+    Returns a settings override that replaces the browser profile of the
+    SingleFile options, so that tests don't create profiles in the working
+    directory.
+    """
+    options = [
+        f"--browser-arg=--user-data-dir={profile_dir}"
+        if option.startswith("--browser-arg=--user-data-dir=")
+        else option
+        for option in shlex.split(settings.LD_SINGLEFILE_UBLOCK_OPTIONS)
+    ]
+    return override_settings(LD_SINGLEFILE_UBLOCK_OPTIONS=shlex.join(options))
@@ -1,10 +1,12 @@
 import datetime
 import gzip
+import io
 import os
 from datetime import timedelta
 from unittest import mock
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
@@ -58,6 +60,7 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
         self.assertEqual(asset.content_type, "")
         self.assertEqual(asset.display_name, "New snapshot")
         self.assertEqual(asset.status, BookmarkAsset.STATUS_PENDING)
+        self.assertEqual(asset.domain, "example.com")
 
         # asset is not saved to the database
         self.assertIsNone(asset.id)
@@ -183,22 +186,23 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
             mock_get.return_value = self.create_mock_pdf_response()
             assets.create_snapshot(asset)
 
-        expected_filename = (
-            "snapshot_2023-08-11_214511_https___example.com_doc.pdf.pdf.gz"
-        )
+        expected_filename = "snapshot_2023-08-11_214511_https___example.com_doc.pdf.pdf"
         expected_filepath = os.path.join(self.assets_dir, expected_filename)
 
         self.assertTrue(os.path.exists(expected_filepath))
 
-        with gzip.open(expected_filepath, "rb") as gz_file:
-            self.assertEqual(gz_file.read(), self.pdf_content)
+        # PDFs are stored uncompressed for range requests
+        with open(expected_filepath, "rb") as pdf_file:
+            self.assertEqual(pdf_file.read(), self.pdf_content)
 
         asset.refresh_from_db()
         self.assertEqual(asset.status, BookmarkAsset.STATUS_COMPLETE)
         self.assertEqual(asset.file, expected_filename)
         self.assertEqual(asset.content_type, BookmarkAsset.CONTENT_TYPE_PDF)
         self.assertIn("PDF download from", asset.display_name)
-        self.assertTrue(asset.gzip)
+        self.assertFalse(asset.gzip)
+        self.assertEqual(asset.codec, "")
+        self.assertEqual(asset.content_size, len(self.pdf_content))
 
         bookmark.refresh_from_db()
         self.assertEqual(bookmark.latest_snapshot, asset)
@@ -268,6 +272,78 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
         asset.refresh_from_db()
         self.assertEqual(asset.status, BookmarkAsset.STATUS_FAILURE)
 
+    @override_settings(LD_SNAPSHOT_PDF_MAX_SIZE=100)
+    def test_create_pdf_snapshot_streams_download_into_asset_file(self):
+        bookmark = self.setup_bookmark(url="https://example.com/doc.pdf")
+        asset = assets.create_snapshot_asset(bookmark)
+        asset.save()
+
+        self.mock_detect_content_type.return_value = "application/pdf"
+        chunks = [b"x" * 60, b"y" * 60]
+
+        with mock.patch("bookmarks.services.assets.requests.get") as mock_get:
+            mock_get.return_value = self.create_mock_pdf_response()
+            mock_get.return_value.iter_content.return_value = iter(chunks)
+
+            with self.assertRaises(assets.PdfTooLargeError):
+                assets.create_snapshot(asset)
+
+        # should neither leave a temporary nor a partial file
+        self.assertEqual(os.listdir(self.assets_dir), [])
+
+    def test_write_asset_file_removes_partial_file_on_failure(self):
+        filepath = os.path.join(self.assets_dir, "asset.html.gz")
+
+        def chunks():
+            yield b"first chunk"
+            raise OSError("Producer failed")
+
+        with self.assertRaises(OSError):
+            assets._write_asset_file(filepath, chunks())
+
+        self.assertEqual(os.listdir(self.assets_dir), [])
+
+    def test_write_asset_file_replaces_file_atomically(self):
+        filepath = os.path.join(self.assets_dir, "asset.html.gz")
+
+        content_hash, content_size = assets._write_asset_file(
+            filepath, [b"first", b"second"]
+        )
+
+        self.assertEqual(content_size, len(b"firstsecond"))
+
+        self.assertEqual(os.listdir(self.assets_dir), ["asset.html.gz"])
+        with gzip.open(filepath, "rb") as gz_file:
+            self.assertEqual(gz_file.read(), b"firstsecond")
+
+    def test_upload_snapshot_streams_uploaded_file(self):
+        bookmark = self.setup_bookmark(url="https://example.com")
+        upload_file = SimpleUploadedFile(
+            "snapshot.html", self.html_content.encode(), content_type="text/html"
+        )
+
+        with mock.patch.object(
+            upload_file, "chunks", wraps=upload_file.chunks
+        ) as mock_chunks:
+            asset = assets.upload_snapshot(bookmark, upload_file)
+
+        # should read the upload in chunks, instead of loading it at once
+        mock_chunks.assert_called_once()
+        with gzip.open(os.path.join(self.assets_dir, asset.file), "rb") as gz_file:
+            self.assertEqual(gz_file.read().decode(), self.html_content)
+        self.assertEqual(asset.status, BookmarkAsset.STATUS_COMPLETE)
+
+    def test_benchmark_asset_storage_command(self):
+        out = io.StringIO()
+
+        call_command(
+            "benchmark_asset_storage", "--size=1", "--iterations=1", stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn("temp file", output)
+        self.assertIn("streamed", output)
+
     def test_upload_snapshot(self):
         initial_modified = timezone.datetime(2025, 1, 1, 0, 0, 0, tzinfo=datetime.UTC)
         bookmark = self.setup_bookmark(
@@ -376,6 +452,7 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
         self.assertEqual(asset.status, BookmarkAsset.STATUS_COMPLETE)
         self.assertEqual(asset.file, saved_file_name)
         self.assertEqual(asset.file_size, self.get_asset_filesize(asset))
+        self.assertEqual(asset.content_size, len(file_content))
         self.assertTrue(asset.gzip)
 
         # should update bookmark modified date
@@ -419,6 +496,38 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
         bookmark.refresh_from_db()
         self.assertGreater(bookmark.date_modified, initial_modified)
 
+    @disable_logging
+    def test_upload_video_asset_is_stored_uncompressed(self):
+        bookmark = self.setup_bookmark()
+        file_content = b"video content"
+        upload_file = SimpleUploadedFile(
+            "test_video.mp4", file_content, content_type="video/mp4"
+        )
+
+        asset = assets.upload_asset(bookmark, upload_file)
+
+        saved_file_name = self.get_saved_snapshot_file()
+        self.assertTrue(saved_file_name.endswith("_test_video.mp4"))
+        self.assertEqual(self.read_asset_file(asset), file_content)
+        self.assertEqual(asset.file, saved_file_name)
+        self.assertEqual(asset.file_size, len(file_content))
+        self.assertEqual(asset.content_size, len(file_content))
+        self.assertFalse(asset.gzip)
+
+    @disable_logging
+    def test_upload_pdf_asset_is_stored_uncompressed(self):
+        bookmark = self.setup_bookmark()
+        upload_file = SimpleUploadedFile(
+            "test_document.pdf", self.pdf_content, content_type="application/pdf"
+        )
+
+        asset = assets.upload_asset(bookmark, upload_file)
+
+        self.assertTrue(asset.file.endswith("_test_document.pdf"))
+        self.assertEqual(self.read_asset_file(asset), self.pdf_content)
+        self.assertEqual(asset.content_size, len(self.pdf_content))
+        self.assertFalse(asset.gzip)
+
     @disable_logging
     def test_upload_asset_truncates_asset_file_name(self):
         # Create a bookmark with a very long URL
@@ -463,6 +572,7 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
 
         self.assertEqual(bookmark.latest_snapshot, first_asset)
 
+        self.html_content = "<html><body><h1>Updated</h1></body></html>"
         second_asset = assets.create_snapshot_asset(bookmark)
         second_asset.save()
 
@@ -471,6 +581,71 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
 
         self.assertEqual(bookmark.latest_snapshot, second_asset)
 
+    def create_html_snapshot(self, bookmark: Bookmark, saved_date: str):
+        self.html_content = (
+            "<!DOCTYPE html> <html lang=en><!--\n Page saved with SingleFile \n"
+            f" url: {bookmark.url} \n saved date: {saved_date}\n-->"
+            "<body><h1>Hello, World!</h1></body></html>"
+        )
+        asset = assets.create_snapshot_asset(bookmark)
+        asset.save()
+        assets.create_snapshot(asset)
+        return asset
+
+    def test_create_snapshot_keeps_unchanged_snapshot(self):
+        bookmark = self.setup_bookmark(url="https://example.com")
+        first_asset = self.create_html_snapshot(
+            bookmark, "Mon Jan 01 2024 10:00:00 GMT+0000"
+        )
+        first_asset.date_created = timezone.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+        first_asset.display_name = "HTML snapshot from 01/01/2024"
+        first_asset.save()
+        bookmark.refresh_from_db()
+        modified = bookmark.date_modified
+
+        second_asset = self.create_html_snapshot(
+            bookmark, "Tue Jan 02 2024 10:00:00 GMT+0000"
+        )
+
+        # pending asset is removed, the latest snapshot is kept
+        self.assertFalse(BookmarkAsset.objects.filter(id=second_asset.id).exists())
+        self.assertEqual(BookmarkAsset.objects.count(), 1)
+        self.assertEqual(len(os.listdir(self.assets_dir)), 1)
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.latest_snapshot, first_asset)
+        self.assertEqual(bookmark.date_modified, modified)
+
+        # latest snapshot is marked as current
+        first_asset.refresh_from_db()
+        self.assertGreater(
+            first_asset.date_created, timezone.now() - timedelta(minutes=1)
+        )
+        self.assertNotEqual(first_asset.display_name, "HTML snapshot from 01/01/2024")
+
+    def test_create_snapshot_keeps_renamed_unchanged_snapshot_name(self):
+        bookmark = self.setup_bookmark(url="https://example.com")
+        first_asset = self.create_html_snapshot(bookmark, "Mon Jan 01 2024")
+        assets.rename_asset(first_asset, "My snapshot")
+
+        self.create_html_snapshot(bookmark, "Tue Jan 02 2024")
+
+        first_asset.refresh_from_db()
+        self.assertEqual(first_asset.display_name, "My snapshot")
+
+    def test_create_snapshot_stores_changed_snapshot(self):
+        bookmark = self.setup_bookmark(url="https://example.com")
+        first_asset = self.create_html_snapshot(bookmark, "Mon Jan 01 2024")
+
+        self.html_content = "<html><body><h1>Updated</h1></body></html>"
+        second_asset = assets.create_snapshot_asset(bookmark)
+        second_asset.save()
+        assets.create_snapshot(second_asset)
+
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.latest_snapshot, second_asset)
+        self.assertTrue(BookmarkAsset.objects.filter(id=first_asset.id).exists())
+        self.assertEqual(self.read_asset_file(second_asset), self.html_content.encode())
+
     def test_upload_snapshot_updates_bookmark_latest_snapshot(self):
         bookmark = self.setup_bookmark(url="https://example.com")
 
@@ -673,3 +848,129 @@ class AssetServiceTestCase(TestCase, BookmarkFactoryMixin):
         assets.rename_asset(asset, "   ")
         asset.refresh_from_db()
         self.assertEqual(asset.display_name, "new_name.txt")
+
+    def test_snapshots_with_same_content_share_file(self):
+        bookmark1 = self.setup_bookmark(url="https://example.com/1")
+        bookmark2 = self.setup_bookmark(url="https://example.com/2")
+
+        asset1 = assets.upload_snapshot(bookmark1, self.html_content.encode())
+        asset2 = assets.upload_snapshot(bookmark2, self.html_content.encode())
+        asset3 = assets.upload_snapshot(bookmark2, b"<html>other content</html>")
+
+        self.assertEqual(asset1.content_hash, asset2.content_hash)
+        self.assertEqual(asset1.file, asset2.file)
+        self.assertNotEqual(asset1.file, asset3.file)
+        self.assertEqual(len(os.listdir(self.assets_dir)), 2)
+        self.assertEqual(self.read_asset_file(asset2), self.html_content.encode())
+
+    @disable_logging
+    def test_uploads_with_same_content_share_file(self):
+        bookmark = self.setup_bookmark()
+
+        asset1 = assets.upload_asset(
+            bookmark, SimpleUploadedFile("a.txt", b"content", content_type="text/plain")
+        )
+        asset2 = assets.upload_asset(
+            bookmark, SimpleUploadedFile("b.txt", b"content", content_type="text/plain")
+        )
+
+        self.assertEqual(asset1.file, asset2.file)
+        self.assertEqual(len(os.listdir(self.assets_dir)), 1)
+
+    def test_remove_asset_keeps_shared_file(self):
+        bookmark = self.setup_bookmark()
+        asset1 = assets.upload_snapshot(bookmark, self.html_content.encode())
+        asset2 = assets.upload_snapshot(bookmark, self.html_content.encode())
+        filepath = os.path.join(self.assets_dir, asset1.file)
+
+        assets.remove_asset(asset1)
+        self.assertTrue(os.path.exists(filepath))
+
+        assets.remove_asset(asset2)
+        self.assertFalse(os.path.exists(filepath))
+
+    def setup_legacy_asset(self, content: str, gzip: bool = True):
+        asset = self.setup_asset(
+            bookmark=self.setup_bookmark(),
+            file=f"snapshot_{BookmarkAsset.objects.count()}.html.gz",
+            gzip=gzip,
+        )
+        self.setup_asset_file(asset, content)
+        return asset
+
+    def test_deduplicate_assets(self):
+        asset1 = self.setup_legacy_asset("content")
+        asset2 = self.setup_legacy_asset("content")
+        asset3 = self.setup_legacy_asset("content", gzip=False)
+        asset4 = self.setup_legacy_asset("other content")
+        duplicate_size = self.get_asset_filesize(asset2)
+
+        result = assets.deduplicate_assets(dry_run=True)
+
+        self.assertEqual(result.removed_count, 1)
+        self.assertEqual(result.reclaimed_bytes, duplicate_size)
+        self.assertEqual(len(os.listdir(self.assets_dir)), 4)
+        asset1.refresh_from_db()
+        self.assertEqual(asset1.content_hash, "")
+
+        result = assets.deduplicate_assets()
+
+        self.assertEqual(result.hashed_count, 4)
+        self.assertEqual(result.removed_count, 1)
+        self.assertEqual(result.reclaimed_bytes, duplicate_size)
+        for asset in [asset1, asset2, asset3, asset4]:
+            asset.refresh_from_db()
+        self.assertEqual(asset2.file, asset1.file)
+        self.assertEqual(asset2.content_hash, asset1.content_hash)
+        self.assertEqual(asset3.content_hash, asset1.content_hash)
+        self.assertNotEqual(asset3.file, asset1.file)
+        self.assertNotEqual(asset4.content_hash, asset1.content_hash)
+        self.assertEqual(len(os.listdir(self.assets_dir)), 3)
+        self.assertEqual(self.read_asset_file(asset2), b"content")
+
+        result = assets.deduplicate_assets()
+        self.assertEqual(result.hashed_count, 0)
+        self.assertEqual(result.removed_count, 0)
+
+    def test_update_asset_storage(self):
+        bookmark = self.setup_bookmark()
+        snapshot = self.setup_asset(
+            bookmark, file="snapshot.html.gz", gzip=True, content_type="text/html"
+        )
+        self.setup_asset_file(snapshot, "html content")
+        pdf1 = self.setup_asset(
+            bookmark, file="snapshot.pdf.gz", gzip=True, content_type="application/pdf"
+        )
+        pdf2 = self.setup_asset(
+            bookmark, file="snapshot.pdf.gz", gzip=True, content_type="application/pdf"
+        )
+        self.setup_asset_file(pdf1, "pdf content")
+        missing = self.setup_asset(bookmark, file="missing.html.gz", gzip=True)
+        current = assets.upload_snapshot(bookmark, b"current content")
+
+        updated_count = assets.update_asset_storage()
+
+        self.assertEqual(updated_count, 2)
+        for asset in [snapshot, pdf1, pdf2, missing, current]:
+            asset.refresh_from_db()
+
+        # Compressed HTML files only get their size stored
+        self.assertEqual(snapshot.file, "snapshot.html.gz")
+        self.assertTrue(snapshot.gzip)
+        self.assertEqual(snapshot.content_size, len("html content"))
+
+        # PDFs are decompressed, for all assets that share the file
+        for pdf in [pdf1, pdf2]:
+            self.assertEqual(pdf.file, "snapshot.pdf")
+            self.assertFalse(pdf.gzip)
+            self.assertEqual(pdf.codec, "")
+            self.assertEqual(pdf.content_size, len("pdf content"))
+            self.assertEqual(pdf.file_size, len("pdf content"))
+            self.assertEqual(self.read_asset_file(pdf), b"pdf content")
+        self.assertFalse(
+            os.path.exists(os.path.join(self.assets_dir, "snapshot.pdf.gz"))
+        )
+
+        self.assertIsNone(missing.content_size)
+
+        self.assertEqual(assets.update_asset_storage(), 0)
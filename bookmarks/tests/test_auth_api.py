@@ -1,6 +1,11 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
+from bookmarks.api.auth import clear_token_cache
+from bookmarks.models import UserProfile
 from bookmarks.tests.helpers import BookmarkFactoryMixin, LinkdingApiTestCase
 
 
@@ -26,3 +31,59 @@ class AuthApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
 
         url = reverse("linkding:user-profile")
         self.get(url, expected_status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(API_TOKEN_CACHE_TIMEOUT=60)
+class AuthApiTokenCacheTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
+    def setUp(self):
+        clear_token_cache()
+        self.addCleanup(clear_token_cache)
+        self.api_token = self.setup_api_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.api_token.key}")
+
+    def get_profile(self, expected_status_code=status.HTTP_200_OK):
+        url = reverse("linkding:user-profile")
+        return self.get(url, expected_status_code=expected_status_code)
+
+    def get_auth_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_profile()
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "bookmarks_apitoken"' in query["sql"]
+            or 'FROM "auth_user"' in query["sql"]
+        ]
+
+    def test_caches_token_user_and_profile(self):
+        self.assertEqual(len(self.get_auth_queries()), 1)
+        self.assertEqual(len(self.get_auth_queries()), 0)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        self.get_profile(expected_status_code=status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidates_deleted_token(self):
+        self.get_profile()
+
+        self.api_token.delete()
+
+        self.get_profile(expected_status_code=status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidates_deactivated_user(self):
+        self.get_profile()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.get_profile(expected_status_code=status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidates_changed_profile(self):
+        self.get_profile()
+
+        self.user.profile.theme = UserProfile.THEME_DARK
+        self.user.profile.save()
+
+        response = self.get_profile()
+        self.assertEqual(response.data["theme"], UserProfile.THEME_DARK)
@@ -1,10 +1,13 @@
+import gzip
 import os
+from unittest import mock
 
 from django.conf import settings
 from django.test import TestCase
 from django.urls import reverse
 
 from bookmarks.models import BookmarkAsset
+from bookmarks.services import compression
 from bookmarks.tests.helpers import BookmarkFactoryMixin
 
 
@@ -234,3 +237,183 @@ class BookmarkAssetViewTestCase(TestCase, BookmarkFactoryMixin):
             response["Content-Security-Policy"],
             "default-src 'none'; media-src 'self';",
         )
+
+    def setup_gzip_asset(self, content: bytes):
+        bookmark = self.setup_bookmark()
+        asset = self.setup_asset(
+            bookmark=bookmark,
+            file=f"temp_{bookmark.id}.html.gz",
+            gzip=True,
+            content_type=BookmarkAsset.CONTENT_TYPE_HTML,
+        )
+        filepath = os.path.join(settings.LD_ASSET_FOLDER, asset.file)
+        with gzip.open(filepath, "wb") as f:
+            f.write(content)
+        return asset
+
+    def test_gzip_asset_is_sent_compressed(self):
+        content = b"<html>" + os.urandom(200 * 1024).hex().encode() + b"</html>"
+        asset = self.setup_gzip_asset(content)
+
+        response = self.client.get(
+            reverse("linkding:assets.view", args=[asset.id]),
+            HTTP_ACCEPT_ENCODING="gzip, deflate, br",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), content)
+
+    def test_gzip_asset_is_decompressed_for_clients_without_gzip(self):
+        content = b"<html>" + os.urandom(200 * 1024).hex().encode() + b"</html>"
+        asset = self.setup_gzip_asset(content)
+
+        response = self.client.get(reverse("linkding:assets.view", args=[asset.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(b"".join(response.streaming_content), content)
+
+    def setup_video_asset(self, content: bytes):
+        bookmark = self.setup_bookmark()
+        asset = self.setup_asset(
+            bookmark=bookmark,
+            file=f"temp_{bookmark.id}.mp4",
+            asset_type=BookmarkAsset.TYPE_UPLOAD,
+            content_type="video/mp4",
+        )
+        filepath = os.path.join(settings.LD_ASSET_FOLDER, asset.file)
+        with open(filepath, "wb") as f:
+            f.write(content)
+        return asset
+
+    def get_range(self, asset, byte_range: str, **headers):
+        return self.client.get(
+            reverse("linkding:assets.view", args=[asset.id]),
+            HTTP_RANGE=byte_range,
+            **headers,
+        )
+
+    def test_range_request(self):
+        content = bytes(range(256)) * 1024
+        asset = self.setup_video_asset(content)
+
+        response = self.client.get(reverse("linkding:assets.view", args=[asset.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Length"], str(len(content)))
+
+        response = self.get_range(asset, "bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(content)}")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(b"".join(response.streaming_content), content[100:200])
+
+        response = self.get_range(asset, "bytes=200000-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), content[200000:])
+
+        response = self.get_range(asset, "bytes=-10")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), content[-10:])
+
+        response = self.get_range(asset, "bytes=0-999999999")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response["Content-Range"], f"bytes 0-{len(content) - 1}/{len(content)}"
+        )
+
+    def test_range_request_for_gzip_asset(self):
+        content = os.urandom(100 * 1024)
+        asset = self.setup_gzip_asset(content)
+
+        response = self.get_range(
+            asset, "bytes=70000-80000", HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Content-Range"], f"bytes 70000-80000/{len(content)}")
+        self.assertEqual(b"".join(response.streaming_content), content[70000:80001])
+
+    def test_range_request_for_large_gzip_asset(self):
+        content = os.urandom(100 * 1024)
+        asset = self.setup_gzip_asset(content)
+
+        # The size in the trailer can not be used if the content might be
+        # larger than 4 GiB, the content is decompressed instead
+        with (
+            mock.patch.object(compression, "DEFLATE_MAX_RATIO", 2**32),
+            mock.patch.object(
+                compression,
+                "_read_content_size",
+                wraps=compression._read_content_size,
+            ) as mock_read_size,
+        ):
+            response = self.get_range(asset, "bytes=70000-80000")
+
+        mock_read_size.assert_called_once()
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 70000-80000/{len(content)}")
+        self.assertEqual(b"".join(response.streaming_content), content[70000:80001])
+
+    def test_range_request_uses_stored_content_size(self):
+        content = os.urandom(100 * 1024)
+        asset = self.setup_gzip_asset(content)
+        asset.content_size = len(content)
+        asset.save()
+
+        with (
+            mock.patch.object(compression, "DEFLATE_MAX_RATIO", 2**32),
+            mock.patch.object(compression, "_read_content_size") as mock_read_size,
+        ):
+            response = self.get_range(asset, "bytes=70000-80000")
+
+        mock_read_size.assert_not_called()
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 70000-80000/{len(content)}")
+        self.assertEqual(b"".join(response.streaming_content), content[70000:80001])
+
+    def test_unsatisfiable_range(self):
+        asset = self.setup_video_asset(b"0123456789")
+
+        response = self.get_range(asset, "bytes=10-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_ignores_invalid_and_multiple_ranges(self):
+        asset = self.setup_video_asset(b"0123456789")
+
+        for byte_range in ["bytes=5-2", "bytes=0-1,4-5", "items=0-1", "bytes=-"]:
+            response = self.get_range(asset, byte_range)
+            self.assertEqual(response.status_code, 200, byte_range)
+            self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_if_range(self):
+        asset = self.setup_video_asset(b"0123456789")
+        response = self.client.get(reverse("linkding:assets.view", args=[asset.id]))
+        etag = response["ETag"]
+        last_modified = response["Last-Modified"]
+
+        response = self.get_range(asset, "bytes=2-3", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response = self.get_range(asset, "bytes=2-3", HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+
+        response = self.get_range(asset, "bytes=2-3", HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_not_modified(self):
+        asset = self.setup_video_asset(b"0123456789")
+        url = reverse("linkding:assets.view", args=[asset.id])
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
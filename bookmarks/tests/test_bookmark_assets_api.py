@@ -187,6 +187,29 @@ class BookmarkAssetsApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         content = b"".join(response.streaming_content).decode("utf-8")
         self.assertEqual(content, file_content)
 
+    def test_asset_download_with_range(self):
+        self.authenticate()
+
+        bookmark = self.setup_bookmark()
+        asset = self.setup_asset(
+            bookmark=bookmark,
+            asset_type=BookmarkAsset.TYPE_UPLOAD,
+            display_name="cats.png",
+            content_type="image/png",
+            gzip=False,
+        )
+        self.setup_asset_file(asset=asset, file_content="some file content")
+
+        url = reverse(
+            "linkding:bookmark_asset-download",
+            kwargs={"bookmark_id": asset.bookmark.id, "pk": asset.id},
+        )
+        response = self.client.get(url, HTTP_RANGE="bytes=5-8")
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], "bytes 5-8/17")
+        self.assertEqual(b"".join(response.streaming_content), b"file")
+
     def test_asset_download_with_missing_file(self):
         self.authenticate()
 
@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase
+
+from bookmarks import queries
+from bookmarks.models import BookmarkAsset, BookmarkSearch
+from bookmarks.services.bookmarks import trash_bookmark
+from bookmarks.tests.helpers import BookmarkFactoryMixin
+
+
+class BookmarkIndexesTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self):
+        self.user = self.get_or_create_test_user()
+        self.profile = self.user.profile
+        for _ in range(5):
+            self.setup_bookmark()
+            self.setup_bookmark(unread=True)
+            self.setup_bookmark(is_archived=True)
+            self.setup_bookmark(shared=True)
+            trash_bookmark(self.setup_bookmark())
+
+        if connection.vendor == "postgresql":
+            # Tables in tests are tiny, which makes the planner prefer sequential
+            # scans and in-memory sorts over any index
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("SET LOCAL enable_sort = off")
+
+    def assertUsesIndex(self, query_set, index_name: str):
+        plan = query_set.explain()
+        self.assertIn(index_name, plan)
+
+    def test_index_uses_active_index(self):
+        query_set = queries.query_bookmarks(self.user, self.profile, BookmarkSearch())
+
+        self.assertUsesIndex(query_set, "bookmark_active_added_idx")
+
+    def test_index_with_unread_filter_uses_unread_index(self):
+        query_set = queries.query_bookmarks(
+            self.user,
+            self.profile,
+            BookmarkSearch(unread=BookmarkSearch.FILTER_UNREAD_YES),
+        )
+
+        self.assertUsesIndex(query_set, "bookmark_unread_added_idx")
+
+    def test_archive_uses_archived_index(self):
+        query_set = queries.query_archived_bookmarks(
+            self.user, self.profile, BookmarkSearch()
+        )
+
+        self.assertUsesIndex(query_set, "bookmark_archived_added_idx")
+
+    def test_trash_uses_trashed_index(self):
+        query_set = queries.query_trashed_bookmarks(
+            self.user,
+            self.profile,
+            BookmarkSearch(sort=BookmarkSearch.SORT_DELETED_DESC),
+        )
+
+        self.assertUsesIndex(query_set, "bookmark_trashed_deleted_idx")
+
+    def test_shared_uses_shared_index(self):
+        query_set = queries.query_shared_bookmarks(
+            None, self.profile, BookmarkSearch(), public_only=False
+        )
+
+        self.assertUsesIndex(query_set, "bookmark_shared_added_idx")
+
+    def test_snapshot_dispatcher_uses_asset_index(self):
+        query_set = BookmarkAsset.objects.filter(
+            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+            status=BookmarkAsset.STATUS_PENDING,
+        ).order_by("-date_created", "-id")
+
+        self.assertUsesIndex(query_set, "asset_status_type_created_idx")
+
+    def test_snapshot_dispatcher_uses_domain_index(self):
+        query_set = (
+            BookmarkAsset.objects.filter(
+                asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+                status=BookmarkAsset.STATUS_PENDING,
+                domain__in=["example.com", "example.org"],
+            )
+            .values_list("domain", flat=True)
+            .distinct()
+        )
+
+        self.assertUsesIndex(query_set, "asset_status_type_domain_idx")
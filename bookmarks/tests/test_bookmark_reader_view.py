@@ -0,0 +1,135 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bookmarks.models import ReaderArticle
+from bookmarks.services import assets, reader, tasks
+from bookmarks.tests.helpers import BookmarkFactoryMixin
+
+PAGE = (
+    b"<html><head><title>Test page</title><script>alert('script')</script></head>"
+    b"<body><article><p>Article content</p></article></body></html>"
+)
+
+
+class BookmarkReaderViewTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self) -> None:
+        self.setup_temp_assets_dir()
+        user = self.get_or_create_test_user()
+        self.client.force_login(user)
+
+    def get_read_url(self, bookmark):
+        return reverse("linkding:bookmarks.read", args=[bookmark.id])
+
+    def mock_load_full_page(self, **kwargs):
+        return mock.patch.object(reader.website_loader, "load_full_page", **kwargs)
+
+    def test_reads_latest_snapshot(self):
+        bookmark = self.setup_bookmark()
+        assets.upload_snapshot(bookmark, PAGE)
+
+        with self.mock_load_full_page() as mock_load:
+            response = self.client.get(self.get_read_url(bookmark))
+
+        mock_load.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<p>Article content</p>")
+        self.assertNotContains(response, "alert('script')")
+        self.assertNotContains(response, 'http-equiv="refresh"')
+
+    def test_loads_website_without_snapshot(self):
+        bookmark = self.setup_bookmark(url="https://example.com/page")
+
+        with self.mock_load_full_page(return_value=PAGE.decode()) as mock_load:
+            response = self.client.get(self.get_read_url(bookmark))
+            mock_load.assert_called_once_with("https://example.com/page", None)
+
+            # Reopening reader mode uses the cached article
+            mock_load.reset_mock()
+            response = self.client.get(self.get_read_url(bookmark))
+            mock_load.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<p>Article content</p>")
+        self.assertContains(response, '<base href="https://example.com/page">')
+
+    @override_settings(LD_DISABLE_BACKGROUND_TASKS=True)
+    def test_loads_website_in_request_without_background_tasks(self):
+        bookmark = self.setup_bookmark()
+
+        with (
+            self.mock_load_full_page(return_value=PAGE.decode()) as mock_load,
+            mock.patch.object(tasks, "_load_reader_article_task") as mock_task,
+        ):
+            response = self.client.get(self.get_read_url(bookmark))
+
+        mock_task.assert_not_called()
+        mock_load.assert_called_once()
+        self.assertContains(response, "<p>Article content</p>")
+
+    def test_shows_loading_page_while_loading_website(self):
+        bookmark = self.setup_bookmark()
+
+        with mock.patch.object(tasks, "_load_reader_article_task") as mock_task:
+            response = self.client.get(self.get_read_url(bookmark))
+            mock_task.assert_called_once_with(bookmark.id)
+
+            # Doesn't queue the article again while it is loading
+            mock_task.reset_mock()
+            response = self.client.get(self.get_read_url(bookmark))
+            mock_task.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'http-equiv="refresh"')
+        self.assertContains(response, "Loading page content")
+        self.assertNotContains(response, "Readability.js")
+        self.assertEqual(
+            ReaderArticle.objects.get(bookmark=bookmark).status,
+            ReaderArticle.STATUS_PENDING,
+        )
+
+    def test_shows_error_if_website_can_not_be_loaded(self):
+        bookmark = self.setup_bookmark()
+
+        with self.mock_load_full_page(side_effect=Exception("Connection refused")):
+            response = self.client.get(self.get_read_url(bookmark))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Unable to load page content: Connection refused")
+        article = ReaderArticle.objects.get(bookmark=bookmark)
+        self.assertEqual(article.status, ReaderArticle.STATUS_FAILURE)
+
+    def test_retries_failed_website_after_failure_ttl(self):
+        bookmark = self.setup_bookmark()
+        with self.mock_load_full_page(side_effect=Exception("Connection refused")):
+            self.client.get(self.get_read_url(bookmark))
+
+        # The failed article is shown again without loading the page
+        with self.mock_load_full_page(return_value=PAGE.decode()) as mock_load:
+            response = self.client.get(self.get_read_url(bookmark))
+
+        mock_load.assert_not_called()
+        self.assertContains(response, "Unable to load page content: Connection refused")
+
+        ReaderArticle.objects.update(
+            date_modified=timezone.now()
+            - datetime.timedelta(seconds=reader.FAILURE_TTL_SEC + 1)
+        )
+        with self.mock_load_full_page(return_value=PAGE.decode()) as mock_load:
+            response = self.client.get(self.get_read_url(bookmark))
+
+        mock_load.assert_called_once()
+        self.assertContains(response, "<p>Article content</p>")
+
+    def test_read_access(self):
+        other_user = self.setup_user()
+        bookmark = self.setup_bookmark(user=other_user)
+
+        with self.mock_load_full_page(return_value=PAGE.decode()) as mock_load:
+            response = self.client.get(self.get_read_url(bookmark))
+
+        self.assertEqual(response.status_code, 404)
+        mock_load.assert_not_called()
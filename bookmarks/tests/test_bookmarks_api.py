@@ -4,7 +4,10 @@ import urllib.parse
 from unittest.mock import ANY, patch
 
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -12,9 +15,9 @@ from rest_framework.response import Response
 from rest_framework.test import APIRequestFactory
 
 import bookmarks.services.bookmarks
-from bookmarks.api.serializers import BookmarkSerializer
-from bookmarks.models import Bookmark, BookmarkSearch, UserProfile
-from bookmarks.services import website_loader
+from bookmarks.api.serializers import BookmarkSerializer, BookmarkValuesSerializer
+from bookmarks.models import Bookmark, BookmarkChange, BookmarkSearch, UserProfile
+from bookmarks.services import changes, website_loader
 from bookmarks.services.website_loader import WebsiteMetadata
 from bookmarks.tests.helpers import BookmarkFactoryMixin, LinkdingApiTestCase
 from bookmarks.utils import app_version
@@ -78,6 +81,56 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         )
         self.assertBookmarkListEqual(response.data["results"], bookmarks)
 
+    def test_list_bookmarks_with_fields(self):
+        self.authenticate()
+        tag = self.setup_tag(name="tag1")
+        bookmark = self.setup_bookmark(tags=[tag], favicon_file="favicon.png")
+
+        url = reverse("linkding:bookmark-list")
+        response = self.get(f"{url}?fields=id,url,title,tag_names,favicon_url")
+
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "id": bookmark.id,
+                    "url": bookmark.url,
+                    "title": bookmark.title,
+                    "tag_names": ["tag1"],
+                    "favicon_url": "http://testserver/static/favicon.png",
+                }
+            ],
+        )
+
+    def test_list_bookmarks_validates_fields(self):
+        self.authenticate()
+
+        url = reverse("linkding:bookmark-list")
+        response = self.get(
+            f"{url}?fields=id,owner,unknown",
+            expected_status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+        self.assertEqual(response.data["fields"], ["Invalid fields: owner, unknown"])
+
+    def test_values_serializer_matches_bookmark_serializer(self):
+        bookmark = self.setup_bookmark(
+            tags=[self.setup_tag(name="b"), self.setup_tag(name="a")],
+            favicon_file="favicon.png",
+            preview_image_file="preview.png",
+            web_archive_snapshot_url="",
+        )
+        bookmark.date_deleted = timezone.now()
+        bookmark.save()
+        request = APIRequestFactory().get("/")
+
+        serializer = BookmarkValuesSerializer(request)
+        rows = Bookmark.objects.values(*serializer.get_values_fields())
+        data = serializer.to_representation(list(rows))
+
+        expectation = BookmarkSerializer(bookmark, context={"request": request}).data
+        self.assertEqual(data, [expectation])
+
     def test_list_bookmarks_returns_none_for_website_title_and_description(self):
         self.authenticate()
         bookmark = self.setup_bookmark()
@@ -128,8 +181,12 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
 
     def test_list_bookmarks_filter_unread(self):
         self.authenticate()
-        unread_bookmarks = self.setup_numbered_bookmarks(5, prefix="Unread Bookmark", unread=True)
-        read_bookmarks = self.setup_numbered_bookmarks(5, prefix="Read Bookmark", unread=False)
+        unread_bookmarks = self.setup_numbered_bookmarks(
+            5, prefix="Unread Bookmark", unread=True
+        )
+        read_bookmarks = self.setup_numbered_bookmarks(
+            5, prefix="Read Bookmark", unread=False
+        )
 
         # Filter off
         response = self.get(
@@ -207,6 +264,59 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         # 验证所有书签都被返回（内容相同，顺序可能不同）
         self.assertBookmarkListEqual(result_bookmarks, bookmarks)
 
+    def get_all_pages(self, url: str) -> list[list[int]]:
+        pages = []
+        while url:
+            response = self.get(url)
+            self.assertNotIn("count", response.data)
+            pages.append([bookmark["id"] for bookmark in response.data["results"]])
+            url = response.data["next"]
+        return pages
+
+    def test_list_bookmarks_with_cursor_pagination(self):
+        self.authenticate()
+        bookmarks = self.setup_numbered_bookmarks(5)
+        # Bookmarks with the same date are ordered by their ID
+        Bookmark.objects.filter(id__in=[bookmarks[1].id, bookmarks[2].id]).update(
+            date_added=bookmarks[1].date_added
+        )
+        url = reverse("linkding:bookmark-list")
+
+        orderings = {
+            "added_asc": ["date_added", "id"],
+            "added_desc": ["-date_added", "-id"],
+            "title_asc": ["title", "id"],
+            "title_desc": ["-title", "-id"],
+        }
+        for sort, ordering in orderings.items():
+            expected_ids = list(
+                Bookmark.objects.order_by(*ordering).values_list("id", flat=True)
+            )
+            pages = self.get_all_pages(f"{url}?sort={sort}&limit=2&cursor=")
+
+            self.assertEqual([len(page) for page in pages], [2, 2, 1])
+            self.assertEqual(sum(pages, []), expected_ids)
+
+    def test_list_bookmarks_cursor_pagination_is_not_affected_by_new_bookmarks(self):
+        self.authenticate()
+        self.setup_numbered_bookmarks(4)
+        url = reverse("linkding:bookmark-list")
+
+        response = self.get(f"{url}?sort=title_asc&limit=2&cursor=")
+        first_page = [bookmark["id"] for bookmark in response.data["results"]]
+        self.setup_bookmark(title="0 comes first")
+        second_page = self.get_all_pages(response.data["next"])
+
+        all_ids = Bookmark.objects.order_by("title").values_list("id", flat=True)
+        self.assertEqual(first_page + sum(second_page, []), list(all_ids[1:]))
+
+    def test_list_bookmarks_cursor_pagination_validates_cursor(self):
+        self.authenticate()
+        url = reverse("linkding:bookmark-list")
+
+        self.get(f"{url}?cursor=invalid", status.HTTP_400_BAD_REQUEST)
+        self.get(f"{url}?sort=random&cursor=", status.HTTP_400_BAD_REQUEST)
+
     def test_list_archived_bookmarks_does_not_return_unarchived_bookmarks(self):
         self.authenticate()
         self.setup_numbered_bookmarks(5)
@@ -756,6 +866,15 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         response = self.get(url, expected_status_code=status.HTTP_200_OK)
         self.assertBookmarkListEqual([response.data], [bookmark])
 
+    def test_get_bookmark_with_fields(self):
+        self.authenticate()
+        bookmark = self.setup_bookmark()
+
+        url = reverse("linkding:bookmark-detail", args=[bookmark.id])
+        response = self.get(f"{url}?fields=id,url")
+
+        self.assertEqual(response.data, {"id": bookmark.id, "url": bookmark.url})
+
     def test_get_bookmark_returns_fallback_webarchive_url(self):
         self.authenticate()
         bookmark = self.setup_bookmark(
@@ -1151,6 +1270,294 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         self.assertEqual(bookmark.id, bookmark_data["id"])
         self.assertEqual(bookmark.title, bookmark_data["title"])
 
+    def test_batch_creates_and_updates_bookmarks(self):
+        self.authenticate()
+        existing = self.setup_bookmark(url="https://example.com/existing")
+
+        url = reverse("linkding:bookmark-batch")
+        with (
+            patch.object(bookmarks.services.tasks, "enrich_bookmarks"),
+            patch.object(website_loader, "load_website_metadata") as mock_load,
+        ):
+            response = self.post(
+                url,
+                {
+                    "bookmarks": [
+                        {
+                            "url": "https://example.com/new",
+                            "title": "New title",
+                            "tag_names": ["tag1", "tag2"],
+                        },
+                        {"url": "https://example.com/existing/", "title": "Updated"},
+                    ]
+                },
+            )
+            mock_load.assert_not_called()
+
+        results = response.data["results"]
+        self.assertEqual(results[0]["status"], "created")
+        self.assertEqual(results[1]["status"], "updated")
+
+        new = Bookmark.objects.get(url="https://example.com/new")
+        self.assertEqual(new.owner, self.user)
+        self.assertEqual(new.title, "New title")
+        self.assertEqual(new.tag_names, ["tag1", "tag2"])
+        self.assertEqual(results[0]["bookmark"]["id"], new.id)
+        self.assertEqual(results[0]["bookmark"]["tag_names"], ["tag1", "tag2"])
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.title, "Updated")
+        self.assertEqual(results[1]["bookmark"]["id"], existing.id)
+
+    def test_batch_reports_invalid_items(self):
+        self.authenticate()
+
+        url = reverse("linkding:bookmark-batch")
+        with patch.object(bookmarks.services.tasks, "enrich_bookmarks"):
+            response = self.post(
+                url,
+                {
+                    "bookmarks": [
+                        {"url": "invalid"},
+                        {"url": "https://example.com"},
+                        {"title": "Missing URL"},
+                    ]
+                },
+            )
+
+        results = response.data["results"]
+        self.assertEqual(results[0]["status"], "invalid")
+        self.assertIn("url", results[0]["errors"])
+        self.assertEqual(results[1]["status"], "created")
+        self.assertEqual(results[2]["status"], "invalid")
+        self.assertIn("url", results[2]["errors"])
+        self.assertEqual(Bookmark.objects.count(), 1)
+
+    def test_batch_schedules_enrichment_once(self):
+        self.authenticate()
+
+        url = reverse("linkding:bookmark-batch") + "?disable_html_snapshot"
+        with patch.object(
+            bookmarks.services.tasks, "enrich_bookmarks"
+        ) as mock_enrich_bookmarks:
+            self.post(
+                url,
+                {
+                    "bookmarks": [
+                        {"url": "https://example.com/1"},
+                        {"url": "https://example.com/2"},
+                    ]
+                },
+            )
+
+        mock_enrich_bookmarks.assert_called_once()
+        bookmark_ids = list(Bookmark.objects.values_list("id", flat=True))
+        self.assertCountEqual(
+            mock_enrich_bookmarks.call_args.kwargs["metadata_bookmark_ids"],
+            bookmark_ids,
+        )
+
+    def test_batch_does_not_schedule_metadata_enrichment_when_scraping_disabled(
+        self,
+    ):
+        self.authenticate()
+
+        url = reverse("linkding:bookmark-batch") + "?disable_scraping"
+        with patch.object(
+            bookmarks.services.tasks, "enrich_bookmarks"
+        ) as mock_enrich_bookmarks:
+            self.post(url, {"bookmarks": [{"url": "https://example.com"}]})
+
+        self.assertEqual(
+            mock_enrich_bookmarks.call_args.kwargs["metadata_bookmark_ids"], []
+        )
+
+    def test_batch_validates_payload(self):
+        self.authenticate()
+        url = reverse("linkding:bookmark-batch")
+
+        self.post(url, {}, status.HTTP_400_BAD_REQUEST)
+        self.post(url, {"bookmarks": []}, status.HTTP_400_BAD_REQUEST)
+        self.post(
+            url,
+            {"bookmarks": [{"url": f"https://example.com/{i}"} for i in range(101)]},
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_batch_requires_authentication(self):
+        url = reverse("linkding:bookmark-batch")
+
+        self.post(
+            url,
+            {"bookmarks": [{"url": "https://example.com"}]},
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_exists_returns_bookmark_ids(self):
+        self.authenticate()
+        bookmark = self.setup_bookmark(url="https://EXAMPLE.COM/path/?z=1&a=2")
+        other_user_bookmark = self.setup_bookmark(
+            url="https://other.example.com", user=self.setup_user()
+        )
+
+        url = reverse("linkding:bookmark-exists")
+        query = urllib.parse.urlencode(
+            [
+                ("url", "https://example.com/path?a=2&z=1"),
+                ("url", "https://unknown.example.com"),
+                ("url", other_user_bookmark.url),
+            ]
+        )
+        with patch.object(website_loader, "load_website_metadata") as mock_load:
+            response = self.get(f"{url}?{query}")
+            mock_load.assert_not_called()
+
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "url": "https://example.com/path?a=2&z=1",
+                    "bookmark_id": bookmark.id,
+                },
+                {"url": "https://unknown.example.com", "bookmark_id": None},
+                {"url": other_user_bookmark.url, "bookmark_id": None},
+            ],
+        )
+
+    def test_exists_with_post(self):
+        self.authenticate()
+        bookmark = self.setup_bookmark(url="https://example.com")
+
+        url = reverse("linkding:bookmark-exists")
+        response = self.post(
+            url, {"urls": ["https://example.com/", "https://unknown.example.com"]}
+        )
+
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"url": "https://example.com/", "bookmark_id": bookmark.id},
+                {"url": "https://unknown.example.com", "bookmark_id": None},
+            ],
+        )
+
+    def test_exists_falls_back_to_exact_url(self):
+        self.authenticate()
+        bookmark = self.setup_bookmark(url="https://example.com")
+        Bookmark.objects.filter(id=bookmark.id).update(url_normalized="")
+
+        url = reverse("linkding:bookmark-exists")
+        response = self.get(f"{url}?url={urllib.parse.quote_plus(bookmark.url)}")
+
+        self.assertEqual(response.data["results"][0]["bookmark_id"], bookmark.id)
+
+    def test_exists_validates_urls(self):
+        self.authenticate()
+        url = reverse("linkding:bookmark-exists")
+
+        self.get(url, expected_status_code=status.HTTP_400_BAD_REQUEST)
+        self.post(url, {"urls": "https://example.com"}, status.HTTP_400_BAD_REQUEST)
+        self.post(
+            url,
+            {"urls": [f"https://example.com/{i}" for i in range(201)]},
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_exists_max_queries(self):
+        self.authenticate()
+        for i in range(10):
+            self.setup_bookmark(url=f"https://example.com/{i}")
+
+        url = reverse("linkding:bookmark-exists")
+        urls = [f"https://example.com/{i}" for i in range(20)]
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(url, {"urls": urls})
+
+        bookmark_queries = [
+            query
+            for query in context.captured_queries
+            if 'FROM "bookmarks_bookmark"' in query["sql"]
+        ]
+        self.assertEqual(len(bookmark_queries), 1)
+
+        bookmarked = [r for r in response.data["results"] if r["bookmark_id"]]
+        self.assertEqual(len(bookmarked), 10)
+
+    def test_changes(self):
+        self.authenticate()
+        bookmark1 = self.setup_bookmark()
+        bookmark2 = self.setup_bookmark()
+        self.setup_bookmark(user=self.setup_user())
+        bookmark1_id = bookmark1.id
+        bookmark1.delete()
+
+        url = reverse("linkding:bookmark-changes")
+        response = self.get(url)
+
+        changes = response.data["changes"]
+        self.assertEqual(
+            [(c["bookmark_id"], c["action"]) for c in changes],
+            [
+                (bookmark2.id, BookmarkChange.ACTION_UPDATED),
+                (bookmark1_id, BookmarkChange.ACTION_DELETED),
+            ],
+        )
+        self.assertEqual(changes[0]["bookmark"]["id"], bookmark2.id)
+        self.assertEqual(changes[0]["bookmark"]["url"], bookmark2.url)
+        self.assertIsNone(changes[1]["bookmark"])
+        self.assertEqual(response.data["next_since"], changes[1]["seq"])
+        self.assertFalse(response.data["has_more"])
+        self.assertFalse(response.data["reset"])
+
+        response = self.get(f"{url}?since={response.data['next_since']}")
+        self.assertEqual(response.data["changes"], [])
+
+    def test_changes_with_limit(self):
+        self.authenticate()
+        for _ in range(3):
+            self.setup_bookmark()
+
+        url = reverse("linkding:bookmark-changes")
+        seen_ids = set()
+        since = 0
+        has_more = True
+        while has_more:
+            response = self.get(f"{url}?since={since}&limit=1")
+            self.assertLessEqual(len(response.data["changes"]), 1)
+            seen_ids.update(c["bookmark_id"] for c in response.data["changes"])
+            since = response.data["next_since"]
+            has_more = response.data["has_more"]
+
+        self.assertCountEqual(seen_ids, Bookmark.objects.values_list("id", flat=True))
+
+    def test_changes_reset_after_deleted_bookmarks_were_pruned(self):
+        self.authenticate()
+        bookmark = self.setup_bookmark()
+        bookmark.delete()
+        BookmarkChange.objects.update(
+            date=timezone.now() - datetime.timedelta(days=365)
+        )
+        since = BookmarkChange.objects.order_by("id").first().id
+        changes.compact_changes()
+
+        url = reverse("linkding:bookmark-changes")
+        response = self.get(f"{url}?since={since}")
+        self.assertTrue(response.data["reset"])
+
+        response = self.get(url)
+        self.assertFalse(response.data["reset"])
+
+    def test_changes_validates_parameters(self):
+        self.authenticate()
+        url = reverse("linkding:bookmark-changes")
+
+        self.get(f"{url}?since=abc", expected_status_code=status.HTTP_400_BAD_REQUEST)
+        self.get(f"{url}?limit=abc", expected_status_code=status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_requires_authentication(self):
+        url = reverse("linkding:bookmark-changes")
+        self.get(url, expected_status_code=status.HTTP_401_UNAUTHORIZED)
+
     def test_check_returns_no_auto_tags_if_none_configured(self):
         self.authenticate()
 
@@ -1378,6 +1785,13 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
 
         return {"url": url, "file": file}
 
+    def assert_snapshot_uploaded(self, bookmark: Bookmark):
+        self.mock_assets_upload_snapshot.assert_called_once_with(bookmark, ANY)
+        uploaded_file = self.mock_assets_upload_snapshot.call_args.args[1]
+        self.assertIsInstance(uploaded_file, UploadedFile)
+        self.assertEqual(uploaded_file.name, "snapshot.html")
+        self.assertEqual(uploaded_file.size, len(b"dummy content"))
+
     def test_singlefile_upload(self):
         bookmark = self.setup_bookmark(url="https://example.com")
 
@@ -1391,8 +1805,7 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
 
         self.assertEqual(response.data["message"], "Snapshot uploaded successfully.")
 
-        self.mock_assets_upload_snapshot.assert_called_once()
-        self.mock_assets_upload_snapshot.assert_called_with(bookmark, b"dummy content")
+        self.assert_snapshot_uploaded(bookmark)
 
     def test_singlefile_creates_bookmark_if_not_exists(self):
         other_user = self.setup_user()
@@ -1411,8 +1824,7 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         bookmark = Bookmark.objects.get(
             url="https://example.com", owner=self.get_or_create_test_user()
         )
-        self.mock_assets_upload_snapshot.assert_called_once()
-        self.mock_assets_upload_snapshot.assert_called_with(bookmark, b"dummy content")
+        self.assert_snapshot_uploaded(bookmark)
 
     def test_singlefile_updates_own_bookmark_if_exists(self):
         bookmark = self.setup_bookmark(url="https://example.com")
@@ -1428,8 +1840,7 @@ class BookmarksApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
         )
 
         self.assertEqual(Bookmark.objects.count(), 2)
-        self.mock_assets_upload_snapshot.assert_called_once()
-        self.mock_assets_upload_snapshot.assert_called_with(bookmark, b"dummy content")
+        self.assert_snapshot_uploaded(bookmark)
 
     def test_singlefile_creates_bookmark_without_creating_snapshot(self):
         with (
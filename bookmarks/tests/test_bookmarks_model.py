@@ -1,9 +1,10 @@
 from django.test import TestCase
 
 from bookmarks.models import Bookmark
+from bookmarks.tests.helpers import BookmarkFactoryMixin
 
 
-class BookmarkTestCase(TestCase):
+class BookmarkTestCase(TestCase, BookmarkFactoryMixin):
     def test_bookmark_resolved_title(self):
         bookmark = Bookmark(
             title="Custom title",
@@ -13,3 +14,20 @@ class BookmarkTestCase(TestCase):
 
         bookmark = Bookmark(title="", url="https://example.com")
         self.assertEqual(bookmark.resolved_title, "https://example.com")
+
+    def test_save_updates_title_sort_key(self):
+        bookmark = self.setup_bookmark(title="Custom Title")
+        self.assertEqual(bookmark.title_sort_key, "custom title")
+
+        bookmark.title = ""
+        bookmark.save()
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.title_sort_key, bookmark.url.lower())
+
+    def test_save_with_update_fields_updates_title_sort_key(self):
+        bookmark = self.setup_bookmark(title="Custom Title")
+
+        bookmark.title = "Changed Title"
+        bookmark.save(update_fields=["title"])
+        bookmark.refresh_from_db()
+        self.assertEqual(bookmark.title_sort_key, "changed title")
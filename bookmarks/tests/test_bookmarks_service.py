@@ -10,6 +10,7 @@ from bookmarks.services.bookmarks import (
     archive_bookmark,
     archive_bookmarks,
     create_bookmark,
+    create_bookmarks,
     create_html_snapshots,
     delete_bookmarks,
     enhance_with_website_metadata,
@@ -325,6 +326,138 @@ class BookmarkServiceTestCase(TestCase, BookmarkFactoryMixin):
         self.assertEqual(bookmark.date_added, custom_date_added)
         self.assertEqual(bookmark.date_modified, custom_date_modified)
 
+    def test_create_bookmarks_should_create_bookmarks_with_tags(self):
+        existing_tag = self.setup_tag(name="Existing")
+
+        with (
+            patch.object(tasks, "enrich_bookmarks"),
+            patch.object(tasks, "create_html_snapshots"),
+        ):
+            results = create_bookmarks(
+                [
+                    (Bookmark(url="https://example.com/1", title="1"), "existing,new"),
+                    (Bookmark(url="https://example.com/2"), "NEW"),
+                    (Bookmark(url="https://example.com/3"), ""),
+                ],
+                self.user,
+            )
+
+        self.assertEqual([created for _bookmark, created in results], [True] * 3)
+        self.assertEqual(Bookmark.objects.count(), 3)
+        new_tag = Tag.objects.get(name="new")
+        self.assertEqual(Tag.objects.count(), 2)
+
+        bookmark1 = Bookmark.objects.get(url="https://example.com/1")
+        self.assertEqual(bookmark1.owner, self.user)
+        self.assertEqual(bookmark1.url_normalized, "https://example.com/1")
+        self.assertEqual(bookmark1.title_sort_key, "1")
+        self.assertIsNotNone(bookmark1.date_added)
+        self.assertCountEqual(bookmark1.tags.all(), [existing_tag, new_tag])
+        bookmark2 = Bookmark.objects.get(url="https://example.com/2")
+        self.assertCountEqual(bookmark2.tags.all(), [new_tag])
+        bookmark3 = Bookmark.objects.get(url="https://example.com/3")
+        self.assertCountEqual(bookmark3.tags.all(), [])
+
+    def test_create_bookmarks_should_update_existing_bookmarks(self):
+        tag1 = self.setup_tag()
+        tag2 = self.setup_tag()
+        existing = self.setup_bookmark(
+            url="https://EXAMPLE.COM/path/", title="Old title", tags=[tag1]
+        )
+        trashed = self.setup_bookmark(url="https://example.com/trashed")
+        trash_bookmark(trashed)
+
+        with (
+            patch.object(tasks, "enrich_bookmarks"),
+            patch.object(tasks, "create_html_snapshots"),
+        ):
+            results = create_bookmarks(
+                [
+                    (Bookmark(url="https://example.com/path", title="New"), tag2.name),
+                    (Bookmark(url="https://example.com/trashed"), ""),
+                ],
+                self.user,
+            )
+
+        self.assertEqual(results[0], (existing, False))
+        self.assertEqual(results[1], (trashed, False))
+        self.assertEqual(Bookmark.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual(existing.title, "New")
+        self.assertEqual(existing.title_sort_key, "new")
+        self.assertCountEqual(existing.tags.all(), [tag2])
+        trashed.refresh_from_db()
+        self.assertFalse(trashed.is_deleted)
+
+    def test_create_bookmarks_should_deduplicate_urls_within_batch(self):
+        with (
+            patch.object(tasks, "enrich_bookmarks"),
+            patch.object(tasks, "create_html_snapshots"),
+        ):
+            results = create_bookmarks(
+                [
+                    (Bookmark(url="https://example.com", title="First"), "tag1"),
+                    (Bookmark(url="https://example.com/", title="Second"), "tag2"),
+                ],
+                self.user,
+            )
+
+        self.assertEqual([created for _bookmark, created in results], [True, False])
+        self.assertEqual(results[0][0], results[1][0])
+        bookmark = Bookmark.objects.get()
+        self.assertEqual(bookmark.title, "Second")
+        self.assertEqual(list(bookmark.tag_names), ["tag2"])
+
+    def test_create_bookmarks_should_schedule_enrichment_once(self):
+        existing = self.setup_bookmark(url="https://example.com/existing")
+
+        with (
+            patch.object(tasks, "enrich_bookmarks") as mock_enrich_bookmarks,
+            patch.object(tasks, "create_html_snapshots") as mock_create_html_snapshots,
+        ):
+            results = create_bookmarks(
+                [
+                    (Bookmark(url="https://example.com/new"), ""),
+                    (
+                        Bookmark(
+                            url="https://example.com/complete",
+                            title="Title",
+                            description="Description",
+                            preview_image_remote_url="https://example.com/image.png",
+                        ),
+                        "",
+                    ),
+                    (Bookmark(url="https://example.com/existing"), ""),
+                ],
+                self.user,
+            )
+
+        new, complete = results[0][0], results[1][0]
+        mock_enrich_bookmarks.assert_called_once_with(
+            self.user,
+            [new.id, complete.id, existing.id],
+            web_archive_bookmark_ids=[new.id, complete.id],
+            metadata_bookmark_ids=[new.id],
+        )
+        mock_create_html_snapshots.assert_called_once_with([new, complete])
+
+    def test_create_bookmarks_should_not_schedule_html_snapshots_when_disabled(self):
+        with (
+            patch.object(tasks, "enrich_bookmarks") as mock_enrich_bookmarks,
+            patch.object(tasks, "create_html_snapshots") as mock_create_html_snapshots,
+        ):
+            create_bookmarks(
+                [(Bookmark(url="https://example.com"), "")],
+                self.user,
+                disable_html_snapshot=True,
+                schedule_metadata_enrichment=False,
+            )
+
+        mock_create_html_snapshots.assert_not_called()
+        self.assertEqual(
+            mock_enrich_bookmarks.call_args.kwargs["metadata_bookmark_ids"], []
+        )
+
     def test_update_should_create_web_archive_snapshot_if_url_did_change(self):
         with patch.object(
             tasks, "create_web_archive_snapshot"
@@ -1,3 +1,8 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
 from datetime import timedelta
 from unittest import mock
 
@@ -10,9 +15,14 @@ from huey.contrib.djhuey import HUEY as huey
 from waybackpy.exceptions import WaybackError
 
 from bookmarks.models import BookmarkAsset, UserProfile
-from bookmarks.services import favicon_loader, tasks, website_loader
+from bookmarks.services import (
+    favicon_loader,
+    snapshot_workers,
+    tasks,
+    website_loader,
+)
 from bookmarks.services.website_loader import WebsiteMetadata
-from bookmarks.tests.helpers import BookmarkFactoryMixin
+from bookmarks.tests.helpers import BookmarkFactoryMixin, override_browser_profile
 
 
 def create_wayback_machine_save_api_mock(
@@ -33,6 +43,13 @@ class BookmarkTasksTestCase(TestCase, BookmarkFactoryMixin):
         huey.results = True
         huey.store_none = True
 
+        profile_parent_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_parent_dir, ignore_errors=True)
+        self.profile_dir = os.path.join(profile_parent_dir, "chromium-profile")
+        profile_override = override_browser_profile(self.profile_dir)
+        profile_override.enable()
+        self.addCleanup(profile_override.disable)
+
         self.mock_save_api = mock.Mock(
             archive_url="https://example.com/created_snapshot"
         )
@@ -713,6 +730,46 @@ class BookmarkTasksTestCase(TestCase, BookmarkFactoryMixin):
         self.assertEqual(next_wake_at, now + timedelta(seconds=10))
         self.assertNotEqual(newer_asset.id, older_asset.id)
 
+    @override_settings(LD_ENABLE_SNAPSHOTS=True)
+    def test_select_next_html_snapshot_asset_should_not_load_cooling_down_domains(
+        self,
+    ):
+        now = timezone.now()
+        for index in range(20):
+            self.setup_asset(
+                bookmark=self.setup_bookmark(url=f"https://example.com/{index}"),
+                asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+                status=BookmarkAsset.STATUS_PENDING,
+            )
+        other_asset = self.setup_asset(
+            bookmark=self.setup_bookmark(url="https://example.org/1"),
+            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+            status=BookmarkAsset.STATUS_PENDING,
+        )
+        # Newer assets of a cooling down domain are excluded by the query
+        self.setup_asset(
+            bookmark=self.setup_bookmark(url="https://docs.example.com/1"),
+            asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+            status=BookmarkAsset.STATUS_PENDING,
+        )
+        next_eligible_at = {"example.com": now + timedelta(seconds=10)}
+
+        with self.assertNumQueries(1):
+            asset, next_wake_at = tasks._select_next_html_snapshot_asset(
+                now, next_eligible_at
+            )
+
+        self.assertEqual(asset.id, other_asset.id)
+        self.assertIsNone(next_wake_at)
+
+        with self.assertNumQueries(2):
+            asset, next_wake_at = tasks._select_next_html_snapshot_asset(
+                now, next_eligible_at, busy_domains={"example.org"}
+            )
+
+        self.assertIsNone(asset)
+        self.assertEqual(next_wake_at, now + timedelta(seconds=10))
+
     @override_settings(LD_ENABLE_SNAPSHOTS=True)
     @override_settings(
         LD_SNAPSHOT_DOMAIN_COOLDOWN_MIN_SEC=7,
@@ -816,6 +873,91 @@ class BookmarkTasksTestCase(TestCase, BookmarkFactoryMixin):
         self.assertTrue(all(seconds <= 1 for seconds in sleep_calls))
         self.assertEqual(sum(sleep_calls), 5)
 
+    def setup_pending_snapshots(self, urls: list[str]) -> list[BookmarkAsset]:
+        return [
+            self.setup_asset(
+                bookmark=self.setup_bookmark(url=url),
+                asset_type=BookmarkAsset.TYPE_SNAPSHOT,
+                status=BookmarkAsset.STATUS_PENDING,
+            )
+            for url in urls
+        ]
+
+    @override_settings(LD_ENABLE_SNAPSHOTS=True, LD_SNAPSHOT_WORKERS=2)
+    def test_run_html_snapshot_dispatcher_loop_should_run_workers_in_parallel(self):
+        first_asset, second_asset = self.setup_pending_snapshots(
+            ["https://example.com/1", "https://example.org/1"]
+        )
+        # Both snapshots must run at the same time to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+        workers = {}
+
+        def create_snapshot(asset_id):
+            workers[asset_id] = snapshot_workers.get_current_worker()
+            barrier.wait()
+
+        with mock.patch(
+            "bookmarks.services.tasks._create_html_snapshot_task",
+            side_effect=create_snapshot,
+        ):
+            tasks._run_html_snapshot_dispatcher_loop(cooldown_func=lambda: 0)
+
+        self.assertFalse(barrier.broken)
+        self.assertCountEqual(workers.keys(), [first_asset.id, second_asset.id])
+        first_worker = workers[first_asset.id]
+        second_worker = workers[second_asset.id]
+        self.assertNotEqual(first_worker.id, second_worker.id)
+        self.assertNotEqual(first_worker.profile_dir, second_worker.profile_dir)
+        self.assertNotEqual(first_worker.temp_dir, second_worker.temp_dir)
+        # Temporary directories are removed after the run, profiles are kept
+        self.assertFalse(os.path.exists(first_worker.directory))
+        self.assertCountEqual(
+            [first_worker.profile_dir, second_worker.profile_dir],
+            [f"{self.profile_dir}-1", f"{self.profile_dir}-2"],
+        )
+        self.assertTrue(os.path.isdir(first_worker.profile_dir))
+        self.assertTrue(os.path.isdir(second_worker.profile_dir))
+
+        status = snapshot_workers.get_status()
+        self.assertFalse(status["active"])
+        self.assertEqual(
+            [worker["processed_count"] for worker in status["workers"]], [1, 1]
+        )
+
+    @override_settings(LD_ENABLE_SNAPSHOTS=True, LD_SNAPSHOT_WORKERS=3)
+    def test_run_html_snapshot_dispatcher_loop_should_not_run_domain_in_parallel(
+        self,
+    ):
+        assets = self.setup_pending_snapshots(
+            [
+                "https://docs.example.com/1",
+                "https://www.example.com/2",
+                "https://example.com/3",
+            ]
+        )
+        lock = threading.Lock()
+        running = []
+        max_running = []
+        processed_asset_ids = []
+
+        def create_snapshot(asset_id):
+            with lock:
+                running.append(asset_id)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(asset_id)
+                processed_asset_ids.append(asset_id)
+
+        with mock.patch(
+            "bookmarks.services.tasks._create_html_snapshot_task",
+            side_effect=create_snapshot,
+        ):
+            tasks._run_html_snapshot_dispatcher_loop(cooldown_func=lambda: 0)
+
+        self.assertCountEqual(processed_asset_ids, [asset.id for asset in assets])
+        self.assertEqual(max(max_running), 1)
+
     @override_settings(LD_ENABLE_SNAPSHOTS=True)
     def test_create_html_snapshot_should_handle_missing_asset(self):
         tasks._create_html_snapshot_task(123)
@@ -1072,3 +1214,81 @@ class BookmarkTasksTestCase(TestCase, BookmarkFactoryMixin):
 
             with self.assertRaises(website_loader.RetryableMetadataError):
                 tasks._enrich_metadata_task.call_local(bookmark.id)
+
+    def test_enrich_bookmarks_should_run_as_single_task(self):
+        bookmark1 = self.setup_bookmark(title="", description="")
+        bookmark2 = self.setup_bookmark(title="", description="")
+        mock_website_metadata = WebsiteMetadata(
+            url=bookmark1.url,
+            title="New title",
+            description="New description",
+            preview_image=None,
+        )
+
+        with mock.patch(
+            "bookmarks.services.tasks.load_website_metadata",
+            return_value=mock_website_metadata,
+        ):
+            tasks.enrich_bookmarks(
+                self.get_or_create_test_user(),
+                [bookmark1.id, bookmark2.id],
+                web_archive_bookmark_ids=[bookmark1.id],
+                metadata_bookmark_ids=[bookmark2.id],
+            )
+
+        bookmark1.refresh_from_db()
+        bookmark2.refresh_from_db()
+        self.assertEqual(self.executed_count(), 1)
+        self.assertEqual(bookmark1.favicon_file, "https_example_com.png")
+        self.assertEqual(bookmark2.favicon_file, "https_example_com.png")
+        self.assertEqual(bookmark1.preview_image_file, "preview_image.png")
+        self.assertEqual(bookmark2.preview_image_file, "preview_image.png")
+        self.assertEqual(
+            bookmark1.web_archive_snapshot_url, "https://example.com/created_snapshot"
+        )
+        self.assertEqual(bookmark2.web_archive_snapshot_url, "")
+        self.assertEqual(bookmark1.title, "")
+        self.assertEqual(bookmark2.title, "New title")
+
+    def test_enrich_bookmarks_should_use_fresh_cached_favicon(self):
+        bookmark = self.setup_bookmark()
+        self.mock_get_cached_favicon.return_value = favicon_loader.CachedFavicon(
+            filename="https_example_com_cached.png",
+            is_stale=False,
+        )
+
+        tasks.enrich_bookmarks(self.get_or_create_test_user(), [bookmark.id])
+        bookmark.refresh_from_db()
+
+        self.mock_load_favicon.assert_not_called()
+        self.assertEqual(bookmark.favicon_file, "https_example_com_cached.png")
+
+    def test_enrich_bookmarks_should_schedule_individual_task_on_failure(self):
+        bookmark1 = self.setup_bookmark()
+        bookmark2 = self.setup_bookmark()
+        self.mock_load_favicon.side_effect = [
+            Exception("failed"),
+            "https_example_com.png",
+            "https_example_com.png",
+        ]
+
+        tasks.enrich_bookmarks(
+            self.get_or_create_test_user(), [bookmark1.id, bookmark2.id]
+        )
+        bookmark1.refresh_from_db()
+        bookmark2.refresh_from_db()
+
+        # The batch task and the individual retry task
+        self.assertEqual(self.executed_count(), 2)
+        self.assertEqual(bookmark1.favicon_file, "https_example_com.png")
+        self.assertEqual(bookmark2.favicon_file, "https_example_com.png")
+
+    @override_settings(LD_DISABLE_BACKGROUND_TASKS=True)
+    def test_enrich_bookmarks_should_not_run_when_background_tasks_are_disabled(
+        self,
+    ):
+        bookmark = self.setup_bookmark()
+
+        tasks.enrich_bookmarks(self.get_or_create_test_user(), [bookmark.id])
+
+        self.assertEqual(self.executed_count(), 0)
@@ -0,0 +1,357 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bookmarks.models import (
+    CHANGE_LOG_LOCK_ID,
+    Bookmark,
+    BookmarkChange,
+    GlobalSettings,
+)
+from bookmarks.services import changes, tasks
+from bookmarks.services.bookmarks import (
+    archive_bookmarks,
+    create_bookmarks,
+    delete_bookmarks,
+    tag_bookmarks,
+    trash_bookmarks,
+)
+from bookmarks.services.importer import import_netscape_html
+from bookmarks.tests.helpers import (
+    BookmarkFactoryMixin,
+    BookmarkHtmlTag,
+    ImportTestMixin,
+)
+
+
+class ChangesServiceTestCase(TestCase, BookmarkFactoryMixin, ImportTestMixin):
+    def setUp(self) -> None:
+        self.get_or_create_test_user()
+
+    def get_latest_seq(self) -> int:
+        latest = BookmarkChange.objects.order_by("-id").first()
+        return latest.id if latest else 0
+
+    def create_bookmark(self) -> Bookmark:
+        # Unlike `setup_bookmark`, which saves twice, only logs a single change
+        bookmark = Bookmark(
+            url=f"https://example.com/{Bookmark.objects.count()}",
+            owner=self.user,
+            date_added=timezone.now(),
+            date_modified=timezone.now(),
+        )
+        bookmark.save()
+        return bookmark
+
+    def get_logged_changes(self, since: int) -> list[tuple[int, str]]:
+        return list(
+            BookmarkChange.objects.filter(id__gt=since)
+            .order_by("id")
+            .values_list("bookmark_id", "action")
+        )
+
+    def test_records_created_updated_and_deleted_bookmarks(self):
+        bookmark = self.create_bookmark()
+        bookmark_id = bookmark.id
+        bookmark.title = "Updated"
+        bookmark.save()
+        bookmark.delete()
+
+        self.assertEqual(
+            self.get_logged_changes(0),
+            [
+                (bookmark_id, BookmarkChange.ACTION_CREATED),
+                (bookmark_id, BookmarkChange.ACTION_UPDATED),
+                (bookmark_id, BookmarkChange.ACTION_DELETED),
+            ],
+        )
+
+    def test_records_bulk_updates(self):
+        bookmark1 = self.setup_bookmark()
+        bookmark2 = self.setup_bookmark()
+        other_user_bookmark = self.setup_bookmark(user=self.setup_user())
+        since = self.get_latest_seq()
+
+        ids = [bookmark1.id, bookmark2.id, other_user_bookmark.id]
+        archive_bookmarks(ids, self.user)
+        trash_bookmarks(ids, self.user)
+
+        self.assertEqual(
+            self.get_logged_changes(since),
+            [
+                (bookmark1.id, BookmarkChange.ACTION_UPDATED),
+                (bookmark2.id, BookmarkChange.ACTION_UPDATED),
+            ]
+            * 2,
+        )
+
+    def test_records_bulk_deletes(self):
+        bookmark1 = self.setup_bookmark()
+        bookmark2 = self.setup_bookmark()
+        since = self.get_latest_seq()
+
+        delete_bookmarks([bookmark1.id, bookmark2.id], self.user)
+
+        self.assertCountEqual(
+            self.get_logged_changes(since),
+            [
+                (bookmark1.id, BookmarkChange.ACTION_DELETED),
+                (bookmark2.id, BookmarkChange.ACTION_DELETED),
+            ],
+        )
+
+    def test_records_tag_changes(self):
+        tag = self.setup_tag()
+        bookmark1 = self.setup_bookmark(tags=[tag])
+        bookmark2 = self.setup_bookmark()
+        since = self.get_latest_seq()
+
+        tag_bookmarks([bookmark2.id], "other", self.user)
+        self.assertEqual(
+            self.get_logged_changes(since),
+            [(bookmark2.id, BookmarkChange.ACTION_UPDATED)],
+        )
+
+        since = self.get_latest_seq()
+        tag.name = "renamed"
+        tag.save()
+        self.assertEqual(
+            self.get_logged_changes(since),
+            [(bookmark1.id, BookmarkChange.ACTION_UPDATED)],
+        )
+
+        since = self.get_latest_seq()
+        tag.delete()
+        self.assertEqual(
+            self.get_logged_changes(since),
+            [(bookmark1.id, BookmarkChange.ACTION_UPDATED)],
+        )
+
+    def test_records_batch_creates(self):
+        existing = self.setup_bookmark(url="https://example.com/existing")
+        since = self.get_latest_seq()
+
+        with (
+            patch.object(tasks, "enrich_bookmarks"),
+            patch.object(tasks, "create_html_snapshots"),
+        ):
+            create_bookmarks(
+                [
+                    (Bookmark(url="https://example.com/new"), ""),
+                    (Bookmark(url="https://example.com/existing"), ""),
+                ],
+                self.user,
+            )
+
+        new = Bookmark.objects.get(url="https://example.com/new")
+        self.assertEqual(
+            self.get_logged_changes(since),
+            [
+                (new.id, BookmarkChange.ACTION_CREATED),
+                (existing.id, BookmarkChange.ACTION_UPDATED),
+            ],
+        )
+
+    def test_records_imports(self):
+        existing = self.setup_bookmark(url="https://example.com/existing")
+        since = self.get_latest_seq()
+
+        html = self.render_html(
+            tags=[
+                BookmarkHtmlTag(href="https://example.com/new"),
+                BookmarkHtmlTag(href="https://example.com/existing"),
+            ]
+        )
+        import_netscape_html(html, self.user)
+
+        new = Bookmark.objects.get(url="https://example.com/new")
+        self.assertCountEqual(
+            self.get_logged_changes(since),
+            [
+                (new.id, BookmarkChange.ACTION_CREATED),
+                (existing.id, BookmarkChange.ACTION_UPDATED),
+            ],
+        )
+
+    def test_does_not_record_changes_of_deleted_users(self):
+        user = self.setup_user()
+        self.setup_bookmark(user=user, tags=[self.setup_tag(user=user)])
+
+        user.delete()
+
+        self.assertFalse(BookmarkChange.objects.filter(owner_id=user.id).exists())
+
+    def test_get_changes(self):
+        bookmark1 = self.create_bookmark()
+        bookmark2 = self.create_bookmark()
+        self.setup_bookmark(user=self.setup_user())
+        bookmark1.title = "Updated"
+        bookmark1.save()
+
+        page = changes.get_changes(self.user, 0, 10)
+
+        # Changes of the same bookmark are collapsed into the latest one
+        self.assertEqual(
+            [(c.bookmark_id, c.action) for c in page.changes],
+            [
+                (bookmark2.id, BookmarkChange.ACTION_CREATED),
+                (bookmark1.id, BookmarkChange.ACTION_UPDATED),
+            ],
+        )
+        self.assertEqual(page.changes[1].bookmark.title, "Updated")
+        self.assertEqual(page.next_since, page.changes[1].seq)
+        self.assertFalse(page.has_more)
+
+        page = changes.get_changes(self.user, page.next_since, 10)
+        self.assertEqual(page.changes, [])
+        self.assertFalse(page.has_more)
+
+    def test_get_changes_in_pages(self):
+        bookmarks = [self.create_bookmark() for _ in range(5)]
+
+        page = changes.get_changes(self.user, 0, 3)
+        self.assertEqual(
+            [c.bookmark_id for c in page.changes], [b.id for b in bookmarks[:3]]
+        )
+        self.assertTrue(page.has_more)
+
+        page = changes.get_changes(self.user, page.next_since, 3)
+        self.assertEqual(
+            [c.bookmark_id for c in page.changes], [b.id for b in bookmarks[3:]]
+        )
+        self.assertFalse(page.has_more)
+
+    def test_get_changes_reports_deleted_bookmarks(self):
+        bookmark = self.setup_bookmark()
+        bookmark_id = bookmark.id
+        since = self.get_latest_seq()
+        bookmark.title = "Updated"
+        bookmark.save()
+        bookmark.delete()
+
+        # Only load the update, the bookmark has been deleted since
+        page = changes.get_changes(self.user, since, 1)
+
+        self.assertEqual(len(page.changes), 1)
+        self.assertEqual(page.changes[0].bookmark_id, bookmark_id)
+        self.assertEqual(page.changes[0].action, BookmarkChange.ACTION_DELETED)
+        self.assertIsNone(page.changes[0].bookmark)
+
+    def test_compact_changes(self):
+        bookmark1 = self.create_bookmark()
+        bookmark2 = self.create_bookmark()
+        since = self.get_latest_seq()
+        bookmark1.save()
+        bookmark1_id = bookmark1.id
+        bookmark1.delete()
+        bookmark2.save()
+
+        deleted_count = changes.compact_changes()
+
+        self.assertEqual(deleted_count, 3)
+        self.assertEqual(
+            self.get_logged_changes(0),
+            [
+                (bookmark1_id, BookmarkChange.ACTION_DELETED),
+                (bookmark2.id, BookmarkChange.ACTION_UPDATED),
+            ],
+        )
+        # Clients that synced before still see all changed bookmarks
+        page = changes.get_changes(self.user, since, 10)
+        self.assertEqual(
+            [c.bookmark_id for c in page.changes], [bookmark1_id, bookmark2.id]
+        )
+
+    def test_compact_changes_prunes_expired_deleted_bookmarks(self):
+        deleted1 = self.create_bookmark()
+        deleted2 = self.create_bookmark()
+        kept = self.create_bookmark()
+        since = self.get_latest_seq()
+        deleted1_id = deleted1.id
+        deleted2_id = deleted2.id
+        deleted1.delete()
+        pruned_seq = self.get_latest_seq()
+        deleted2.delete()
+        BookmarkChange.objects.filter(id__lte=pruned_seq).update(
+            date=timezone.now() - timedelta(days=91)
+        )
+
+        with override_settings(LD_CHANGES_RETENTION_DAYS=90):
+            changes.compact_changes()
+
+        # Only the expired tombstone is removed, other changes are kept
+        self.assertEqual(
+            self.get_logged_changes(0),
+            [
+                (kept.id, BookmarkChange.ACTION_CREATED),
+                (deleted2_id, BookmarkChange.ACTION_DELETED),
+            ],
+        )
+        self.assertNotIn(
+            deleted1_id, BookmarkChange.objects.values_list("bookmark_id", flat=True)
+        )
+        self.assertEqual(GlobalSettings.get().bookmark_changes_pruned_seq, pruned_seq)
+
+        # Clients that synced before the removed tombstone have to sync again
+        self.assertTrue(changes.get_changes(self.user, since, 10).reset)
+        self.assertFalse(changes.get_changes(self.user, 0, 10).reset)
+        self.assertFalse(changes.get_changes(self.user, pruned_seq, 10).reset)
+
+    @override_settings(LD_CHANGES_RETENTION_DAYS=0)
+    def test_compact_changes_keeps_deleted_bookmarks_without_retention(self):
+        bookmark = self.create_bookmark()
+        bookmark.delete()
+        BookmarkChange.objects.update(date=timezone.now() - timedelta(days=3650))
+
+        changes.compact_changes()
+
+        self.assertEqual(BookmarkChange.objects.count(), 1)
+        self.assertEqual(changes.get_pruned_seq(), 0)
+
+    def test_records_changes_in_commit_order_on_postgres(self):
+        other_user = self.setup_user()
+        bookmark1 = self.setup_bookmark()
+        bookmark2 = self.setup_bookmark(user=other_user)
+        # Allow running the lock statement on SQLite
+        connection.connection.create_function(
+            "pg_advisory_xact_lock", 2, lambda namespace, key: None
+        )
+
+        with (
+            patch.object(connection, "vendor", "postgresql"),
+            CaptureQueriesContext(connection) as context,
+        ):
+            BookmarkChange.record_query(
+                Bookmark.objects.filter(id__in=[bookmark1.id, bookmark2.id])
+            )
+
+        lock_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if "pg_advisory_xact_lock" in query["sql"]
+        ]
+        # Locks are taken in a fixed order, before inserting the changes
+        self.assertEqual(
+            lock_queries,
+            [
+                f"SELECT pg_advisory_xact_lock({CHANGE_LOG_LOCK_ID}, {self.user.id})",
+                f"SELECT pg_advisory_xact_lock({CHANGE_LOG_LOCK_ID}, {other_user.id})",
+            ],
+        )
+        insert_index = next(
+            index
+            for index, query in enumerate(context.captured_queries)
+            if query["sql"].startswith('INSERT INTO "bookmarks_bookmarkchange"')
+        )
+        self.assertGreater(
+            insert_index,
+            max(
+                index
+                for index, query in enumerate(context.captured_queries)
+                if "pg_advisory_xact_lock" in query["sql"]
+            ),
+        )
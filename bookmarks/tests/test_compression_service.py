@@ -0,0 +1,153 @@
+import io
+import os
+import unittest
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bookmarks.models import BookmarkAsset, CompressionDictionary
+from bookmarks.services import assets, compression
+from bookmarks.tests.helpers import BookmarkFactoryMixin
+
+
+def generate_snapshot(index: int) -> bytes:
+    styles = "".join(
+        f".class-{i} {{ margin: {i}px; color: #{i:06x}; }}" for i in range(50)
+    )
+    paragraphs = "".join(
+        f"<p>Paragraph {i} of page {index}, with some text.</p>"
+        for i in range(index % 7 + 3)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>Page {index}</title>"
+        f"<style>{styles}</style></head><body><h1>Page {index}</h1>"
+        f"{paragraphs}</body></html>"
+    ).encode()
+
+
+@unittest.skipUnless(compression.is_zstd_available(), "zstandard is not installed")
+@override_settings(LD_SNAPSHOT_COMPRESSION="zstd")
+class CompressionServiceTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self) -> None:
+        self.setup_temp_assets_dir()
+        self.get_or_create_test_user()
+        compression.clear_dictionary_cache()
+
+    def read_asset(self, asset: BookmarkAsset) -> bytes:
+        with compression.open_asset_file(asset) as f:
+            return f.read()
+
+    def get_asset_filepath(self, asset: BookmarkAsset) -> str:
+        return os.path.join(self.assets_dir, asset.file)
+
+    def setup_snapshots(self, count: int) -> list[BookmarkAsset]:
+        return [
+            assets.upload_snapshot(
+                self.setup_bookmark(url=f"https://example.com/{i}"),
+                generate_snapshot(i),
+            )
+            for i in range(count)
+        ]
+
+    def test_stores_snapshots_with_zstd(self):
+        bookmark = self.setup_bookmark()
+        html = generate_snapshot(1)
+
+        asset = assets.upload_snapshot(bookmark, html)
+
+        self.assertEqual(asset.codec, BookmarkAsset.CODEC_ZSTD)
+        self.assertFalse(asset.gzip)
+        self.assertIsNone(asset.compression_dictionary)
+        self.assertTrue(asset.file.endswith(".html.zst"))
+        self.assertEqual(self.read_asset(asset), html)
+        self.assertEqual(
+            compression.get_content_size(asset, self.get_asset_filepath(asset)),
+            len(html),
+        )
+
+    def test_stores_snapshots_with_latest_dictionary(self):
+        self.setup_snapshots(100)
+        dictionary = compression.train_snapshot_dictionary(dictionary_size=4 * 1024)
+        html = generate_snapshot(1000)
+
+        asset = assets.upload_snapshot(self.setup_bookmark(), html)
+
+        self.assertEqual(dictionary.sample_count, 100)
+        self.assertEqual(asset.compression_dictionary, dictionary)
+        compression.clear_dictionary_cache()
+        asset.refresh_from_db()
+        self.assertEqual(self.read_asset(asset), html)
+
+    def test_view_and_read_decompress_snapshots(self):
+        self.client.force_login(self.user)
+        html = generate_snapshot(1)
+        asset = assets.upload_snapshot(self.setup_bookmark(), html)
+
+        response = self.client.get(
+            reverse("linkding:assets.view", args=[asset.id]),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), html)
+
+        response = self.client.get(
+            reverse("linkding:assets.view", args=[asset.id]), HTTP_RANGE="bytes=10-19"
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), html[10:20])
+
+        response = self.client.get(reverse("linkding:assets.read", args=[asset.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Paragraph 1 of page 1")
+
+    def test_view_and_read_without_zstandard(self):
+        self.client.force_login(self.user)
+        asset = assets.upload_snapshot(self.setup_bookmark(), generate_snapshot(1))
+
+        with mock.patch.object(compression, "zstandard", None):
+            with self.assertRaises(compression.CompressionUnavailableError):
+                compression.open_asset_file(asset)
+
+            response = self.client.get(reverse("linkding:assets.view", args=[asset.id]))
+            self.assertEqual(response.status_code, 503)
+
+            response = self.client.get(reverse("linkding:assets.read", args=[asset.id]))
+            self.assertEqual(response.status_code, 503)
+
+    @override_settings(LD_SNAPSHOT_COMPRESSION="gzip")
+    def test_stores_snapshots_with_gzip_by_default(self):
+        asset = assets.upload_snapshot(self.setup_bookmark(), generate_snapshot(1))
+
+        self.assertEqual(asset.codec, BookmarkAsset.CODEC_GZIP)
+        self.assertTrue(asset.gzip)
+        self.assertTrue(asset.file.endswith(".html.gz"))
+
+    def test_falls_back_to_gzip_without_zstandard(self):
+        with mock.patch.object(compression, "zstandard", None):
+            asset = assets.upload_snapshot(self.setup_bookmark(), generate_snapshot(1))
+
+        self.assertEqual(asset.codec, BookmarkAsset.CODEC_GZIP)
+        self.assertTrue(asset.gzip)
+
+    def test_train_dictionary_command(self):
+        self.setup_snapshots(100)
+        out = io.StringIO()
+
+        call_command("train_snapshot_dictionary", "--size=4096", stdout=out)
+
+        dictionary = CompressionDictionary.objects.get()
+        self.assertEqual(len(dictionary.data), 4096)
+        self.assertIn("Trained dictionary", out.getvalue())
+
+    def test_benchmark_command(self):
+        self.setup_snapshots(100)
+        out = io.StringIO()
+
+        call_command("benchmark_snapshot_compression", stdout=out)
+
+        output = out.getvalue()
+        for codec in ["gzip-9", "zstd-12", "zstd-12+dict"]:
+            self.assertIn(codec, output)
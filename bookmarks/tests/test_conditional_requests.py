@@ -0,0 +1,272 @@
+from unittest.mock import patch
+
+from django.contrib import messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.syndication.views import Feed
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from bookmarks import feeds
+from bookmarks.api.serializers import BookmarkValuesSerializer
+from bookmarks.models import FeedToken, Toast
+from bookmarks.tests.helpers import BookmarkFactoryMixin, LinkdingApiTestCase
+from bookmarks.views import bookmarks as bookmark_views
+from bookmarks.views import conditional
+
+
+class BookmarkPageConditionalRequestsTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self) -> None:
+        self.user = self.get_or_create_test_user()
+        self.client.force_login(self.user)
+
+    def get_etag(self, url: str) -> str:
+        # The first request sets the CSRF cookie, which is part of the ETag
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        return response["ETag"]
+
+    def get_conditional(self, url: str, etag: str):
+        with patch.object(
+            bookmark_views,
+            "render_bookmarks_view",
+            wraps=bookmark_views.render_bookmarks_view,
+        ) as render_mock:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, render_mock
+
+    def test_repeated_requests_skip_rendering(self):
+        self.setup_bookmark()
+        url = reverse("linkding:bookmarks.index")
+        etag = self.get_etag(url)
+
+        response, render_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        render_mock.assert_not_called()
+
+    def test_sets_cache_headers(self):
+        response = self.client.get(reverse("linkding:bookmarks.index"))
+
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("Turbo-Frame", response["Vary"])
+
+    def test_renders_after_bookmark_changes(self):
+        bookmark = self.setup_bookmark()
+        url = reverse("linkding:bookmarks.index")
+        etag = self.get_etag(url)
+
+        bookmark.title = "Updated"
+        bookmark.save()
+        response, render_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+        render_mock.assert_called_once()
+
+    def test_renders_after_tag_changes(self):
+        tag = self.setup_tag()
+        self.setup_bookmark(tags=[tag])
+        url = reverse("linkding:bookmarks.archived")
+        etag = self.get_etag(url)
+
+        tag.name = "renamed"
+        tag.save()
+        response, _ = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_renders_after_profile_changes(self):
+        url = reverse("linkding:bookmarks.index")
+        etag = self.get_etag(url)
+
+        self.user.profile.bookmark_description_display = "separate"
+        self.user.profile.save()
+        response, _ = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_renders_after_bundle_changes(self):
+        bundle = self.setup_bundle()
+        url = reverse("linkding:bookmarks.index")
+        etag = self.get_etag(url)
+
+        bundle.name = "Renamed"
+        bundle.save()
+        response, _ = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_renders_after_acknowledging_toast(self):
+        toast = Toast.objects.create(
+            owner=self.user, key="test", message="Test toast", acknowledged=False
+        )
+        url = reverse("linkding:bookmarks.index")
+        etag = self.get_etag(url)
+
+        response = self.client.post(
+            reverse("linkding:toasts.acknowledge") + f"?return_url={url}",
+            {"toast": toast.id},
+        )
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        response, render_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+        render_mock.assert_called_once()
+        self.assertNotContains(response, "Test toast")
+
+    def test_renders_for_different_search(self):
+        url = reverse("linkding:bookmarks.index")
+        etag = self.get_etag(url)
+
+        response, _ = self.get_conditional(url + "?q=example", etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_skips_validation_with_pending_messages(self):
+        request = RequestFactory().get(reverse("linkding:bookmarks.index"))
+        request._messages = CookieStorage(request)
+        messages.success(request, "Saved")
+
+        self.assertIsNone(conditional.bookmark_page_etag(request))
+
+    def test_shared_page_renders_after_changes_of_other_users(self):
+        other_user = self.setup_user(enable_sharing=True)
+        bookmark = self.setup_bookmark(user=other_user, shared=True)
+        url = reverse("linkding:bookmarks.shared")
+        etag = self.get_etag(url)
+
+        response, render_mock = self.get_conditional(url, etag)
+        self.assertEqual(response.status_code, 304)
+        render_mock.assert_not_called()
+
+        bookmark.title = "Updated"
+        bookmark.save()
+        response, _ = self.get_conditional(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        other_user.profile.enable_sharing = False
+        other_user.profile.save()
+        response, _ = self.get_conditional(url, etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class FeedConditionalRequestsTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self) -> None:
+        self.user = self.get_or_create_test_user()
+        self.token = FeedToken.objects.get_or_create(user=self.user)[0]
+
+    def get_conditional(self, url: str, etag: str):
+        with patch.object(
+            feeds.BaseBookmarksFeed,
+            "get_feed",
+            autospec=True,
+            side_effect=Feed.get_feed,
+        ) as get_feed_mock:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, get_feed_mock
+
+    def test_repeated_requests_skip_rendering(self):
+        self.setup_bookmark()
+        url = reverse("linkding:feeds.all", args=[self.token.key])
+        etag = self.client.get(url)["ETag"]
+
+        response, get_feed_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 304)
+        get_feed_mock.assert_not_called()
+
+    def test_renders_after_bookmark_changes(self):
+        url = reverse("linkding:feeds.unread", args=[self.token.key])
+        etag = self.client.get(url)["ETag"]
+
+        self.setup_bookmark(unread=True)
+        response, get_feed_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, 200)
+        get_feed_mock.assert_called_once()
+
+    def test_public_shared_feed(self):
+        other_user = self.setup_user(enable_sharing=True, enable_public_sharing=True)
+        self.setup_bookmark(user=other_user, shared=True)
+        url = reverse("linkding:feeds.public_shared")
+        etag = self.client.get(url)["ETag"]
+
+        response, get_feed_mock = self.get_conditional(url, etag)
+        self.assertEqual(response.status_code, 304)
+        get_feed_mock.assert_not_called()
+
+        other_user.profile.enable_public_sharing = False
+        other_user.profile.save()
+        response, _ = self.get_conditional(url, etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_feed_token(self):
+        url = reverse("linkding:feeds.all", args=["invalid"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"etag"')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiConditionalRequestsTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
+    def get_conditional(self, url: str, etag: str):
+        with patch.object(
+            BookmarkValuesSerializer,
+            "to_representation",
+            autospec=True,
+            side_effect=BookmarkValuesSerializer.to_representation,
+        ) as serialize_mock:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, serialize_mock
+
+    def test_repeated_requests_skip_serialization(self):
+        self.authenticate()
+        self.setup_bookmark()
+        url = reverse("linkding:bookmark-list")
+        etag = self.get(url)["ETag"]
+
+        response, serialize_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        serialize_mock.assert_not_called()
+
+    def test_serializes_after_bookmark_changes(self):
+        self.authenticate()
+        bookmark = self.setup_bookmark()
+        url = reverse("linkding:bookmark-archived")
+        etag = self.get(url)["ETag"]
+
+        bookmark.is_archived = True
+        bookmark.save()
+        response, serialize_mock = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        serialize_mock.assert_called_once()
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_etag_depends_on_query(self):
+        self.authenticate()
+        url = reverse("linkding:bookmark-list")
+        etag = self.get(url)["ETag"]
+
+        response, _ = self.get_conditional(f"{url}?limit=1", etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_user(self):
+        self.authenticate()
+        url = reverse("linkding:bookmark-list")
+        etag = self.get(url)["ETag"]
+
+        other_user = self.setup_user()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.setup_api_token(user=other_user).key
+        )
+        response, _ = self.get_conditional(url, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,89 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from bookmarks.db_routers import (
+    PRIMARY_STICKY_COOKIE,
+    READ_REPLICA_ALIAS,
+    ReadReplicaRouter,
+    read_from_replica,
+    use_read_replica,
+)
+from bookmarks.middlewares import ReadReplicaMiddleware
+from bookmarks.models import Bookmark
+
+
+class ReadReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_database_view(self, request):
+        return HttpResponse(self.router.db_for_read(Bookmark))
+
+    def test_reads_from_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Bookmark), "default")
+        self.assertEqual(self.router.db_for_write(Bookmark), "default")
+
+    def test_reads_from_replica_within_context(self):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Bookmark), READ_REPLICA_ALIAS)
+            self.assertEqual(self.router.db_for_write(Bookmark), "default")
+
+        self.assertEqual(self.router.db_for_read(Bookmark), "default")
+
+    def test_reads_from_primary_after_write(self):
+        with read_from_replica():
+            self.router.db_for_write(Bookmark)
+
+            self.assertEqual(self.router.db_for_read(Bookmark), "default")
+
+    def test_only_allows_migrating_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "bookmarks"))
+        self.assertFalse(self.router.allow_migrate(READ_REPLICA_ALIAS, "bookmarks"))
+
+    @override_settings(USE_READ_REPLICA=True)
+    def test_use_read_replica_for_get_requests(self):
+        view = use_read_replica(self.read_database_view)
+
+        response = view(self.factory.get("/bookmarks"))
+        self.assertEqual(response.content.decode(), READ_REPLICA_ALIAS)
+
+        response = view(self.factory.head("/bookmarks"))
+        self.assertEqual(response.content.decode(), READ_REPLICA_ALIAS)
+
+    @override_settings(USE_READ_REPLICA=True)
+    def test_use_read_replica_uses_primary_for_other_requests(self):
+        view = use_read_replica(self.read_database_view)
+
+        response = view(self.factory.post("/bookmarks"))
+
+        self.assertEqual(response.content.decode(), "default")
+
+    @override_settings(USE_READ_REPLICA=True)
+    def test_use_read_replica_uses_primary_for_sticky_clients(self):
+        view = use_read_replica(self.read_database_view)
+        request = self.factory.get("/bookmarks")
+        request.COOKIES[PRIMARY_STICKY_COOKIE] = "1"
+
+        response = view(request)
+
+        self.assertEqual(response.content.decode(), "default")
+
+    @override_settings(USE_READ_REPLICA=False)
+    def test_use_read_replica_uses_primary_without_replica(self):
+        view = use_read_replica(self.read_database_view)
+
+        response = view(self.factory.get("/bookmarks"))
+
+        self.assertEqual(response.content.decode(), "default")
+
+    @override_settings(LD_DB_REPLICA_STICKY_SECONDS=5)
+    def test_middleware_sets_sticky_cookie_after_modifying_requests(self):
+        middleware = ReadReplicaMiddleware(lambda request: HttpResponse())
+
+        response = middleware(self.factory.get("/bookmarks"))
+        self.assertNotIn(PRIMARY_STICKY_COOKIE, response.cookies)
+
+        response = middleware(self.factory.post("/bookmarks"))
+        self.assertIn(PRIMARY_STICKY_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[PRIMARY_STICKY_COOKIE]["max-age"], 5)
@@ -1,13 +1,17 @@
 import datetime
 import email
+import sys
+import unicodedata
 import unittest
 import urllib.parse
+from unittest.mock import patch
 
 from django.conf import settings
-from django.test import TestCase
+from django.contrib.syndication.views import Feed
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
-from bookmarks.feeds import sanitize
+from bookmarks.feeds import AllBookmarksFeed, clear_feed_cache, sanitize
 from bookmarks.models import FeedToken, User
 from bookmarks.tests.helpers import BookmarkFactoryMixin
 
@@ -363,6 +367,22 @@ class FeedsTestCase(TestCase, BookmarkFactoryMixin):
     def test_sanitize_with_none_text(self):
         self.assertEqual("", sanitize(None))
 
+    def test_sanitize_removes_all_other_category_characters(self):
+        text = (
+            "".join(
+                chr(code_point)
+                for code_point in range(0, sys.maxunicode + 1, 7)
+                if not 0xD800 <= code_point <= 0xDFFF
+            )
+            + "\n\r\t\ufeff\U000e0001\U0010ffff"
+        )
+        expected = "".join(
+            ch for ch in text if ch in "\n\r\t" or unicodedata.category(ch)[0] != "C"
+        )
+
+        self.assertEqual(sanitize(text), expected)
+        self.assertEqual(sanitize("plain title"), "plain title")
+
     def test_with_bundle(self):
         tag1 = self.setup_tag()
         visible_bookmarks = [
@@ -409,3 +429,29 @@ class FeedsTestCase(TestCase, BookmarkFactoryMixin):
             reverse("linkding:feeds.all", args=[self.token.key]) + "?bundle=invalid"
         )
         self.assertEqual(response.status_code, 404)
+
+    @override_settings(FEED_CACHE_TIMEOUT=60)
+    def test_caches_rendered_feeds(self):
+        clear_feed_cache()
+        self.addCleanup(clear_feed_cache)
+        bookmark = self.setup_bookmark(title="test bookmark")
+        url = reverse("linkding:feeds.all", args=[self.token.key])
+        response = self.client.get(url)
+
+        with patch.object(
+            AllBookmarksFeed, "get_feed", autospec=True, side_effect=Feed.get_feed
+        ) as get_feed_mock:
+            cached_response = self.client.get(url)
+            get_feed_mock.assert_not_called()
+            self.assertEqual(cached_response.status_code, 200)
+            self.assertEqual(cached_response.content, response.content)
+            self.assertEqual(cached_response["Content-Type"], response["Content-Type"])
+
+            bookmark.title = "updated bookmark"
+            bookmark.save()
+            response = self.client.get(url)
+            get_feed_mock.assert_called_once()
+            self.assertContains(response, "<title>updated bookmark</title>")
+
+            response = self.client.get(url + "?limit=1")
+            self.assertEqual(get_feed_mock.call_count, 2)
@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from huey.contrib.djhuey import HUEY as huey
+
+from bookmarks.models import defer_file_cleanup
+from bookmarks.services import bookmarks, file_cleanup
+from bookmarks.tests.helpers import BookmarkFactoryMixin
+
+
+class FileCleanupServiceTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self):
+        self.setup_temp_assets_dir()
+        self.previews_dir = tempfile.mkdtemp()
+        self.previews_override = override_settings(LD_PREVIEW_FOLDER=self.previews_dir)
+        self.previews_override.enable()
+        # Other test cases disable immediate mode, the files are removed by a
+        # task
+        self.huey_immediate = huey.immediate
+        huey.immediate = True
+
+    def tearDown(self):
+        huey.immediate = self.huey_immediate
+        self.previews_override.disable()
+        shutil.rmtree(self.previews_dir)
+
+    def create_file(self, folder: str, filename: str, age_seconds: int = 0):
+        filepath = os.path.join(folder, filename)
+        with open(filepath, "w") as f:
+            f.write("test")
+        if age_seconds:
+            timestamp = time.time() - age_seconds
+            os.utime(filepath, (timestamp, timestamp))
+        return filepath
+
+    def setup_bookmark_with_files(self):
+        bookmark = self.setup_bookmark()
+        bookmark.preview_image_file = f"preview_{bookmark.id}.jpg"
+        bookmark.save()
+        self.create_file(settings.LD_PREVIEW_FOLDER, bookmark.preview_image_file)
+        asset = self.setup_asset(bookmark, file=f"snapshot_{bookmark.id}.html.gz")
+        self.create_file(settings.LD_ASSET_FOLDER, asset.file)
+        return bookmark, asset
+
+    def test_defer_file_cleanup_collects_files_instead_of_removing_them(self):
+        bookmark, asset = self.setup_bookmark_with_files()
+        preview_path = os.path.join(
+            settings.LD_PREVIEW_FOLDER, bookmark.preview_image_file
+        )
+        asset_path = os.path.join(settings.LD_ASSET_FOLDER, asset.file)
+
+        with defer_file_cleanup() as filepaths:
+            bookmark.delete()
+
+        self.assertCountEqual(filepaths, [preview_path, asset_path])
+        self.assertTrue(os.path.exists(preview_path))
+        self.assertTrue(os.path.exists(asset_path))
+
+    def test_delete_bookmarks_removes_files_in_single_batch(self):
+        bookmark1, asset1 = self.setup_bookmark_with_files()
+        bookmark2, asset2 = self.setup_bookmark_with_files()
+
+        with mock.patch(
+            "bookmarks.services.tasks.file_cleanup.delete_files",
+            wraps=file_cleanup.delete_files,
+        ) as mock_delete_files:
+            bookmarks.delete_bookmarks(
+                [bookmark1.id, bookmark2.id], self.get_or_create_test_user()
+            )
+
+        mock_delete_files.assert_called_once()
+        self.assertEqual(len(mock_delete_files.call_args[0][0]), 4)
+        self.assertEqual(os.listdir(settings.LD_ASSET_FOLDER), [])
+        self.assertEqual(os.listdir(settings.LD_PREVIEW_FOLDER), [])
+
+    @override_settings(LD_DISABLE_BACKGROUND_TASKS=True)
+    def test_delete_bookmarks_removes_files_when_background_tasks_are_disabled(self):
+        bookmark, asset = self.setup_bookmark_with_files()
+
+        bookmarks.delete_bookmarks([bookmark.id], self.get_or_create_test_user())
+
+        self.assertEqual(os.listdir(settings.LD_ASSET_FOLDER), [])
+        self.assertEqual(os.listdir(settings.LD_PREVIEW_FOLDER), [])
+
+    def test_delete_files_keeps_files_that_are_still_referenced(self):
+        bookmark, asset = self.setup_bookmark_with_files()
+        preview_path = os.path.join(
+            settings.LD_PREVIEW_FOLDER, bookmark.preview_image_file
+        )
+        asset_path = os.path.join(settings.LD_ASSET_FOLDER, asset.file)
+        unreferenced_path = self.create_file(settings.LD_ASSET_FOLDER, "other.gz")
+
+        deleted_count = file_cleanup.delete_files(
+            [preview_path, asset_path, unreferenced_path]
+        )
+
+        self.assertEqual(deleted_count, 1)
+        self.assertTrue(os.path.exists(preview_path))
+        self.assertTrue(os.path.exists(asset_path))
+        self.assertFalse(os.path.exists(unreferenced_path))
+
+    def test_delete_files_ignores_files_outside_of_data_folders(self):
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir)
+        other_path = self.create_file(other_dir, "file.txt")
+
+        deleted_count = file_cleanup.delete_files([other_path])
+
+        self.assertEqual(deleted_count, 0)
+        self.assertTrue(os.path.exists(other_path))
+
+    def test_delete_files_ignores_missing_files(self):
+        missing_path = os.path.join(settings.LD_ASSET_FOLDER, "missing.gz")
+
+        deleted_count = file_cleanup.delete_files([missing_path])
+
+        self.assertEqual(deleted_count, 0)
+
+    def test_sweep_orphaned_files(self):
+        bookmark, asset = self.setup_bookmark_with_files()
+        os.utime(os.path.join(settings.LD_ASSET_FOLDER, asset.file), (0, 0))
+        orphaned_asset = self.create_file(
+            settings.LD_ASSET_FOLDER, "orphaned.html.gz", age_seconds=7200
+        )
+        orphaned_preview = self.create_file(
+            settings.LD_PREVIEW_FOLDER, "orphaned.jpg", age_seconds=7200
+        )
+        recent_asset = self.create_file(settings.LD_ASSET_FOLDER, "recent.tmp")
+        os.mkdir(os.path.join(settings.LD_PREVIEW_FOLDER, "tmp"))
+
+        deleted_count = file_cleanup.sweep_orphaned_files()
+
+        self.assertEqual(deleted_count, 2)
+        self.assertFalse(os.path.exists(orphaned_asset))
+        self.assertFalse(os.path.exists(orphaned_preview))
+        self.assertTrue(os.path.exists(recent_asset))
+        self.assertTrue(
+            os.path.exists(os.path.join(settings.LD_ASSET_FOLDER, asset.file))
+        )
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(settings.LD_PREVIEW_FOLDER, bookmark.preview_image_file)
+            )
+        )
+        self.assertTrue(os.path.isdir(os.path.join(settings.LD_PREVIEW_FOLDER, "tmp")))
+
+    def test_sweep_orphaned_files_handles_missing_folders(self):
+        with override_settings(
+            LD_ASSET_FOLDER="/nonexistent/assets",
+            LD_PREVIEW_FOLDER="/nonexistent/previews",
+        ):
+            self.assertEqual(file_cleanup.sweep_orphaned_files(), 0)
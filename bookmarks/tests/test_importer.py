@@ -207,6 +207,35 @@ class ImporterTestCase(TestCase, BookmarkFactoryMixin, ImportTestMixin):
         self.assertEqual(len(bookmarks), 6)
         self.assertBookmarksImported(html_tags)
 
+    def test_import_sets_title_sort_key(self):
+        html_tags = [
+            BookmarkHtmlTag(href="https://example.com/foo", title="Foo Title"),
+            BookmarkHtmlTag(href="https://example.com/bar", title=""),
+        ]
+        import_html = self.render_html(tags=html_tags)
+        import_netscape_html(import_html, self.get_or_create_test_user())
+
+        self.assertEqual(
+            Bookmark.objects.get(url="https://example.com/foo").title_sort_key,
+            "foo title",
+        )
+        self.assertEqual(
+            Bookmark.objects.get(url="https://example.com/bar").title_sort_key,
+            "https://example.com/bar",
+        )
+
+        # Updating existing bookmarks should update the sort key as well
+        html_tags = [
+            BookmarkHtmlTag(href="https://example.com/bar", title="Bar Title"),
+        ]
+        import_html = self.render_html(tags=html_tags)
+        import_netscape_html(import_html, self.get_or_create_test_user())
+
+        self.assertEqual(
+            Bookmark.objects.get(url="https://example.com/bar").title_sort_key,
+            "bar title",
+        )
+
     def test_import_with_some_invalid_bookmarks(self):
         html_tags = [
             BookmarkHtmlTag(href="https://example.com"),
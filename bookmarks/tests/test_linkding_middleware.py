@@ -1,6 +1,9 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
+from bookmarks.middlewares import LinkdingMiddleware
 from bookmarks.models import GlobalSettings, UserProfile
 from bookmarks.tests.helpers import BookmarkFactoryMixin
 
@@ -48,3 +51,61 @@ class LinkdingMiddlewareTestCase(TestCase, BookmarkFactoryMixin):
         response = self.client.get(reverse("login"), follow=True)
 
         self.assertEqual(user_profile, response.wsgi_request.user_profile)
+
+
+@override_settings(GLOBAL_SETTINGS_CACHE_TIMEOUT=60)
+class LinkdingMiddlewareCacheTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self):
+        GlobalSettings.clear_cache()
+        self.addCleanup(GlobalSettings.clear_cache)
+        self.middleware = LinkdingMiddleware(lambda request: HttpResponse())
+
+        self.guest_user = self.setup_user()
+        self.guest_user.profile.theme = UserProfile.THEME_DARK
+        self.guest_user.profile.save()
+        global_settings = GlobalSettings.get()
+        global_settings.guest_profile_user = self.guest_user
+        global_settings.save()
+
+    def anonymous_request(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        self.middleware(request)
+        return request
+
+    def test_does_not_query_global_settings_or_guest_profile_when_cached(self):
+        self.anonymous_request()
+
+        with self.assertNumQueries(0):
+            request = self.anonymous_request()
+
+        self.assertEqual(request.global_settings.guest_profile_user, self.guest_user)
+        self.assertEqual(request.user_profile.theme, UserProfile.THEME_DARK)
+
+    def test_returns_copies_of_cached_guest_profile(self):
+        request = self.anonymous_request()
+        request.user_profile.theme = UserProfile.THEME_LIGHT
+
+        request = self.anonymous_request()
+
+        self.assertEqual(request.user_profile.theme, UserProfile.THEME_DARK)
+
+    def test_saving_global_settings_invalidates_cache(self):
+        self.anonymous_request()
+
+        global_settings = GlobalSettings.get()
+        global_settings.guest_profile_user = None
+        global_settings.save()
+        request = self.anonymous_request()
+
+        self.assertIsNone(request.global_settings.guest_profile_user)
+        self.assertEqual(request.user_profile.theme, UserProfile.THEME_AUTO)
+
+    def test_saving_guest_profile_invalidates_cache(self):
+        self.anonymous_request()
+
+        self.guest_user.profile.theme = UserProfile.THEME_LIGHT
+        self.guest_user.profile.save()
+        request = self.anonymous_request()
+
+        self.assertEqual(request.user_profile.theme, UserProfile.THEME_LIGHT)
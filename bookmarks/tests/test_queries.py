@@ -1254,6 +1254,19 @@ class QueriesTestCase(TestCase, BookmarkFactoryMixin):
         actual_effective_titles = [b.resolved_title for b in query]
         self.assertEqual(expected_effective_titles, actual_effective_titles)
 
+    def test_sort_by_title_uses_pinyin_and_ignores_accents(self):
+        search = BookmarkSearch(sort=BookmarkSearch.SORT_TITLE_ASC)
+        bookmark_zhong = self.setup_bookmark(title="中文")
+        bookmark_b = self.setup_bookmark(title="Bücher")
+        bookmark_bei = self.setup_bookmark(title="北京")
+        bookmark_a = self.setup_bookmark(title="apple")
+
+        query = queries.query_bookmarks(self.user, self.profile, search)
+
+        self.assertEqual(
+            list(query), [bookmark_a, bookmark_bei, bookmark_b, bookmark_zhong]
+        )
+
     def test_query_bookmarks_filter_modified_since(self):
         # Create bookmarks with different modification dates
         older_bookmark = self.setup_bookmark(title="old bookmark")
@@ -0,0 +1,233 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookmarks.models import ReaderArticle
+from bookmarks.services import assets, reader
+from bookmarks.tests.helpers import BookmarkFactoryMixin
+
+
+def generate_page(text: str) -> bytes:
+    return (
+        f"<!DOCTYPE html><html><head><title>Test page</title>"
+        f"<script>alert('script')</script><style>p {{ color: red; }}</style>"
+        f"</head><body><article class='post' id='main' style='margin: 0'>"
+        f"<p onclick='alert()'>{text}</p></article></body></html>"
+    ).encode()
+
+
+class ReaderServiceTestCase(TestCase, BookmarkFactoryMixin):
+    def setUp(self):
+        self.setup_temp_assets_dir()
+        self.get_or_create_test_user()
+
+    def test_extract_article(self):
+        small_image = "data:image/png;base64," + "a" * 100
+        large_image = "data:image/png;base64," + "a" * reader.MAX_INLINE_IMAGE_SIZE
+        content = f"""
+        <html>
+        <head><title>Article title</title><meta name="description" content="x"></head>
+        <body>
+          <!-- comment -->
+          <nav class="menu"><a href="/home">Home</a></nav>
+          <article class="post" id="main" style="margin: 0" data-id="1">
+            <h1>Heading</h1>
+            <p onclick="alert()">Some <a href="other">text</a></p>
+            <img src="{small_image}" alt="small">
+            <img src="{large_image}" alt="large">
+            <iframe src="https://example.com/embed"></iframe>
+            <form><input name="q"></form>
+          </article>
+          <script>alert('script')</script>
+        </body>
+        </html>
+        """
+
+        article = reader.extract_article(content, "https://example.com/page")
+
+        self.assertEqual(article.title, "Article title")
+        self.assertEqual(article.text, "Home Heading Some text")
+        self.assertIn('<base href="https://example.com/page">', article.html)
+        self.assertIn("<title>Article title</title>", article.html)
+        self.assertIn('<article class="post" id="main">', article.html)
+        self.assertIn('<a href="other">text</a>', article.html)
+        self.assertIn('alt="small"', article.html)
+        for removed in [
+            "comment",
+            "style=",
+            "data-id",
+            "onclick",
+            'alt="large"',
+            "<iframe",
+            "<form",
+            "<script",
+            "<meta",
+        ]:
+            self.assertNotIn(removed, article.html)
+
+    def test_extract_article_from_page_wrapped_in_form(self):
+        content = """
+        <html>
+        <body>
+          <form id="aspnetForm" method="post" action="./page.aspx">
+            <input type="hidden" name="__VIEWSTATE" value="state">
+            <article><p>Article content</p></article>
+            <fieldset><textarea name="comment"></textarea></fieldset>
+            <button type="submit">Submit</button>
+          </form>
+        </body>
+        </html>
+        """
+
+        article = reader.extract_article(content, "https://example.com/page.aspx")
+
+        self.assertEqual(article.text, "Article content")
+        self.assertIn("<article><p>Article content</p></article>", article.html)
+        for removed in ["<form", "<fieldset", "<input", "<textarea", "<button"]:
+            self.assertNotIn(removed, article.html)
+
+    def test_extract_article_escapes_title_and_url(self):
+        article = reader.extract_article(
+            "<html><head><title>&lt;/title&gt;</title></head><body></body></html>",
+            'https://example.com/?a="b"&c',
+        )
+
+        self.assertEqual(article.title, "</title>")
+        self.assertIn("<title>&lt;/title&gt;</title>", article.html)
+        self.assertIn(
+            '<base href="https://example.com/?a=&quot;b&quot;&amp;c">', article.html
+        )
+
+    def test_get_article_without_snapshot(self):
+        bookmark = self.setup_bookmark()
+
+        self.assertIsNone(reader.get_article(bookmark))
+        self.assertFalse(ReaderArticle.objects.exists())
+
+    def test_get_article_extracts_latest_html_snapshot(self):
+        bookmark = self.setup_bookmark(url="https://example.com/page")
+        assets.upload_snapshot(bookmark, generate_page("First snapshot"))
+        snapshot = assets.upload_snapshot(bookmark, generate_page("Latest snapshot"))
+        self.setup_asset(bookmark, content_type="application/pdf")
+
+        article = reader.get_article(bookmark)
+
+        self.assertEqual(article.status, ReaderArticle.STATUS_COMPLETE)
+        self.assertEqual(article.snapshot, snapshot)
+        self.assertEqual(article.url, "https://example.com/page")
+        self.assertEqual(article.title, "Test page")
+        self.assertEqual(article.text, "Latest snapshot")
+        self.assertIn('<article class="post" id="main">', article.html)
+        self.assertNotIn("<script", article.html)
+
+    def test_get_article_returns_cached_article(self):
+        bookmark = self.setup_bookmark()
+        assets.upload_snapshot(bookmark, generate_page("Snapshot"))
+        article = reader.get_article(bookmark)
+
+        with mock.patch.object(reader.compression, "open_asset_file") as mock_open:
+            cached_article = reader.get_article(bookmark)
+
+        mock_open.assert_not_called()
+        self.assertEqual(cached_article.id, article.id)
+        self.assertEqual(cached_article.text, "Snapshot")
+
+    def test_get_article_extracts_new_snapshot(self):
+        bookmark = self.setup_bookmark()
+        assets.upload_snapshot(bookmark, generate_page("Old snapshot"))
+        reader.get_article(bookmark)
+
+        snapshot = assets.upload_snapshot(bookmark, generate_page("New snapshot"))
+        article = reader.get_article(bookmark)
+
+        self.assertEqual(article.snapshot, snapshot)
+        self.assertEqual(article.text, "New snapshot")
+        self.assertEqual(ReaderArticle.objects.count(), 1)
+
+    def test_get_article_ignores_article_of_website_if_snapshot_exists(self):
+        bookmark = self.setup_bookmark()
+        reader.queue_article(bookmark)
+        snapshot = assets.upload_snapshot(bookmark, generate_page("Snapshot"))
+
+        article = reader.get_article(bookmark)
+
+        self.assertEqual(article.snapshot, snapshot)
+        self.assertEqual(article.status, ReaderArticle.STATUS_COMPLETE)
+
+    def test_get_article_ignores_article_of_different_url(self):
+        bookmark = self.setup_bookmark(url="https://example.com/old")
+        self.load_article(bookmark, "Old page")
+
+        bookmark.url = "https://example.com/new"
+        bookmark.save()
+
+        self.assertIsNone(reader.get_article(bookmark))
+
+    @override_settings(LD_READER_CACHE_TTL_SEC=60)
+    def test_get_article_ignores_expired_article(self):
+        bookmark = self.setup_bookmark()
+        self.load_article(bookmark, "Page")
+        self.assertIsNotNone(reader.get_article(bookmark))
+
+        ReaderArticle.objects.update(
+            date_modified=timezone.now() - datetime.timedelta(seconds=61)
+        )
+
+        self.assertIsNone(reader.get_article(bookmark))
+
+    def test_get_article_returns_pending_article(self):
+        bookmark = self.setup_bookmark()
+        reader.queue_article(bookmark)
+
+        article = reader.get_article(bookmark)
+        self.assertEqual(article.status, ReaderArticle.STATUS_PENDING)
+
+        ReaderArticle.objects.update(
+            date_modified=timezone.now()
+            - datetime.timedelta(seconds=reader.PENDING_TIMEOUT_SEC + 1)
+        )
+        self.assertIsNone(reader.get_article(bookmark))
+
+    def test_get_article_returns_failed_article(self):
+        bookmark = self.setup_bookmark()
+        article = reader.queue_article(bookmark)
+        with mock.patch.object(
+            reader.website_loader,
+            "load_full_page",
+            side_effect=Exception("Connection refused"),
+        ):
+            reader.load_article(article)
+
+        article = reader.get_article(bookmark)
+
+        self.assertEqual(article.status, ReaderArticle.STATUS_FAILURE)
+        self.assertEqual(article.error, "Connection refused")
+
+        ReaderArticle.objects.update(
+            date_modified=timezone.now()
+            - datetime.timedelta(seconds=reader.FAILURE_TTL_SEC + 1)
+        )
+        self.assertIsNone(reader.get_article(bookmark))
+
+    def test_load_article(self):
+        bookmark = self.setup_bookmark(url="https://example.com/page")
+
+        article = self.load_article(bookmark, "Website content")
+
+        self.assertEqual(article.status, ReaderArticle.STATUS_COMPLETE)
+        self.assertIsNone(article.snapshot)
+        self.assertEqual(article.text, "Website content")
+        self.assertIn('<base href="https://example.com/page">', article.html)
+
+    def load_article(self, bookmark, text: str) -> ReaderArticle:
+        article = reader.queue_article(bookmark)
+        with mock.patch.object(
+            reader.website_loader,
+            "load_full_page",
+            return_value=generate_page(text).decode(),
+        ) as mock_load:
+            reader.load_article(article)
+        mock_load.assert_called_once_with(bookmark.url, None)
+        return ReaderArticle.objects.get(bookmark=bookmark)
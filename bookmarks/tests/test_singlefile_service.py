@@ -1,4 +1,5 @@
 import os
+import shutil
 import subprocess
 import tempfile
 from unittest import mock
@@ -6,7 +7,8 @@ from unittest import mock
 from django.conf import settings
 from django.test import TestCase, override_settings
 
-from bookmarks.services import singlefile
+from bookmarks.services import singlefile, snapshot_workers
+from bookmarks.tests.helpers import override_browser_profile
 
 
 class SingleFileServiceTestCase(TestCase):
@@ -65,10 +67,73 @@ class SingleFileServiceTestCase(TestCase):
                 1,
             )
             self.assertEqual(
-                called_args.count("--browser-arg=--load-extension=uBOLite.chromium.mv3"),
+                called_args.count(
+                    "--browser-arg=--load-extension=uBOLite.chromium.mv3"
+                ),
                 1,
             )
 
+    def create_snapshot_with_worker(self, pool_size: int):
+        self.create_test_file()
+        pool = snapshot_workers.SnapshotWorkerPool(pool_size)
+        worker = pool.workers[-1]
+
+        try:
+            with mock.patch("subprocess.Popen") as mock_popen:
+                pool.submit(
+                    worker,
+                    "http://example.com",
+                    singlefile.create_snapshot,
+                    "http://example.com",
+                    self.temp_html_filepath,
+                ).result()
+        finally:
+            pool.close()
+
+        return worker, mock_popen
+
+    def setup_temp_profile(self) -> str:
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        profile_dir = os.path.join(temp_dir, "chromium-profile")
+        profile_override = override_browser_profile(profile_dir)
+        profile_override.enable()
+        self.addCleanup(profile_override.disable)
+        return profile_dir
+
+    def test_create_snapshot_keeps_configured_profile_with_single_worker(self):
+        profile_dir = self.setup_temp_profile()
+        os.makedirs(profile_dir)
+        cookies_filepath = os.path.join(profile_dir, "Cookies")
+        with open(cookies_filepath, "w") as f:
+            f.write("cookies")
+
+        worker, mock_popen = self.create_snapshot_with_worker(1)
+
+        called_args = mock_popen.call_args.args[0]
+        self.assertEqual(worker.profile_dir, profile_dir)
+        self.assertEqual(
+            called_args.count(f"--browser-arg=--user-data-dir={profile_dir}"), 1
+        )
+        self.assertEqual(
+            len([arg for arg in called_args if "--user-data-dir=" in arg]), 1
+        )
+        self.assertEqual(mock_popen.call_args.kwargs["env"]["TMPDIR"], worker.temp_dir)
+        # The profile survives the pool, only temporary files are removed
+        self.assertTrue(os.path.exists(cookies_filepath))
+        self.assertFalse(os.path.exists(worker.temp_dir))
+
+    def test_create_snapshot_uses_persistent_profile_per_worker(self):
+        profile_dir = self.setup_temp_profile()
+
+        worker, mock_popen = self.create_snapshot_with_worker(2)
+
+        called_args = mock_popen.call_args.args[0]
+        self.assertEqual(worker.profile_dir, f"{profile_dir}-2")
+        self.assertIn(f"--browser-arg=--user-data-dir={profile_dir}-2", called_args)
+        self.assertNotIn(f"--browser-arg=--user-data-dir={profile_dir}", called_args)
+        self.assertTrue(os.path.isdir(f"{profile_dir}-2"))
+
     @override_settings(
         LD_SINGLEFILE_OPTIONS='--some-option "some value" --another-option "another value" --third-option="third value"'
     )
@@ -115,3 +180,29 @@ class SingleFileServiceTestCase(TestCase):
             singlefile.create_snapshot("http://example.com", self.temp_html_filepath)
 
             mock_process.wait.assert_called_with(timeout=180)
+
+    def test_get_content_fingerprint_ignores_capture_info(self):
+        def snapshot(url: str, saved_date: str, body: str = "Hello"):
+            return (
+                "<!DOCTYPE html> <html lang=en><!--\n Page saved with SingleFile \n"
+                f" url: {url} \n saved date: {saved_date}\n-->"
+                f"<body>{body}</body></html>"
+            ).encode()
+
+        fingerprint = singlefile.get_content_fingerprint(
+            [snapshot("https://example.com", "Mon Jan 01 2024")]
+        )
+
+        self.assertEqual(
+            singlefile.get_content_fingerprint(
+                [snapshot("https://example.com/", "Tue Jan 02 2024")[:-10]]
+                + [snapshot("https://example.com/", "Tue Jan 02 2024")[-10:]]
+            ),
+            fingerprint,
+        )
+        self.assertNotEqual(
+            singlefile.get_content_fingerprint(
+                [snapshot("https://example.com", "Mon Jan 01 2024", "Changed")]
+            ),
+            fingerprint,
+        )
@@ -0,0 +1,395 @@
+import http.server
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from bookmarks.services import singlefile, snapshot_workers
+from bookmarks.services.snapshot_browser import SnapshotBrowser, SnapshotBrowserError
+from bookmarks.tests.helpers import override_browser_profile
+
+# Serves the remote debugging endpoints that are used by the health check, and
+# writes its port into the profile directory like Chromium does
+FAKE_BROWSER_SCRIPT = """\
+import http.server
+import json
+import os
+import sys
+
+args = sys.argv[1:]
+profile_dir = next(
+    arg.split("=", 1)[1] for arg in args if arg.startswith("--user-data-dir=")
+)
+with open(os.path.join(profile_dir, "args.json"), "w") as f:
+    json.dump(args, f)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps(
+            {"webSocketDebuggerUrl": "ws://127.0.0.1/devtools/browser/fake"}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+with open(os.path.join(profile_dir, "DevToolsActivePort"), "w") as f:
+    f.write(f"{server.server_port}\\n/devtools/browser/fake\\n")
+server.serve_forever()
+"""
+
+
+class SnapshotBrowserTestMixin:
+    def setup_fake_browser(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.profile_dir = os.path.join(self.temp_dir, "profile")
+        os.makedirs(self.profile_dir)
+        self.browser_path = self.create_executable("fake-browser", FAKE_BROWSER_SCRIPT)
+        settings_override = override_settings(
+            LD_SNAPSHOT_BROWSER_PATH=self.browser_path
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_executable(self, name: str, script: str) -> str:
+        filepath = os.path.join(self.temp_dir, name)
+        with open(filepath, "w") as f:
+            f.write(f"#!{sys.executable}\n{script}")
+        os.chmod(filepath, os.stat(filepath).st_mode | stat.S_IEXEC)
+        return filepath
+
+    def create_browser(self) -> SnapshotBrowser:
+        return SnapshotBrowser(self.profile_dir, singlefile.merge_options([]))
+
+    def start_browser(self) -> SnapshotBrowser:
+        browser = self.create_browser()
+        browser.start()
+        self.addCleanup(browser.close)
+        return browser
+
+    def read_browser_args(self, profile_dir: str | None = None) -> list[str]:
+        with open(os.path.join(profile_dir or self.profile_dir, "args.json")) as f:
+            return json.load(f)
+
+    def is_process_running(self, pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+class SnapshotBrowserServiceTestCase(TestCase, SnapshotBrowserTestMixin):
+    def setUp(self):
+        self.setup_fake_browser()
+
+    def test_start(self):
+        browser = self.start_browser()
+
+        self.assertTrue(browser.is_running())
+        self.assertTrue(browser.is_healthy())
+        self.assertRegex(browser.debugging_url, r"^http://127\.0\.0\.1:\d+$")
+
+        args = self.read_browser_args()
+        self.assertIn(f"--user-data-dir={self.profile_dir}", args)
+        self.assertIn("--remote-debugging-port=0", args)
+        self.assertIn("--no-sandbox", args)
+        self.assertIn("--disable-blink-features=AutomationControlled", args)
+        self.assertEqual(args.count("--headless=new"), 1)
+        self.assertNotIn("--user-data-dir=chromium-profile", args)
+
+    @override_settings(
+        LD_SINGLEFILE_OPTIONS='--browser-arg="--lang=de" --browser-arg=--user-data-dir=x'
+    )
+    def test_start_uses_browser_args_from_settings(self):
+        self.start_browser()
+
+        args = self.read_browser_args()
+        self.assertIn("--lang=de", args)
+        self.assertIn("--disable-blink-features=AutomationControlled", args)
+        self.assertNotIn("--user-data-dir=x", args)
+
+    def test_start_fails_for_missing_browser(self):
+        browser = self.create_browser()
+
+        with (
+            override_settings(
+                LD_SNAPSHOT_BROWSER_PATH=os.path.join(self.temp_dir, "missing")
+            ),
+            self.assertRaises(SnapshotBrowserError),
+        ):
+            browser.start()
+
+        self.assertFalse(browser.is_running())
+
+    def test_start_fails_if_browser_exits(self):
+        browser_path = self.create_executable("crashing-browser", "exit(1)")
+        browser = self.create_browser()
+
+        with (
+            override_settings(LD_SNAPSHOT_BROWSER_PATH=browser_path),
+            self.assertRaises(SnapshotBrowserError),
+        ):
+            browser.start()
+
+        self.assertFalse(browser.is_running())
+
+    def test_close(self):
+        browser = self.start_browser()
+        pid = browser.process.pid
+
+        browser.close()
+
+        self.assertFalse(browser.is_running())
+        self.assertFalse(browser.is_healthy())
+        self.assertFalse(self.is_process_running(pid))
+
+    def test_is_healthy_returns_false_for_killed_browser(self):
+        browser = self.start_browser()
+
+        browser.process.kill()
+        browser.process.wait()
+
+        self.assertFalse(browser.is_healthy())
+
+    @override_settings(
+        LD_SNAPSHOT_BROWSER_MAX_CAPTURES=3, LD_SNAPSHOT_BROWSER_MAX_RSS_MB=0
+    )
+    def test_needs_recycling_after_max_captures(self):
+        browser = self.start_browser()
+
+        browser.capture_count = 2
+        self.assertFalse(browser.needs_recycling())
+        browser.capture_count = 3
+        self.assertTrue(browser.needs_recycling())
+
+    @override_settings(LD_SNAPSHOT_BROWSER_MAX_CAPTURES=0)
+    def test_needs_recycling_above_max_rss(self):
+        browser = self.start_browser()
+        rss = browser.get_rss()
+        if rss is None:
+            self.skipTest("Memory usage can not be determined on this system")
+
+        self.assertGreater(rss, 0)
+        with override_settings(LD_SNAPSHOT_BROWSER_MAX_RSS_MB=1024):
+            self.assertFalse(browser.needs_recycling())
+        with override_settings(LD_SNAPSHOT_BROWSER_MAX_RSS_MB=1):
+            self.assertTrue(browser.needs_recycling())
+
+
+@override_settings(LD_SNAPSHOT_PERSISTENT_BROWSER=True)
+class SingleFilePersistentBrowserTestCase(TestCase, SnapshotBrowserTestMixin):
+    def setUp(self):
+        self.setup_fake_browser()
+        # Unlike Chromium, the fake browser doesn't create its profile
+        profile_dir = os.path.join(self.temp_dir, "chromium-profile")
+        os.makedirs(profile_dir)
+        with override_browser_profile(profile_dir):
+            self.pool = snapshot_workers.SnapshotWorkerPool(1)
+        self.addCleanup(self.pool.close)
+        self.worker = self.pool.workers[0]
+        self.html_filepath = os.path.join(self.temp_dir, "snapshot.html")
+        with open(self.html_filepath, "w") as f:
+            f.write("<html></html>")
+
+    def create_snapshot(self, mock_process=None, config=None) -> list[str]:
+        # Only mock the single-file process, the browser uses the same module
+        popen = subprocess.Popen
+        mock_popen = mock.Mock(return_value=mock_process or mock.MagicMock())
+
+        def popen_side_effect(args, **kwargs):
+            if args[0] == settings.LD_SNAPSHOT_BROWSER_PATH:
+                return popen(args, **kwargs)
+            return mock_popen(args, **kwargs)
+
+        with mock.patch.object(subprocess, "Popen", side_effect=popen_side_effect):
+            self.pool.submit(
+                self.worker,
+                "http://example.com",
+                singlefile.create_snapshot,
+                "http://example.com",
+                self.html_filepath,
+                config,
+            ).result()
+        return mock_popen.call_args.args[0]
+
+    def test_starts_persistent_browser(self):
+        called_args = self.create_snapshot()
+
+        browser = self.worker.browser
+        self.assertIsNotNone(browser)
+        self.assertTrue(browser.is_healthy())
+        self.assertEqual(browser.profile_dir, self.worker.profile_dir)
+        self.assertIn(
+            f"--browser-remote-debugging-URL={browser.debugging_url}", called_args
+        )
+        self.assertEqual(browser.capture_count, 1)
+
+        browser_args = self.read_browser_args(self.worker.profile_dir)
+        self.assertIn("--disable-blink-features=AutomationControlled", browser_args)
+        self.assertIn(f"--user-data-dir={self.worker.profile_dir}", browser_args)
+
+    def test_reuses_persistent_browser(self):
+        self.create_snapshot()
+        browser = self.worker.browser
+        pid = browser.process.pid
+
+        self.create_snapshot()
+
+        self.assertIs(self.worker.browser, browser)
+        self.assertEqual(browser.process.pid, pid)
+        self.assertEqual(browser.capture_count, 2)
+
+    @override_settings(LD_SNAPSHOT_BROWSER_MAX_CAPTURES=2)
+    def test_recycles_persistent_browser_after_max_captures(self):
+        self.create_snapshot()
+        browser = self.worker.browser
+        self.create_snapshot()
+
+        self.assertIsNone(self.worker.browser)
+        self.assertFalse(browser.is_running())
+
+    def test_recycles_persistent_browser_after_timeout(self):
+        mock_process = mock.MagicMock()
+        mock_process.wait.side_effect = [
+            subprocess.TimeoutExpired("single-file", 1),
+            None,
+        ]
+
+        with self.assertRaises(singlefile.SingleFileError):
+            self.create_snapshot(mock_process)
+
+        self.assertIsNone(self.worker.browser)
+
+    def test_restarts_unhealthy_persistent_browser(self):
+        self.create_snapshot()
+        browser = self.worker.browser
+        browser.process.kill()
+        browser.process.wait()
+
+        called_args = self.create_snapshot()
+
+        self.assertIsNot(self.worker.browser, browser)
+        self.assertFalse(browser.is_running())
+        self.assertTrue(self.worker.browser.is_healthy())
+        self.assertIn(
+            f"--browser-remote-debugging-URL={self.worker.browser.debugging_url}",
+            called_args,
+        )
+
+    def test_falls_back_to_browser_per_snapshot(self):
+        with mock.patch.object(
+            SnapshotBrowser, "start", side_effect=SnapshotBrowserError("failed")
+        ) as mock_start:
+            called_args = self.create_snapshot()
+            self.create_snapshot()
+
+        self.assertFalse(
+            any("--browser-remote-debugging-URL" in arg for arg in called_args)
+        )
+        self.assertIn(
+            f"--browser-arg=--user-data-dir={self.worker.profile_dir}", called_args
+        )
+        self.assertTrue(self.worker.browser_failed)
+        mock_start.assert_called_once()
+
+    def test_launches_browser_per_snapshot_for_site_browser_args(self):
+        self.create_snapshot()
+        browser = self.worker.browser
+
+        config = {"singlefile_args": {"--browser-arg": "--lang=de"}}
+        called_args = self.create_snapshot(config=config)
+
+        self.assertFalse(
+            any("--browser-remote-debugging-URL" in arg for arg in called_args)
+        )
+        self.assertIn("--browser-arg=--lang=de", called_args)
+        self.assertIn(
+            f"--browser-arg=--user-data-dir={self.worker.profile_dir}", called_args
+        )
+        # The profile is used by the launched browser
+        self.assertIsNone(self.worker.browser)
+        self.assertFalse(browser.is_running())
+        self.assertFalse(self.worker.browser_failed)
+
+        # Other sites use the persistent browser again
+        called_args = self.create_snapshot()
+        self.assertIn(
+            f"--browser-remote-debugging-URL={self.worker.browser.debugging_url}",
+            called_args,
+        )
+
+    @override_settings(LD_SNAPSHOT_PERSISTENT_BROWSER=False)
+    def test_disabled_persistent_browser(self):
+        with mock.patch.object(SnapshotBrowser, "start") as mock_start:
+            called_args = self.create_snapshot()
+
+        mock_start.assert_not_called()
+        self.assertFalse(
+            any("--browser-remote-debugging-URL" in arg for arg in called_args)
+        )
+
+    def test_closing_pool_closes_persistent_browser(self):
+        self.create_snapshot()
+        browser = self.worker.browser
+
+        self.pool.close()
+
+        self.assertIsNone(self.worker.browser)
+        self.assertFalse(browser.is_running())
+
+
+@skipUnless(
+    shutil.which("chromium") and shutil.which("single-file"),
+    "chromium and single-file are not installed",
+)
+@override_settings(
+    LD_SNAPSHOT_PERSISTENT_BROWSER=True, LD_SNAPSHOT_BROWSER_PATH="chromium"
+)
+class SnapshotBrowserIntegrationTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        with open(os.path.join(self.temp_dir, "index.html"), "w") as f:
+            f.write("<html><body><h1>Persistent browser test page</h1></body></html>")
+
+        handler = lambda *args, **kwargs: http.server.SimpleHTTPRequestHandler(  # noqa: E731
+            *args, directory=self.temp_dir, **kwargs
+        )
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_creates_snapshots_with_persistent_browser(self):
+        url = f"http://127.0.0.1:{self.server.server_port}/index.html"
+        with override_browser_profile(os.path.join(self.temp_dir, "chromium-profile")):
+            pool = snapshot_workers.SnapshotWorkerPool(1)
+        worker = pool.workers[0]
+        try:
+            for index in range(2):
+                filepath = os.path.join(self.temp_dir, f"snapshot-{index}.html")
+                pool.submit(
+                    worker, url, singlefile.create_snapshot, url, filepath
+                ).result()
+                with open(filepath) as f:
+                    self.assertIn("Persistent browser test page", f.read())
+            self.assertFalse(worker.browser_failed)
+            self.assertEqual(worker.browser.capture_count, 2)
+        finally:
+            pool.close()
@@ -0,0 +1,116 @@
+import time
+from unittest import mock
+
+from django.core.signals import request_finished
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from bookmarks import sqlite
+
+
+class SqlitePragmasTestCase(TestCase):
+    def get_pragma(self, name: str):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_applies_pragmas_to_connection(self):
+        with override_settings(
+            LD_SQLITE_PRAGMAS={
+                "cache_size": "-1024",
+                "temp_store": "MEMORY",
+                "busy_timeout": "1234",
+            }
+        ):
+            sqlite.configure_sqlite(connection=connection)
+
+        self.assertEqual(self.get_pragma("cache_size"), -1024)
+        # 2 = MEMORY
+        self.assertEqual(self.get_pragma("temp_store"), 2)
+        self.assertEqual(self.get_pragma("busy_timeout"), 1234)
+
+    def test_skips_empty_and_invalid_values(self):
+        with override_settings(LD_SQLITE_PRAGMAS={"busy_timeout": "4321"}):
+            sqlite.configure_sqlite(connection=connection)
+
+        with override_settings(
+            LD_SQLITE_PRAGMAS={
+                "busy_timeout": "",
+                "cache_size": "1; DROP TABLE bookmarks_bookmark",
+            }
+        ):
+            sqlite.configure_sqlite(connection=connection)
+
+        self.assertEqual(self.get_pragma("busy_timeout"), 4321)
+        self.assertNotEqual(self.get_pragma("cache_size"), 1)
+
+    def test_only_applies_synchronous_in_wal_mode(self):
+        # In-memory test databases can not use WAL journal mode
+        self.assertNotEqual(self.get_pragma("journal_mode"), "wal")
+        synchronous = self.get_pragma("synchronous")
+
+        with override_settings(LD_SQLITE_PRAGMAS={"synchronous": "OFF"}):
+            sqlite.configure_sqlite(connection=connection)
+
+        self.assertEqual(self.get_pragma("synchronous"), synchronous)
+
+    @override_settings(
+        LD_SQLITE_PRAGMAS={"busy_timeout": "3456"},
+        USE_SQLITE_ICU_EXTENSION=True,
+        SQLITE_ICU_EXTENSION_PATH="/nonexistent/libicu.so",
+    )
+    def test_connection_created_signal_only_configures_sqlite(self):
+        # Loading the missing ICU extension would fail if its handler was
+        # registered
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+        self.assertEqual(self.get_pragma("busy_timeout"), 3456)
+
+    def test_get_sqlite_pragmas(self):
+        with override_settings(LD_SQLITE_PRAGMAS={"busy_timeout": "2000"}):
+            sqlite.configure_sqlite(connection=connection)
+            pragmas = sqlite.get_sqlite_pragmas(connection)
+
+        self.assertEqual(pragmas["busy_timeout"], 2000)
+        self.assertIn("journal_mode", pragmas)
+
+
+class SqliteOptimizeTestCase(TransactionTestCase):
+    def setUp(self):
+        # Make sure the connection is open
+        connection.ensure_connection()
+
+    def test_optimizes_connection_after_interval(self):
+        connection.ld_last_optimize = time.monotonic() - 7200
+
+        with mock.patch.object(connection, "cursor", wraps=connection.cursor) as cursor:
+            sqlite.optimize_sqlite()
+
+        cursor.assert_called_once()
+        self.assertGreater(connection.ld_last_optimize, time.monotonic() - 60)
+
+    def test_does_not_optimize_connection_within_interval(self):
+        sqlite.optimize_sqlite()
+
+        with mock.patch.object(connection, "cursor", wraps=connection.cursor) as cursor:
+            sqlite.optimize_sqlite()
+
+        cursor.assert_not_called()
+
+    def test_request_finished_signal_optimizes_connection(self):
+        connection.ld_last_optimize = time.monotonic() - 7200
+
+        with mock.patch.object(connection, "cursor", wraps=connection.cursor) as cursor:
+            request_finished.send(sender=None)
+
+        cursor.assert_called_once()
+
+    @override_settings(LD_SQLITE_OPTIMIZE_INTERVAL=0)
+    def test_does_not_optimize_connection_when_disabled(self):
+        connection.ld_last_optimize = time.monotonic() - 7200
+
+        with mock.patch.object(connection, "cursor", wraps=connection.cursor) as cursor:
+            sqlite.optimize_sqlite()
+
+        cursor.assert_not_called()
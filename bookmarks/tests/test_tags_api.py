@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework import status
+
+from bookmarks.api.routes import TagViewSet
+from bookmarks.tests.helpers import BookmarkFactoryMixin, LinkdingApiTestCase
+
+
+class TagsApiTestCase(LinkdingApiTestCase, BookmarkFactoryMixin):
+    def test_names(self):
+        self.authenticate()
+        self.setup_tag(name="beta")
+        self.setup_tag(name="Alpha")
+        self.setup_tag(name="gamma")
+        self.setup_tag(name="other", user=self.setup_user())
+
+        url = reverse("linkding:tag-names")
+        response = self.get(url)
+
+        self.assertEqual(response.data, {"tags": ["Alpha", "beta", "gamma"]})
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_names_with_counts(self):
+        self.authenticate()
+        tag1 = self.setup_tag(name="tag1")
+        tag2 = self.setup_tag(name="tag2")
+        self.setup_tag(name="tag3")
+        self.setup_bookmark(tags=[tag1, tag2])
+        self.setup_bookmark(tags=[tag1])
+
+        url = reverse("linkding:tag-names")
+        response = self.get(f"{url}?counts=true")
+
+        self.assertEqual(
+            response.data,
+            {
+                "tags": [
+                    {"name": "tag1", "count": 2},
+                    {"name": "tag2", "count": 1},
+                    {"name": "tag3", "count": 0},
+                ]
+            },
+        )
+
+    def test_names_revalidates_with_etag(self):
+        self.authenticate()
+        tag = self.setup_tag(name="tag1")
+
+        url = reverse("linkding:tag-names")
+        etag = self.get(url)["ETag"]
+        self.assertTrue(etag.startswith('"'))
+
+        # The tags are only queried if the ETag does not match
+        with mock.patch.object(TagViewSet, "_list_names") as mock_list_names:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        mock_list_names.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(response.content, b"")
+
+        tag.name = "renamed"
+        tag.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data, {"tags": ["renamed"]})
+
+    def test_names_etag_changes_with_counts(self):
+        self.authenticate()
+        tag = self.setup_tag(name="tag1")
+
+        url = reverse("linkding:tag-names") + "?counts=true"
+        etag = self.get(url)["ETag"]
+        self.setup_bookmark(tags=[tag])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_names_etag_changes_with_deleted_tag(self):
+        self.authenticate()
+        self.setup_tag(name="tag1")
+        tag = self.setup_tag(name="tag2")
+
+        url = reverse("linkding:tag-names")
+        etag = self.get(url)["ETag"]
+        tag.delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"tags": ["tag1"]})
+
+    def test_names_requires_authentication(self):
+        url = reverse("linkding:tag-names")
+        self.get(url, expected_status_code=status.HTTP_401_UNAUTHORIZED)
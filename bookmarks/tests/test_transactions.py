@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+
+from django.db import OperationalError, connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from bookmarks.models import ApiToken, Bookmark
+from bookmarks.services import tasks, transactions
+from bookmarks.services.website_loader import WebsiteMetadata
+from bookmarks.tests.helpers import BookmarkFactoryMixin
+
+
+@override_settings(LD_DB_LOCK_RETRIES=3, LD_DB_LOCK_RETRY_DELAY=0.001)
+class AtomicWriteTestCase(TransactionTestCase):
+    def setUp(self):
+        transactions.reset_lock_metrics()
+
+    def test_retries_on_lock_errors(self):
+        fn = mock.Mock(
+            side_effect=[
+                OperationalError("database is locked"),
+                OperationalError("database table is locked"),
+                "result",
+            ]
+        )
+        fn.__qualname__ = "fn"
+
+        result = transactions.atomic_write(fn, 1, key="value")
+
+        self.assertEqual(result, "result")
+        self.assertEqual(fn.call_count, 3)
+        fn.assert_called_with(1, key="value")
+        metrics = transactions.get_lock_metrics()
+        self.assertEqual(metrics["transactions"], 1)
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["failures"], 0)
+        self.assertGreater(metrics["wait_time"], 0)
+
+    def test_raises_after_max_retries(self):
+        fn = mock.Mock(side_effect=OperationalError("database is locked"))
+        fn.__qualname__ = "fn"
+
+        with self.assertRaises(OperationalError):
+            transactions.atomic_write(fn)
+
+        self.assertEqual(fn.call_count, 4)
+        metrics = transactions.get_lock_metrics()
+        self.assertEqual(metrics["retries"], 3)
+        self.assertEqual(metrics["failures"], 1)
+
+    def test_does_not_retry_other_errors(self):
+        fn = mock.Mock(side_effect=OperationalError("no such table: foo"))
+        fn.__qualname__ = "fn"
+
+        with self.assertRaises(OperationalError):
+            transactions.atomic_write(fn)
+
+        self.assertEqual(fn.call_count, 1)
+
+    def test_does_not_retry_within_outer_transaction(self):
+        fn = mock.Mock(side_effect=OperationalError("database is locked"))
+        fn.__qualname__ = "fn"
+
+        with self.assertRaises(OperationalError), transaction.atomic():
+            transactions.atomic_write(fn)
+
+        self.assertEqual(fn.call_count, 1)
+
+    def test_write_transaction_decorator(self):
+        @transactions.write_transaction
+        def create_bookmark():
+            self.assertTrue(connection.in_atomic_block)
+            return "result"
+
+        self.assertEqual(create_bookmark(), "result")
+
+
+class ConcurrentWritesTestCase(TransactionTestCase, BookmarkFactoryMixin):
+    def setUp(self):
+        transactions.reset_lock_metrics()
+        self.user = self.get_or_create_test_user()
+        self.api_token = ApiToken.objects.create(user=self.user, name="Test Token")
+        self.enrich_bookmark_ids = [
+            self.setup_bookmark(title="", description="").id for _ in range(20)
+        ]
+
+        # The in-memory test database uses a shared cache, which fails with
+        # table locks instead of waiting for the database lock. Copy it into a
+        # file database in WAL mode, like in production, that the worker
+        # threads connect to.
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.db_path = os.path.join(temp_dir.name, "db.sqlite3")
+        file_db = sqlite3.connect(self.db_path)
+        connection.ensure_connection()
+        connection.connection.backup(file_db)
+        file_db.execute("PRAGMA journal_mode=wal")
+        file_db.close()
+
+    def run_in_file_database(self, fn):
+        # Connections are thread-local, this only replaces the default
+        # connection of the current thread
+        original_connection = connections["default"]
+        settings_dict = {
+            **original_connection.settings_dict,
+            "NAME": self.db_path,
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        }
+        connections["default"] = original_connection.__class__(settings_dict)
+        try:
+            return fn()
+        finally:
+            connections["default"].close()
+            connections["default"] = original_connection
+
+    def run_concurrently(self, workers):
+        errors = []
+
+        def run(worker):
+            try:
+                self.run_in_file_database(worker)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(w,)) for w in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return errors
+
+    def create_bookmarks(self, worker_id: int, count: int):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Token " + self.api_token.key)
+        for i in range(count):
+            response = client.post(
+                "/api/bookmarks/",
+                {"url": f"https://api.example.com/{worker_id}/{i}", "tag_names": ["t"]},
+                format="json",
+            )
+            assert response.status_code == 201, response.content
+
+    def enrich_metadata(self, bookmark_ids: list[int]):
+        for bookmark_id in bookmark_ids:
+            tasks._enrich_metadata_task.call_local(bookmark_id)
+
+    @override_settings(LD_DISABLE_BACKGROUND_TASKS=True)
+    def test_api_creates_alongside_background_enrichment(self):
+        metadata = WebsiteMetadata(
+            url="https://example.com",
+            title="Enriched title",
+            description="Enriched description",
+            preview_image=None,
+        )
+        workers = [
+            lambda worker_id=worker_id: self.create_bookmarks(worker_id, 10)
+            for worker_id in range(4)
+        ]
+        workers += [
+            lambda: self.enrich_metadata(self.enrich_bookmark_ids[:10]),
+            lambda: self.enrich_metadata(self.enrich_bookmark_ids[10:]),
+        ]
+
+        with mock.patch(
+            "bookmarks.services.tasks.load_website_metadata", return_value=metadata
+        ):
+            errors = self.run_concurrently(workers)
+
+        self.assertEqual(errors, [])
+
+        def count_bookmarks():
+            created = Bookmark.objects.filter(
+                url__startswith="https://api.example.com/"
+            )
+            enriched = Bookmark.objects.filter(title="Enriched title")
+            return created.count(), enriched.count()
+
+        created_count, enriched_count = self.run_in_file_database(count_bookmarks)
+        self.assertEqual(created_count, 40)
+        self.assertEqual(enriched_count, 20)
+        metrics = transactions.get_lock_metrics()
+        self.assertEqual(metrics["transactions"], 60)
+        self.assertEqual(metrics["failures"], 0)
@@ -8,6 +8,7 @@ from bookmarks.utils import (
     DomainConfig,
     build_domain_filter_value,
     build_domain_filter_value_with_aliases,
+    build_title_sort_key,
     canonicalize_domain_filter_value,
     get_alias_domains_for_root,
     get_matching_domain_roots,
@@ -536,3 +537,19 @@ class UtilsTestCase(TestCase):
             get_matching_domain_roots("a.docs.feishu.cn", config),
             ["feishu.cn", "docs.feishu.cn"],
         )
+
+    def test_build_title_sort_key(self):
+        test_cases = [
+            ("Example Title", "https://example.com", "example title"),
+            ("", "https://Example.com/Path", "https://example.com/path"),
+            ("Über Straße", "https://example.com", "uber strasse"),
+            ("中文标题", "https://example.com", "zhongwenbiaoti"),
+            ("Linkding 书签", "https://example.com", "linkding shuqian"),
+        ]
+        for title, url, expected in test_cases:
+            with self.subTest(title=title, url=url):
+                self.assertEqual(expected, build_title_sort_key(title, url))
+
+    def test_build_title_sort_key_truncates_long_titles(self):
+        result = build_title_sort_key("a" * 1000, "https://example.com")
+        self.assertEqual(len(result), 512)
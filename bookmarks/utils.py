@@ -16,6 +16,7 @@ from django.http import HttpResponseRedirect
 from django.utils import formats, timezone
 from django.utils.translation import gettext as _
 from django.utils.translation import ngettext
+from pypinyin import lazy_pinyin
 
 try:
     with open("version.txt") as f:
@@ -386,6 +387,27 @@ def normalize_url(url: str) -> str:
         return url
 
 
+TITLE_SORT_KEY_MAX_LENGTH = 512
+_HAN_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def build_title_sort_key(title: str, url: str) -> str:
+    """
+    Build a key for sorting bookmarks by their resolved title, so that sorting
+    can use an index instead of evaluating the title expression per query.
+    Chinese characters are replaced with their pinyin, accents are removed
+    and the result is case-folded.
+    """
+    text = title or url or ""
+    if _HAN_RE.search(text):
+        text = "".join(lazy_pinyin(text))
+
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+
+    return text.casefold()[:TITLE_SORT_KEY_MAX_LENGTH]
+
+
 def extract_hostname(url: str) -> str:
     if not url or not isinstance(url, str):
         return ""
@@ -1,41 +1,215 @@
-import gzip
 import os
+import re
 
 from django.conf import settings
 from django.http import (
+    FileResponse,
     Http404,
     HttpResponse,
+    StreamingHttpResponse,
 )
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
 
+from bookmarks.models import BookmarkAsset
+from bookmarks.services import compression
+from bookmarks.type_defs import HttpRequest
 from bookmarks.views import access
 
+# Size of the chunks in which asset files are sent
+ASSET_CHUNK_SIZE = 64 * 1024
 
-def _get_asset_content(asset):
+_accepts_gzip = re.compile(r"\bgzip\b")
+_byte_range = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _get_asset_filepath(asset: BookmarkAsset) -> str:
     filepath = os.path.join(settings.LD_ASSET_FOLDER, asset.file)
 
     if not os.path.exists(filepath):
         raise Http404("Asset file does not exist")
 
+    return filepath
+
+
+def _get_asset_content(asset):
+    filepath = _get_asset_filepath(asset)
+
+    with compression.open_asset_file(asset, filepath) as f:
+        content = f.read()
+
+    return content
+
+
+def _compression_unavailable_response(error: Exception):
+    # The file can be read again once the missing package is installed
+    return HttpResponse(str(error), status=503, content_type="text/plain")
+
+
+def _iter_file(asset: BookmarkAsset, filepath: str, start: int = 0, length: int = -1):
+    with compression.open_asset_file(asset, filepath) as f:
+        # Seeking in a compressed file decompresses the content up to the
+        # offset, without keeping it in memory
+        f.seek(start)
+        while length != 0:
+            chunk_size = (
+                ASSET_CHUNK_SIZE if length < 0 else min(length, ASSET_CHUNK_SIZE)
+            )
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            if length > 0:
+                length -= len(chunk)
+            yield chunk
+
+
+def _parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses a single byte range, and returns the positions of its first and
+    last byte. Returns None for ranges that should be ignored, such as invalid
+    or multiple ranges, and raises a ValueError if the range can not be
+    satisfied.
+    """
+    match = _byte_range.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            raise ValueError("Range start is beyond the end of the file")
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
+
+    suffix_length = int(last)
+    if suffix_length == 0 or size == 0:
+        raise ValueError("Empty suffix range")
+    return max(size - suffix_length, 0), size - 1
+
+
+def _if_range_passes(request: HttpRequest, etag: str, last_modified: int) -> bool:
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(("W/", '"')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def asset_file_response(request: HttpRequest, asset: BookmarkAsset, content_type):
+    """
+    Streams the file of an asset, without loading it into memory. Files
+    compressed with gzip are sent as is to clients that accept gzip, other
+    compressed files are decompressed in chunks.
+
+    Requests for a byte range are answered with the matching part of the
+    uncompressed content. For uncompressed files this only reads the range,
+    while compressed files have to be decompressed up to its end.
+    """
+    filepath = _get_asset_filepath(asset)
+    stat = os.stat(filepath)
+    last_modified = int(stat.st_mtime)
+    range_header = request.headers.get("Range")
+    send_compressed = (
+        asset.gzip
+        and not range_header
+        and _accepts_gzip.search(request.headers.get("Accept-Encoding", ""))
+    )
+
+    if send_compressed:
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}-gzip"'
+    else:
+        try:
+            size = compression.get_content_size(asset, filepath)
+        except compression.CompressionUnavailableError as error:
+            return _compression_unavailable_response(error)
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+
+    response = get_conditional_response(request, etag, last_modified)
+    if response is None:
+        response = _file_response(
+            request,
+            asset,
+            filepath,
+            content_type,
+            send_compressed,
+            size,
+            etag,
+            last_modified,
+        )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
     if asset.gzip:
-        with gzip.open(filepath, "rb") as f:
-            content = f.read()
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def _file_response(
+    request: HttpRequest,
+    asset: BookmarkAsset,
+    filepath: str,
+    content_type,
+    send_compressed: bool,
+    size: int,
+    etag: str,
+    last_modified: int,
+):
+    if send_compressed:
+        # The response closes the file once it has been sent
+        file = open(filepath, "rb")  # noqa: SIM115
+        response = FileResponse(file, content_type=content_type)
+        response.block_size = ASSET_CHUNK_SIZE
+        response["Content-Encoding"] = "gzip"
+        return response
+
+    range_header = request.headers.get("Range")
+    byte_range = None
+    if range_header and _if_range_passes(request, etag, last_modified):
+        try:
+            byte_range = _parse_byte_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_file(asset, filepath, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    elif asset.gzip or asset.codec:
+        length = size
+        response = StreamingHttpResponse(
+            _iter_file(asset, filepath), content_type=content_type
+        )
     else:
-        with open(filepath, "rb") as f:
-            content = f.read()
+        file = open(filepath, "rb")  # noqa: SIM115
+        response = FileResponse(file, content_type=content_type)
+        response.block_size = ASSET_CHUNK_SIZE
+        length = size
 
-    return content
+    response["Content-Length"] = length
+    response["Accept-Ranges"] = "bytes"
+    return response
 
 
 def view(request, asset_id: int):
     asset = access.asset_read(request, asset_id)
-    content = _get_asset_content(asset)
 
     content_type = asset.content_type
     if "charset" not in content_type.lower() and content_type.startswith("text/"):
         content_type = f"{content_type}; charset=utf-8"
 
-    response = HttpResponse(content, content_type=content_type)
+    response = asset_file_response(request, asset, content_type)
     response["Content-Disposition"] = f'inline; filename="{asset.download_name}"'
     if asset.content_type and asset.content_type.startswith("video/"):
         response["Content-Security-Policy"] = "default-src 'none'; media-src 'self';"
@@ -48,7 +222,10 @@ def view(request, asset_id: int):
 
 def read(request, asset_id: int):
     asset = access.asset_read(request, asset_id)
-    content = _get_asset_content(asset)
+    try:
+        content = _get_asset_content(asset)
+    except compression.CompressionUnavailableError as error:
+        return _compression_unavailable_response(error)
     content = content.decode("utf-8")
 
     return render(
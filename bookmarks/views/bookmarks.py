@@ -12,9 +12,11 @@ from django.http import (
 )
 from django.shortcuts import render
 from django.urls import reverse
+from django.utils.html import escape
 from django.utils.translation import gettext as _
 
 from bookmarks import queries, utils
+from bookmarks.db_routers import use_read_replica
 from bookmarks.forms import BookmarkForm
 from bookmarks.middlewares import (
     PREF_COOKIE_DOMAIN_COMPACT_MODE,
@@ -24,14 +26,15 @@ from bookmarks.middlewares import (
 from bookmarks.models import (
     Bookmark,
     BookmarkSearch,
+    ReaderArticle,
     UserProfile,
 )
 from bookmarks.services import assets as asset_actions
 from bookmarks.services import (
     favicon_loader,
     preview_image_loader,
+    reader,
     tasks,
-    website_loader,
 )
 from bookmarks.services.bookmarks import (
     archive_bookmark,
@@ -56,6 +59,7 @@ from bookmarks.services.bookmarks import (
 from bookmarks.type_defs import HttpRequest
 from bookmarks.utils import get_safe_return_url
 from bookmarks.views import access, contexts, partials, turbo
+from bookmarks.views.conditional import conditional_bookmark_page
 
 SIDEBAR_MODULE_TEMPLATES = {
     UserProfile.SIDEBAR_MODULE_SUMMARY: "bookmarks/sidebar/modules/summary/index.html",
@@ -195,6 +199,8 @@ def _handle_preference_toggle(request: HttpRequest):
 
 
 @login_required
+@use_read_replica
+@conditional_bookmark_page()
 def index(request: HttpRequest):
     if request.method == "POST":
         if "pref_action" in request.POST:
@@ -231,6 +237,8 @@ def index(request: HttpRequest):
 
 
 @login_required
+@use_read_replica
+@conditional_bookmark_page()
 def archived(request: HttpRequest):
     if request.method == "POST":
         if "pref_action" in request.POST:
@@ -264,6 +272,8 @@ def archived(request: HttpRequest):
     )
 
 
+@use_read_replica
+@conditional_bookmark_page(shared=True)
 def shared(request: HttpRequest):
     if request.method == "POST":
         if "pref_action" in request.POST:
@@ -301,6 +311,8 @@ def shared(request: HttpRequest):
 
 
 @login_required
+@use_read_replica
+@conditional_bookmark_page()
 def trashed(request: HttpRequest):
     if request.method == "POST":
         if "pref_action" in request.POST:
@@ -782,15 +794,25 @@ def close(request: HttpRequest):
 @login_required
 def read(request: HttpRequest, bookmark_id: int):
     bookmark = access.bookmark_read(request, bookmark_id)
-    try:
-        content = website_loader.load_full_page(bookmark.url)
-    except Exception as e:
-        content = f"<html><body><p>{_('Unable to load page content: %(error)s') % {'error': str(e)}}</p></body></html>"
+    # Serve the article from the latest snapshot or the cache, and only load
+    # the website in a background task if neither exists
+    article = reader.get_article(bookmark)
+    if article is None:
+        article = tasks.load_reader_article(bookmark)
+
+    loading = article.status == ReaderArticle.STATUS_PENDING
+    if article.status == ReaderArticle.STATUS_FAILURE:
+        # The failed article expires after a short time, opening reader mode
+        # again afterwards retries loading the page
+        content = f"<html><body><p>{_('Unable to load page content: %(error)s') % {'error': escape(article.error)}}</p></body></html>"
+    else:
+        content = article.html
 
     return render(
         request,
         "bookmarks/read.html",
         {
+            "loading": loading,
             "content": content,
         },
     )
@@ -0,0 +1,153 @@
+import functools
+import hashlib
+
+from django.contrib.auth.models import User
+from django.db.models import Count, Max
+from django.forms.models import model_to_dict
+from django.utils import timezone, translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from bookmarks.models import (
+    BookmarkBundle,
+    BookmarkChange,
+    Tag,
+    Toast,
+    UserProfile,
+)
+from bookmarks.type_defs import HttpRequest
+from bookmarks.utils import app_version
+from bookmarks.views.turbo import BOOKMARK_PAGE_STREAM_HEADER
+
+# Validators for conditional GET requests of bookmark lists. They are computed
+# from a few cheap queries before running the actual list query, so that
+# polling clients get a 304 response without rendering the list again. Every
+# change to a bookmark or its tags is recorded in the bookmark change log,
+# which makes the latest change a version of a user's bookmark data.
+
+
+def get_data_version(user: User | None) -> int:
+    """
+    Returns the sequence number of the latest change to the bookmarks of a
+    user, or of all users if no user is given.
+    """
+    changes = BookmarkChange.objects.all()
+    if user is not None:
+        changes = changes.filter(owner=user)
+    return changes.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def get_bookmarks_state(user: User | None, shared: bool = False) -> list:
+    if not shared:
+        return [get_data_version(user)]
+
+    # Shared lists contain bookmarks of all users that enabled sharing
+    sharing_users = (
+        UserProfile.objects.filter(enable_sharing=True)
+        .order_by("user_id")
+        .values_list("user_id", "enable_public_sharing")
+    )
+    return [get_data_version(None), list(sharing_users)]
+
+
+def get_bundles_state(user: User) -> list:
+    return list(
+        BookmarkBundle.objects.filter(owner=user)
+        .order_by("id")
+        .values_list("id", "order", "date_modified")
+    )
+
+
+def get_tags_state(user: User) -> dict:
+    # Renamed tags change the modification date, deleted tags the count
+    return Tag.objects.filter(owner=user).aggregate(
+        count=Count("id"), latest_id=Max("id"), latest_modified=Max("date_modified")
+    )
+
+
+def get_toasts_state(user: User) -> list:
+    # Toasts are shown until they are acknowledged
+    return list(
+        Toast.objects.filter(owner=user, acknowledged=False)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def get_profile_state(profile: UserProfile) -> dict:
+    return model_to_dict(profile)
+
+
+def build_etag(request: HttpRequest, *state) -> str:
+    """
+    Builds an ETag from the given state, and the parts of the request that
+    every response depends on.
+    """
+    parts = [
+        app_version,
+        request.get_host(),
+        request.get_full_path(),
+        request.headers.get("Accept", ""),
+        request.user.pk,
+        translation.get_language(),
+        *state,
+    ]
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+def bookmark_page_etag(request: HttpRequest, shared: bool = False) -> str | None:
+    """ETag for the HTML bookmark list pages"""
+    if request.method != "GET":
+        return None
+    # Bookmark details include assets, which are not versioned with bookmarks
+    if "details" in request.GET:
+        return None
+    # Pending messages are only shown once
+    storage = getattr(request, "_messages", None)
+    if storage is not None and len(storage) > 0:
+        return None
+
+    user = request.user if request.user.is_authenticated else None
+    state = [
+        get_bookmarks_state(user, shared),
+        get_profile_state(request.user_profile),
+        model_to_dict(request.global_settings),
+        get_bundles_state(user) if user else [],
+        get_toasts_state(user) if user else [],
+        request.headers.get("Turbo-Frame"),
+        request.headers.get(BOOKMARK_PAGE_STREAM_HEADER),
+        # Pages embed a CSRF token, which must match the current secret
+        request.META.get("CSRF_COOKIE"),
+        request.session.get("random_sort_seed"),
+        # The sidebar summary depends on the current date
+        timezone.localdate(),
+    ]
+    return build_etag(request, *state)
+
+
+def conditional_bookmark_page(shared: bool = False):
+    """
+    Answers conditional GET requests of a bookmark list page with a 304
+    response, as long as the page would not change.
+    """
+
+    def etag_func(request: HttpRequest, *args, **kwargs):
+        return bookmark_page_etag(request, shared)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @functools.wraps(view_func)
+        def inner(request: HttpRequest, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header("ETag"):
+                # Always revalidate, the page contains user specific data
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(
+                    response, ["Accept", "Turbo-Frame", BOOKMARK_PAGE_STREAM_HEADER]
+                )
+            return response
+
+        return inner
+
+    return decorator
@@ -21,6 +21,7 @@ from django.utils.translation import gettext as _
 from django.utils.translation import ngettext
 from django.views.i18n import LANGUAGE_QUERY_PARAMETER
 
+from bookmarks.db_routers import use_read_replica
 from bookmarks.models import (
     ApiToken,
     Bookmark,
@@ -540,6 +541,7 @@ def bookmark_import(request: HttpRequest):
 
 
 @login_required
+@use_read_replica
 def bookmark_export(request: HttpRequest):
     # noinspection PyBroadException
     try:
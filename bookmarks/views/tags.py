@@ -10,7 +10,7 @@ from django.utils.translation import gettext as _
 from django.utils.translation import ngettext
 
 from bookmarks.forms import TagForm, TagMergeForm
-from bookmarks.models import Bookmark, Tag
+from bookmarks.models import Bookmark, BookmarkChange, Tag
 from bookmarks.type_defs import HttpRequest
 from bookmarks.utils import redirect_with_query
 from bookmarks.views import turbo
@@ -166,8 +166,12 @@ def tag_merge(request: HttpRequest):
                 if new_relationships:
                     BookmarkTag.objects.bulk_create(new_relationships)
 
-                # Bulk delete all relationships for merge tags
+                # Bulk delete all relationships for merge tags, which changes
+                # the tags of all bookmarks that used them
                 merge_tag_ids = [tag.id for tag in merge_tags]
+                BookmarkChange.record_query(
+                    Bookmark.objects.filter(tags__in=merge_tag_ids)
+                )
                 BookmarkTag.objects.filter(tag_id__in=merge_tag_ids).delete()
 
                 # Delete the merged tags